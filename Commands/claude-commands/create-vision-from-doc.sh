@@ -195,22 +195,41 @@ if [ "$PREVIEW_MODE" == "false" ]; then
     print_status "  Product: $PRODUCT_NAME"
     print_status "  Vision: $VISION_PATH_RELATIVE"
     
+    # Tag the run with a correlation ID so we find our own run, not
+    # whichever run happens to be the latest
+    CORRELATION_ID="$(date +%s)-$$-$RANDOM"
+
     # Run the workflow
     cd "$REPO_ROOT"
     if gh workflow run create-vision.yml \
         -f product_name="$PRODUCT_NAME" \
         -f vision_file_path="$VISION_PATH_RELATIVE" \
-        -f preview=false; then
+        -f preview=false \
+        -f correlation_id="$CORRELATION_ID"; then
         
         print_success "Workflow triggered successfully!"
         
-        # Get workflow run URL
-        sleep 2
-        LATEST_RUN=$(gh run list --workflow=create-vision.yml --limit=1 --json url --jq '.[0].url')
+        # Poll for the run with exponential backoff and jitter (about 60s at most)
+        LATEST_RUN=""
+        DELAY=1
+        WAITED=0
+        while [ -z "$LATEST_RUN" ] && [ "$WAITED" -lt 60 ]; do
+            SLEEP_FOR=$(( DELAY / 2 + RANDOM % (DELAY / 2 + 1) + 1 ))
+            sleep "$SLEEP_FOR"
+            WAITED=$(( WAITED + SLEEP_FOR ))
+            LATEST_RUN=$(gh run list --workflow=create-vision.yml --event=workflow_dispatch --limit=20 \
+                --json url,displayTitle \
+                --jq ".[] | select(.displayTitle | contains(\"[$CORRELATION_ID]\")) | .url" 2>/dev/null | head -n 1)
+            DELAY=$(( DELAY * 2 > 16 ? 16 : DELAY * 2 ))
+        done
         
         if [ -n "$LATEST_RUN" ]; then
             print_status "View workflow progress at:"
             echo "  $LATEST_RUN"
+            print_status "Follow it until it completes with:"
+            echo "  gh run watch ${LATEST_RUN##*/}"
+        else
+            print_warning "Could not find the workflow run yet, but it should be running"
         fi
         
         print_status ""
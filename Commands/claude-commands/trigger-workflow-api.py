@@ -6,71 +6,257 @@ No GitHub CLI required - just needs a token
 
 import os
 import sys
-import json
 import time
-from urllib.request import Request, urlopen
-from urllib.error import HTTPError
+import argparse
+from datetime import datetime
 
-def trigger_workflow(token, owner, repo, workflow_file, inputs):
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+from github_api import (
+    DEFAULT_BASE_URL, DEFAULT_CONCURRENCY, CORRELATION_INPUT, GitHubClient, GitHubError, load_dispatch_jobs,
+    dispatch_all, new_correlation_id, dispatch_time, find_run, wait_for_run, add_metadata_arguments,
+    metadata_from_args, workflow_ids, product_issues, Outbox, TokenBucket, default_outbox_path, new_batch_id,
+    send_intent, drain,
+)
+from instrumentation import add_metrics_arguments, session_from_args
+
+# Defaults for the Ideas Matter vision workflow
+DEFAULT_OWNER = "bjackson071968"
+DEFAULT_REPO = "Jackson.Ideas"
+DEFAULT_REF = "master"
+DEFAULT_WORKFLOW = "create-vision.yml"
+DEFAULT_INPUTS = {
+    "product_name": "Ideas Matter",
+    "vision_file_path": "Commands/docs/visions/ideas-matter/vision.md",
+    "preview": "false"
+}
+
+# Workflows that take an issue number instead of a product: (input, issue label)
+ISSUE_INPUTS = {
+    "create-strategy.yml": ("vision_issue_number", "vision"),
+    "create-epics.yml": ("strategy_issue_number", "strategy"),
+}
+
+def trigger_workflow(client, workflow_file, inputs):
     """Trigger a GitHub workflow using the API"""
-    
-    # API endpoint
-    url = f"https://api.github.com/repos/{owner}/{repo}/actions/workflows/{workflow_file}/dispatches"
-    
-    # Prepare the request
-    data = {
-        "ref": "master",  # or "main" depending on your default branch
-        "inputs": inputs
-    }
-    
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json",
-        "Content-Type": "application/json"
-    }
-    
-    # Make the request
-    req = Request(url, data=json.dumps(data).encode(), headers=headers, method='POST')
-    
     try:
-        response = urlopen(req)
-        if response.status == 204:
-            return True, "Workflow triggered successfully!"
-        else:
-            return False, f"Unexpected status code: {response.status}"
-    except HTTPError as e:
-        error_body = e.read().decode()
-        return False, f"HTTP Error {e.code}: {error_body}"
+        response = client.dispatch_workflow(workflow_file, inputs)
+        return True, "Workflow triggered successfully!", dispatch_time(response)
+    except GitHubError as e:
+        return False, str(e), None
     except Exception as e:
-        return False, f"Error: {str(e)}"
+        return False, f"Error: {str(e)}", None
 
-def get_latest_run(token, owner, repo, workflow_file):
-    """Get the latest workflow run"""
-    
-    url = f"https://api.github.com/repos/{owner}/{repo}/actions/workflows/{workflow_file}/runs?per_page=1"
-    
-    headers = {
-        "Authorization": f"token {token}",
-        "Accept": "application/vnd.github.v3+json"
-    }
-    
-    req = Request(url, headers=headers)
-    
+def trigger_via_outbox(client, outbox, workflow_file, inputs, key=None):
+    """Record the dispatch in the outbox, then send it; a dispatch that cannot be sent now stays queued
+
+    Returns (success, message, dispatched_at, correlation ID).
+    """
+    outbox.recover()
+    # Without a key each trigger is its own batch, so the same inputs can be dispatched again
+    intent, added = outbox.add_dispatch(workflow_file, inputs, key=key, correlate=False, batch=new_batch_id())
+    correlation_id = intent.payload['inputs'].get(CORRELATION_INPUT)
+    if intent.status == 'pending':
+        result = send_intent(client, outbox, intent, TokenBucket())
+        if result is None:
+            return False, "Another drainer is sending this dispatch", None, correlation_id
+        intent = outbox.get(intent.key)
+        if result.outcome == 'deferred':
+            return False, f"{result.message}; queued in {outbox.path}", None, correlation_id
+    if intent.status == 'done':
+        message = "Workflow triggered successfully!" if added else f"Already dispatched as {intent.key}"
+        return True, message, datetime.fromisoformat(intent.result['dispatched_at']), correlation_id
+    return False, intent.error or f"Dispatch is {intent.status}", None, correlation_id
+
+def check_workflow(client, workflow_file):
+    """Error message if the repository has no such workflow, else None"""
+    # Listing workflows costs a request of its own; without the cache the
+    # dispatch's 404 reports a missing workflow just as well
+    if client.metadata is None:
+        return None
     try:
-        response = urlopen(req)
-        data = json.loads(response.read().decode())
-        if data["workflow_runs"]:
-            run = data["workflow_runs"][0]
-            return {
-                "id": run["id"],
-                "status": run["status"],
-                "url": run["html_url"]
-            }
+        workflows = workflow_ids(client)
+    except GitHubError:
+        # Without the list, let the dispatch itself report the problem
         return None
-    except Exception:
+    if workflow_file in workflows:
         return None
+    return f"No workflow named {workflow_file} in {client.owner}/{client.repo}"
 
-def main():
+def check_jobs(client, jobs):
+    """Jobs whose workflow exists, after reporting each missing workflow once
+
+    Returns (jobs to send, number of jobs dropped).
+    """
+    errors = {}
+    for workflow_file in dict.fromkeys(job.workflow for job in jobs):
+        error = check_workflow(client, workflow_file)
+        if error:
+            errors[workflow_file] = error
+            print(f"✗ {error}")
+    return [job for job in jobs if job.workflow not in errors], sum(1 for job in jobs if job.workflow in errors)
+
+def workflow_inputs(client, workflow_file, inputs):
+    """Inputs for a workflow, looking up the product's issue when it takes one that was not given
+
+    Returns (inputs, error message or None).
+    """
+    if workflow_file not in ISSUE_INPUTS:
+        return inputs, None
+    input_name, label = ISSUE_INPUTS[workflow_file]
+    # These workflows do not declare the create-vision inputs
+    product_name = inputs.get("product_name", DEFAULT_INPUTS["product_name"])
+    inputs = {key: value for key, value in inputs.items() if key not in DEFAULT_INPUTS or key == "preview"}
+    if inputs.get(input_name):
+        return inputs, None
+    try:
+        number = product_issues(client, label).get(product_name)
+    except GitHubError as e:
+        return inputs, f"Could not look up the {label} issue: {e}"
+    if number is None:
+        return inputs, f"No {label} issue found for {product_name}; pass --input {input_name}=NUMBER"
+    print(f"Using {label} issue #{number} for {product_name}")
+    inputs[input_name] = str(number)
+    return inputs, None
+
+def print_run_status(status):
+    """Report a run status transition"""
+    state = status.status if status.conclusion is None else f"{status.status} ({status.conclusion})"
+    print(f"  [{status.elapsed:6.1f}s] {state}")
+
+def print_rate_limit(client):
+    """Show the API rate limit reported by the last response"""
+    rate_limit = client.rate_limit
+    if rate_limit is None or rate_limit.remaining is None:
+        return
+    reset = time.strftime('%H:%M:%S', time.localtime(rate_limit.reset)) if rate_limit.reset else 'unknown'
+    print(f"API rate limit: {rate_limit.remaining}/{rate_limit.limit} remaining (resets at {reset})")
+
+def parse_input(value):
+    """Parse a key=value workflow input"""
+    key, sep, input_value = value.partition('=')
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected key=value, got '{value}'")
+    return key, input_value
+
+def print_dispatch_result(result):
+    """Report one finished dispatch job"""
+    job = result.job
+    retries = f", {result.attempts} attempts" if result.attempts > 1 else ""
+    if result.ok:
+        print(f"✓ {job.name} ({job.workflow}) in {result.latency:.2f}s{retries}")
+    else:
+        print(f"✗ {job.name} ({job.workflow}) after {result.latency:.2f}s{retries}: {result.message}")
+
+def print_outbox_result(result):
+    """Report one dispatch sent from the outbox"""
+    payload = result.intent.payload
+    name = payload['inputs'].get('product_name') or payload['workflow']
+    if result.outcome in ('sent', 'recovered'):
+        print(f"✓ {name} ({payload['workflow']})")
+    elif result.outcome == 'deferred':
+        print(f"… {name} ({payload['workflow']}): {result.message}; will retry")
+    else:
+        print(f"✗ {name} ({payload['workflow']}): {result.message}")
+
+def run_outbox_jobs(client, outbox, jobs_file, inputs, batch=None):
+    """Queue every job in a jobs file in the outbox and drain it at the pace the API allows
+
+    Jobs are keyed within a batch: a new one per run unless a batch ID is
+    given, so resuming a batch skips the jobs it already dispatched.
+    """
+    try:
+        jobs = load_dispatch_jobs(jobs_file, DEFAULT_WORKFLOW, inputs)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Could not read jobs file: {e}")
+        sys.exit(1)
+    jobs, dropped = check_jobs(client, jobs)
+
+    batch = batch or new_batch_id()
+    queued = [outbox.add_dispatch(job.workflow, job.inputs, job.ref, batch=batch) for job in jobs]
+    keys = [intent.key for intent, _ in queued]
+    skipped = {intent.key for intent, _ in queued if intent.status == 'done'}
+    print(f"Repository: {client.owner}/{client.repo}")
+    print(f"Batch: {batch} (resume it with --batch-id {batch})")
+    print(f"Jobs: {len(jobs) + dropped} ({sum(1 for _, added in queued if added)} newly queued in {outbox.path}, "
+          f"{len(skipped)} already done, {dropped} for missing workflows)")
+    print()
+
+    start = time.perf_counter()
+    results = drain(client, outbox, on_result=print_outbox_result)
+    dispatched = sum(1 for key in keys if key not in skipped and outbox.get(key).status == 'done')
+    failed = len(jobs) - dispatched - len(skipped) + dropped
+    print()
+    print(f"Sent {len(results)} dispatches in {time.perf_counter() - start:.2f}s "
+          f"({dispatched} dispatched, {len(skipped)} already done and skipped, {failed} failed)")
+    print_rate_limit(client)
+    return failed == 0
+
+def run_dispatch_jobs(client, jobs_file, inputs, concurrency):
+    """Dispatch every job in a jobs file concurrently and summarize"""
+    try:
+        jobs = load_dispatch_jobs(jobs_file, DEFAULT_WORKFLOW, inputs)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: Could not read jobs file: {e}")
+        sys.exit(1)
+    jobs, dropped = check_jobs(client, jobs)
+
+    print(f"Repository: {client.owner}/{client.repo}")
+    print(f"Jobs: {len(jobs) + dropped} (concurrency {concurrency}, {dropped} for missing workflows)")
+    print()
+
+    start = time.perf_counter()
+    results = dispatch_all(client, jobs, concurrency, on_result=print_dispatch_result)
+    elapsed = time.perf_counter() - start
+
+    succeeded = sum(1 for result in results if result.ok)
+    failed = len(results) - succeeded + dropped
+    latencies = sorted(result.latency for result in results)
+    print()
+    print(f"Dispatched {succeeded} of {len(results) + dropped} workflows in {elapsed:.2f}s ({failed} failed)")
+    if latencies:
+        print(f"Latency: median {latencies[len(latencies) // 2]:.2f}s, max {latencies[-1]:.2f}s")
+    print_rate_limit(client)
+    return failed == 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Trigger a GitHub workflow using the API')
+    parser.add_argument('--owner', default=os.environ.get('GH_OWNER', DEFAULT_OWNER),
+                        help='Repository owner')
+    parser.add_argument('--repo', default=os.environ.get('GH_REPO', DEFAULT_REPO),
+                        help='Repository name')
+    parser.add_argument('--ref', default=DEFAULT_REF, help='Branch to run the workflow on')
+    parser.add_argument('--workflow', default=DEFAULT_WORKFLOW, help='Workflow file name')
+    parser.add_argument('--input', dest='inputs', action='append', type=parse_input, default=[],
+                        metavar='KEY=VALUE', help='Workflow input (repeatable, overrides defaults)')
+    parser.add_argument('--api-url', default=os.environ.get('GITHUB_API_URL', DEFAULT_BASE_URL),
+                        help='GitHub API base URL')
+    parser.add_argument('--jobs', metavar='FILE',
+                        help='JSON list of {"workflow", "inputs", "ref", "name"} jobs to dispatch concurrently')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Maximum dispatches in flight with --jobs')
+    parser.add_argument('--wait', action='store_true',
+                        help='Follow the run and report status changes until it completes')
+    parser.add_argument('--timeout', type=float, default=3600,
+                        help='Seconds to wait for the run to complete with --wait')
+    parser.add_argument('--no-correlation-input', action='store_true',
+                        help=f"Do not send the {CORRELATION_INPUT} input (for workflows that do not declare it); "
+                             "the run is then matched by dispatch time only")
+    parser.add_argument('--outbox', nargs='?', const=default_outbox_path(), metavar='FILE',
+                        help='Record dispatches in a durable outbox first, so a failed one stays queued for '
+                             '"github-outbox.py drain" (default FILE: $COMMANDS_OUTBOX or '
+                             '~/.local/state/jackson-ideas-commands/github-outbox.sqlite)')
+    parser.add_argument('--idempotency-key', metavar='KEY',
+                        help='With --outbox, a dispatch already sent under this key is not sent again')
+    parser.add_argument('--batch-id', metavar='ID',
+                        help='With --outbox and --jobs, resume this batch: jobs it already dispatched are skipped '
+                             '(default: a new batch, so every job is dispatched)')
+    add_metadata_arguments(parser)
+    add_metrics_arguments(parser)
+    return parser
+
+def run(args):
+    """Dispatch the workflow or jobs described by the parsed arguments"""
     print("GitHub Workflow Trigger (API Method)")
     print("====================================")
     print()
@@ -92,41 +278,83 @@ def main():
         print("Or create a .env file with: GH_TOKEN=your-token-here")
         sys.exit(1)
     
-    # Repository details
-    owner = "bjackson071968"
-    repo = "Jackson.Ideas"
-    workflow_file = "create-vision.yml"
-    
+    owner = args.owner
+    repo = args.repo
+    workflow_file = args.workflow
+
     # Workflow inputs
-    inputs = {
-        "product_name": "Ideas Matter",
-        "vision_file_path": "Commands/docs/visions/ideas-matter/vision.md",
-        "preview": "false"
-    }
-    
+    inputs = dict(DEFAULT_INPUTS)
+    inputs.update(args.inputs)
+    metadata = metadata_from_args(args)
+
+    if args.jobs:
+        # Job inputs are layered over --input values only, not the Ideas Matter defaults
+        concurrency = max(args.concurrency, 1)
+        client = GitHubClient(token, owner, repo, ref=args.ref, base_url=args.api_url, pool_size=concurrency,
+                              metadata=metadata)
+        if args.outbox:
+            with Outbox(args.outbox, f"{owner}/{repo}") as outbox:
+                success = run_outbox_jobs(client, outbox, args.jobs, dict(args.inputs), args.batch_id)
+        else:
+            success = run_dispatch_jobs(client, args.jobs, dict(args.inputs), concurrency)
+        client.close()
+        sys.exit(0 if success else 1)
+
+    client = GitHubClient(token, owner, repo, ref=args.ref, base_url=args.api_url, metadata=metadata)
+
+    # Catch a mistyped workflow or a missing issue before dispatching anything
+    product_name = inputs.get('product_name', '')
+    inputs, error = workflow_inputs(client, workflow_file, inputs)
+    error = error or check_workflow(client, workflow_file)
+    if error:
+        print(f"ERROR: {error}")
+        client.close()
+        sys.exit(1)
+
+    # The correlation ID ends up in the run name, so we can tell our run
+    # apart from any other dispatched at the same time
+    correlation_id = None
+    if not args.no_correlation_input:
+        correlation_id = inputs.setdefault(CORRELATION_INPUT, new_correlation_id())
+
     print(f"Repository: {owner}/{repo}")
     print(f"Workflow: {workflow_file}")
-    print(f"Product: {inputs['product_name']}")
+    print(f"Product: {product_name}")
     print()
     
     # Trigger the workflow
     print("Triggering workflow...")
-    success, message = trigger_workflow(token, owner, repo, workflow_file, inputs)
-    
+    if args.outbox:
+        with Outbox(args.outbox, f"{owner}/{repo}") as outbox:
+            success, message, dispatched_at, correlation_id = trigger_via_outbox(
+                client, outbox, workflow_file, inputs, args.idempotency_key)
+    else:
+        success, message, dispatched_at = trigger_workflow(client, workflow_file, inputs)
+    conclusion = None
+
     if success:
         print(f"✓ {message}")
         print()
-        
-        # Wait and get the run URL
+
+        # Find the run this dispatch started
         print("Waiting for workflow to start...")
-        time.sleep(3)
-        
-        run_info = get_latest_run(token, owner, repo, workflow_file)
-        if run_info:
+        try:
+            run = find_run(client, workflow_file, dispatched_at, correlation_id)
+        except Exception:
+            run = None
+
+        if run:
             print(f"✓ Workflow started!")
-            print(f"  Status: {run_info['status']}")
-            print(f"  URL: {run_info['url']}")
+            print(f"  Status: {run['status']}")
+            print(f"  URL: {run['html_url']}")
             print()
+            if args.wait:
+                print("Following workflow run...")
+                last = wait_for_run(client, run['id'], print_run_status, args.timeout)
+                conclusion = last.conclusion if last else None
+                if last is None or last.status != "completed":
+                    print(f"! Gave up waiting after {args.timeout:.0f}s")
+                print()
             print("The workflow will create:")
             print("  - Vision Issue (pinned)")
             print("  - GitHub Project")
@@ -141,6 +369,21 @@ def main():
         print("1. Check your token has 'repo' and 'workflow' scopes")
         print("2. Verify the repository and workflow names")
         print("3. Ensure the workflow file exists in .github/workflows/")
+        if args.outbox:
+            print()
+            print(f"The dispatch is kept in {args.outbox}. Send it later with 'drain', after 'retry' if it failed:")
+            print(f"  python3 Commands/scripts/github-outbox.py --outbox {args.outbox} --owner {owner} --repo {repo} drain")
+
+    print_rate_limit(client)
+    client.close()
+
+    if not success or (args.wait and conclusion != "success"):
+        sys.exit(1)
+
+def main():
+    args = build_parser().parse_args()
+    with session_from_args(args, 'trigger-workflow-api'):
+        run(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -74,6 +74,18 @@ echo "4. Fill in the required inputs"
 echo "5. Click 'Run workflow' button"
 echo ""
 
+echo -e "${GREEN}Running the Whole Chain In One Go${NC}"
+echo "==================================="
+echo "run-pipeline.py does what all three workflows do, for one or many products,"
+echo "and passes the issue numbers along itself:"
+echo ""
+echo "  python3 Commands/scripts/run-pipeline.py Commands/docs/visions/ideas-matter/vision.md --product 'Ideas Matter'"
+echo ""
+echo "Add --fake to run against a local GitHub stand-in (nothing is created on GitHub):"
+echo ""
+echo "  python3 Commands/scripts/run-pipeline.py path/to/visions/ --fake --workers 4 --report pipeline.json"
+echo ""
+
 echo -e "${GREEN}Checking Progress${NC}"
 echo "=================="
 echo "Monitor your workflow progress:"
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Vision Processor Benchmarks
+Generates a synthetic corpus, times every pipeline stage and compares
+results between commits
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+
+from benchmarks import (
+    DEFAULT_SPEC, SIZES, DEFAULT_REPEAT, DEFAULT_WARMUP, DEFAULT_THRESHOLD, DEFAULT_NOISE_FLOOR_MS, BenchmarkCase,
+    generate_corpus, run_benchmarks, compare_results,
+)
+
+def parse_sizes(value):
+    """Parse 'small,medium' or 'tiny=20,huge=20000' into {name: paragraphs}"""
+    sizes = {}
+    for item in value.split(','):
+        name, _, paragraphs = item.strip().partition('=')
+        if paragraphs:
+            sizes[name] = int(paragraphs)
+        elif name in SIZES:
+            sizes[name] = SIZES[name]
+        else:
+            raise argparse.ArgumentTypeError(f"Unknown size '{name}' (use one of {', '.join(SIZES)} or NAME=PARAGRAPHS)")
+    return sizes
+
+def spec_from_args(args):
+    return DEFAULT_SPEC._replace(heading_density=args.heading_density, list_density=args.list_density,
+                                 runs=args.runs, bold_density=args.bold_density,
+                                 unicode_density=args.unicode_density, seed=args.seed)
+
+def print_case(case, result):
+    print(f"{case.name} ({result['bytes'] / 1024:.0f} KiB, peak RSS {result['peak_rss_kb'] or '?'} KiB)")
+    for timing, values in result['timings'].items():
+        print(f"  {timing:<30} {values['median_ms']:9.2f} ms  (min {values['min_ms']:.2f})")
+
+def run_corpus_command(args):
+    documents = generate_corpus(args.output_dir, spec_from_args(args), args.sizes, args.formats)
+    for path in documents.values():
+        print(f"Generated {path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+    return 0
+
+def run_run_command(args):
+    corpus_dir = args.corpus or tempfile.mkdtemp(prefix='vision-corpus-')
+    documents = generate_corpus(corpus_dir, spec_from_args(args), args.sizes, args.formats)
+    cases = [BenchmarkCase(f"{document_format}-{size}-{args.reader}" if document_format == 'docx'
+                           else f"{document_format}-{size}", path, args.reader)
+             for (document_format, size), path in documents.items()]
+
+    print(f"Benchmarking {len(cases)} documents, {args.warmup} warm-up and {args.repeat} timed runs each")
+    print()
+    try:
+        results = run_benchmarks(cases, args.repeat, on_case=print_case, warmup=args.warmup)
+    except RuntimeError as e:
+        print(f"ERROR: {e}")
+        return 1
+    results['spec'] = dict(spec_from_args(args)._asdict(), sizes=args.sizes)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print()
+    print(f"Results saved to: {args.output}")
+    return 0
+
+def run_compare_command(args):
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, 'r', encoding='utf-8') as f:
+        current = json.load(f)
+
+    print(f"Comparing {current.get('commit') or args.current} against {baseline.get('commit') or args.baseline} "
+          f"(fastest runs, threshold {args.threshold:.0%}, noise floor {args.noise_floor} ms)")
+    regressions = compare_results(baseline, current, args.threshold, args.noise_floor)
+    if not regressions:
+        print("✓ No regressions")
+        return 0
+    for regression in regressions:
+        print(f"✗ {regression.case} {regression.timing}: {regression.baseline_ms:.2f} ms -> "
+              f"{regression.current_ms:.2f} ms (+{regression.change:.0%})")
+    return 1
+
+def add_corpus_arguments(parser):
+    parser.add_argument('--sizes', type=parse_sizes, default=dict(SIZES),
+                        help=f"comma separated sizes: {', '.join(SIZES)} or NAME=PARAGRAPHS (default: all)")
+    parser.add_argument('--formats', type=lambda value: tuple(value.split(',')), default=('md', 'docx'),
+                        help='comma separated formats to generate (default: md,docx)')
+    parser.add_argument('--heading-density', type=float, default=DEFAULT_SPEC.heading_density,
+                        help='share of paragraphs that are headings')
+    parser.add_argument('--list-density', type=float, default=DEFAULT_SPEC.list_density,
+                        help='share of paragraphs that are list items')
+    parser.add_argument('--runs', type=int, default=DEFAULT_SPEC.runs, help='formatting runs per paragraph')
+    parser.add_argument('--bold-density', type=float, default=DEFAULT_SPEC.bold_density,
+                        help='share of runs that are bold')
+    parser.add_argument('--unicode-density', type=float, default=DEFAULT_SPEC.unicode_density,
+                        help='share of runs with smart quotes, dashes and other Word artifacts')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SPEC.seed, help='random seed for the corpus')
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Benchmark the vision document processors')
+    commands = parser.add_subparsers(dest='command', metavar='<command>')
+    commands.required = True
+
+    corpus = commands.add_parser('corpus', help='generate a synthetic corpus')
+    corpus.add_argument('output_dir')
+    add_corpus_arguments(corpus)
+
+    run = commands.add_parser('run', help='generate a corpus and time every stage')
+    add_corpus_arguments(run)
+    run.add_argument('--corpus', help='directory to generate the corpus in (default: a temporary directory)')
+    run.add_argument('--reader', choices=('python-docx', 'stream'), default='stream', help='DOCX reader to time')
+    run.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='timed runs per document')
+    run.add_argument('--warmup', type=int, default=DEFAULT_WARMUP, help='untimed runs before the timed ones')
+    run.add_argument('--output', default='benchmark-results.json', help='results file')
+
+    compare = commands.add_parser('compare', help='compare two results files')
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                         help='relative slowdown that counts as a regression (default: 0.10)')
+    compare.add_argument('--noise-floor', type=float, default=DEFAULT_NOISE_FLOOR_MS,
+                         help='ignore slowdowns smaller than this many milliseconds')
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    handlers = {
+        'corpus': run_corpus_command,
+        'run': run_run_command,
+        'compare': run_compare_command,
+    }
+    sys.exit(handlers[args.command](args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Vision pipeline benchmarks
+Synthetic corpus generation and per-stage timing of the document processors
+"""
+
+from .corpus import (
+    CorpusSpec, DEFAULT_SPEC, SIZES, generate_blocks, render_markdown_document, write_docx_document,
+    write_markdown_document, generate_corpus,
+)
+from .harness import (
+    DEFAULT_REPEAT, DEFAULT_WARMUP, DEFAULT_THRESHOLD, DEFAULT_NOISE_FLOOR_MS, BenchmarkCase, Regression, measure_case,
+    run_case, run_benchmarks, compare_results,
+)
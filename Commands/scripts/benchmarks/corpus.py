@@ -0,0 +1,194 @@
+"""
+Synthetic vision corpus
+Generates .md and .docx vision documents of a chosen size and shape
+"""
+
+import os
+import random
+import zipfile
+from collections import namedtuple
+from xml.sax.saxutils import escape
+
+from vision_pipeline import CANONICAL_SECTIONS
+
+# Shape of a generated document
+CorpusSpec = namedtuple('CorpusSpec', [
+    'paragraphs',         # body paragraphs, headings included
+    'heading_density',    # share of paragraphs that are headings
+    'list_density',       # share of paragraphs that are list items
+    'runs',               # runs per body paragraph
+    'bold_density',       # share of runs that are bold
+    'unicode_density',    # share of runs with smart quotes, dashes and other Word artifacts
+    'seed',
+])
+
+DEFAULT_SPEC = CorpusSpec(paragraphs=500, heading_density=0.08, list_density=0.25, runs=3, bold_density=0.1,
+                          unicode_density=0.3, seed=1)
+
+# Named sizes for benchmark runs, in paragraphs
+SIZES = {
+    'small': 50,
+    'medium': 500,
+    'large': 5000,
+}
+
+WORDS = (
+    "platform users ideas research market product insight strategy customers growth value team data "
+    "analysis validation workflow experience quality feedback launch partners pricing adoption metrics "
+    "innovation discovery evidence founders teams investors opportunity risk roadmap capability"
+).split()
+
+UNICODE_FRAGMENTS = ('“quoted”', 'don’t', 'fast—reliable', '2024–2026', 'more…',
+                     'non breaking', 'soft­hyphen', 'zero​width')
+
+# Headings are canonical section names, their synonyms or free text
+FREE_HEADINGS = ('Background', 'Appendix', 'Notes', 'Open Questions', 'Glossary', 'Team')
+
+Block = namedtuple('Block', ['kind', 'level', 'runs'])  # kind: heading, bullet, number or text
+
+def heading_titles():
+    """Every heading text the generator may use"""
+    titles = []
+    for name, keywords in CANONICAL_SECTIONS:
+        titles.append(name)
+        titles.extend(keyword.title() for keyword in keywords)
+    return titles + list(FREE_HEADINGS)
+
+def make_sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+def make_runs(rng, spec):
+    """Text runs of one paragraph as (text, bold) pairs"""
+    runs = []
+    for index in range(max(spec.runs, 1)):
+        text = make_sentence(rng, rng.randint(4, 12))
+        if rng.random() < spec.unicode_density:
+            text += ' ' + rng.choice(UNICODE_FRAGMENTS)
+        text += '.' if index == spec.runs - 1 else ''
+        runs.append((text + ('' if index == spec.runs - 1 else ' '), rng.random() < spec.bold_density))
+    return runs
+
+def generate_blocks(spec):
+    """The logical content of a document: headings, list items and text"""
+    rng = random.Random(spec.seed)
+    titles = heading_titles()
+    blocks = [Block('heading', 1, [("Product Vision", False)])]
+    for _ in range(max(spec.paragraphs - 1, 0)):
+        roll = rng.random()
+        if roll < spec.heading_density:
+            level = 2 if rng.random() < 0.7 else 3
+            blocks.append(Block('heading', level, [(rng.choice(titles), False)]))
+        elif roll < spec.heading_density + spec.list_density:
+            kind = 'bullet' if rng.random() < 0.6 else 'number'
+            blocks.append(Block(kind, 0, make_runs(rng, spec._replace(runs=1))))
+        else:
+            blocks.append(Block('text', 0, make_runs(rng, spec)))
+    return blocks
+
+def render_markdown_document(blocks):
+    """Markdown text for generated blocks"""
+    lines = []
+    for block in blocks:
+        # Bold markers go around the words, not the space that joins runs
+        text = ''.join(f"**{run.rstrip()}**{run[len(run.rstrip()):]}" if bold and run.strip() else run
+                       for run, bold in block.runs)
+        if block.kind == 'heading':
+            lines.append(f"{'#' * block.level} {text}")
+        elif block.kind == 'bullet':
+            lines.append(f"- {text}")
+        elif block.kind == 'number':
+            lines.append(f"1. {text}")
+        else:
+            lines.append(text)
+        lines.append('')
+    return '\n'.join(lines)
+
+# Minimal WordprocessingML package parts
+CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+</Types>"""
+
+PACKAGE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+</Relationships>"""
+
+W_NAMESPACE = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+
+# Paragraph style IDs and the names Word gives them
+STYLES = (
+    ('Normal', 'Normal'),
+    ('Heading1', 'heading 1'),
+    ('Heading2', 'heading 2'),
+    ('Heading3', 'heading 3'),
+    ('ListBullet', 'List Bullet'),
+    ('ListNumber', 'List Number'),
+)
+
+def styles_xml():
+    styles = []
+    for style_id, name in STYLES:
+        default = ' w:default="1"' if style_id == 'Normal' else ''
+        styles.append(f'<w:style w:type="paragraph"{default} w:styleId="{style_id}"><w:name w:val="{name}"/></w:style>')
+    return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<w:styles xmlns:w="{W_NAMESPACE}">{"".join(styles)}</w:styles>')
+
+def paragraph_xml(block):
+    if block.kind == 'heading':
+        style = f"Heading{block.level}"
+    elif block.kind == 'bullet':
+        style = 'ListBullet'
+    elif block.kind == 'number':
+        style = 'ListNumber'
+    else:
+        style = None
+    properties = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ''
+    runs = ''.join(
+        f'<w:r>{"<w:rPr><w:b/></w:rPr>" if bold else ""}<w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+        for text, bold in block.runs
+    )
+    return f'<w:p>{properties}{runs}</w:p>'
+
+def document_xml(blocks):
+    body = ''.join(paragraph_xml(block) for block in blocks)
+    return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<w:document xmlns:w="{W_NAMESPACE}"><w:body>{body}<w:sectPr/></w:body></w:document>')
+
+def write_docx_document(path, blocks):
+    """Write generated blocks as a .docx package"""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        archive.writestr('_rels/.rels', PACKAGE_RELS)
+        archive.writestr('word/_rels/document.xml.rels', DOCUMENT_RELS)
+        archive.writestr('word/styles.xml', styles_xml())
+        archive.writestr('word/document.xml', document_xml(blocks))
+
+def write_markdown_document(path, blocks):
+    """Write generated blocks as a markdown file"""
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(render_markdown_document(blocks))
+
+def generate_corpus(output_dir, spec=DEFAULT_SPEC, sizes=None, formats=('md', 'docx')):
+    """Write one document per size and format; returns {(format, size): path}"""
+    os.makedirs(output_dir, exist_ok=True)
+    sizes = sizes or SIZES
+    documents = {}
+    for size, paragraphs in sizes.items():
+        blocks = generate_blocks(spec._replace(paragraphs=paragraphs))
+        for document_format in formats:
+            path = os.path.join(output_dir, f"vision-{size}.{document_format}")
+            if document_format == 'docx':
+                write_docx_document(path, blocks)
+            else:
+                write_markdown_document(path, blocks)
+            documents[(document_format, size)] = path
+    return documents
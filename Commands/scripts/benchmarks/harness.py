@@ -0,0 +1,228 @@
+"""
+Benchmark harness
+Times every vision pipeline stage and the public conversion functions on a
+corpus, one fresh process per case so peak memory is measured per case
+"""
+
+import io
+import os
+import sys
+import time
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+from collections import namedtuple
+
+from vision_pipeline import (
+    read_docx, normalize, classify, block_lines, iter_sections, SectionMatcher, REQUIRED_SECTIONS,
+    render_vision, render_structured_vision, render_unstructured_vision, write_output,
+    extract_sections_from_content, convert_docx_to_vision, convert_docx_to_markdown, process_markdown_vision,
+)
+
+RESULTS_VERSION = 1
+DEFAULT_REPEAT = 15
+
+# Untimed runs before the timed ones, to warm imports, caches and the allocator
+DEFAULT_WARMUP = 2
+
+# Relative slowdown of the fastest run before it counts as a regression
+DEFAULT_THRESHOLD = 0.10
+
+# Timings faster than this are too noisy to flag, in milliseconds
+DEFAULT_NOISE_FLOOR_MS = 1.0
+
+# One document to benchmark
+BenchmarkCase = namedtuple('BenchmarkCase', ['name', 'path', 'reader'])
+
+# A timing that got slower than the threshold allows
+Regression = namedtuple('Regression', ['case', 'timing', 'baseline_ms', 'current_ms', 'change'])
+
+def docx_stages(path, output_path, reader):
+    """Run the DOCX conversion stage by stage and time each one"""
+    timings = {}
+    start = time.perf_counter()
+    paragraphs = list(read_docx(path, reader))
+    timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    blocks = list(classify(normalize(paragraphs)))
+    timings['clean'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sections = list(iter_sections(block_lines(blocks)))
+    timings['section'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = SectionMatcher(sections)
+    timings['map'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    content = render_vision(sections, 'Benchmark Product', matcher)
+    timings['render'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_output(output_path, content)
+    timings['write'] = time.perf_counter() - start
+    return timings
+
+def markdown_stages(path, output_path, reader):
+    """Run the Markdown processing stage by stage and time each one"""
+    timings = {}
+    start = time.perf_counter()
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    timings['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    sections = list(iter_sections(io.StringIO(text)))
+    timings['section'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = SectionMatcher(sections)
+    all(matcher.has_heading(section) for section in REQUIRED_SECTIONS)
+    timings['map'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    if len(sections) < 3:
+        content = render_unstructured_vision(text, 'Benchmark Product')
+    else:
+        content = render_structured_vision(sections, 'Benchmark Product')
+    timings['render'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    write_output(output_path, content)
+    timings['write'] = time.perf_counter() - start
+    return timings
+
+def docx_functions(path, output_path, reader):
+    """Time the public DOCX entry points end to end"""
+    timings = {}
+    start = time.perf_counter()
+    convert_docx_to_vision(path, output_path, 'Benchmark Product', reader)
+    timings['convert_docx_to_vision'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    convert_docx_to_markdown(path, output_path, reader)
+    timings['convert_docx_to_markdown'] = time.perf_counter() - start
+    return timings
+
+def markdown_functions(path, output_path, reader):
+    """Time the public Markdown entry points end to end"""
+    timings = {}
+    start = time.perf_counter()
+    process_markdown_vision(path, output_path, 'Benchmark Product')
+    timings['process_markdown_vision'] = time.perf_counter() - start
+
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    start = time.perf_counter()
+    extract_sections_from_content(content)
+    timings['extract_sections_from_content'] = time.perf_counter() - start
+    return timings
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def measure_case(path, reader, repeat, warmup=DEFAULT_WARMUP):
+    """Run one case repeatedly and summarize its timings in milliseconds"""
+    if path.endswith('.docx'):
+        stages, functions = docx_stages, docx_functions
+    else:
+        stages, functions = markdown_stages, markdown_functions
+
+    samples = {}
+    with tempfile.TemporaryDirectory(prefix='vision-benchmark-') as output_dir:
+        output_path = os.path.join(output_dir, 'vision.md')
+        # The first runs warm imports and caches and are not recorded
+        for _ in range(warmup):
+            stages(path, output_path, reader)
+            functions(path, output_path, reader)
+        for _ in range(repeat):
+            for run in (stages, functions):
+                for name, seconds in run(path, output_path, reader).items():
+                    samples.setdefault(name, []).append(seconds * 1000)
+
+    return {
+        'bytes': os.path.getsize(path),
+        'peak_rss_kb': peak_rss_kb(),
+        'timings': {
+            name: {'median_ms': statistics.median(values), 'min_ms': min(values), 'max_ms': max(values)}
+            for name, values in samples.items()
+        },
+    }
+
+def run_case(case, repeat, warmup=DEFAULT_WARMUP):
+    """Measure a case in a fresh interpreter so peak memory is its own"""
+    scripts_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    command = [sys.executable, '-m', 'benchmarks.harness', case.path, case.reader, str(repeat), str(warmup)]
+    completed = subprocess.run(command, cwd=scripts_dir, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               universal_newlines=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark {case.name} failed: {completed.stderr.strip()}")
+    return json.loads(completed.stdout)
+
+def git_commit(cwd=None):
+    """Current commit of the working tree, or None outside a git checkout"""
+    try:
+        completed = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL, universal_newlines=True)
+    except OSError:
+        return None
+    return completed.stdout.strip() or None
+
+def run_benchmarks(cases, repeat=DEFAULT_REPEAT, on_case=None, warmup=DEFAULT_WARMUP):
+    """Measure every case and return a results document"""
+    results = {
+        'version': RESULTS_VERSION,
+        'commit': git_commit(os.path.dirname(os.path.abspath(__file__))),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'warmup': warmup,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'cases': {},
+    }
+    for case in cases:
+        results['cases'][case.name] = run_case(case, repeat, warmup)
+        if on_case:
+            on_case(case, results['cases'][case.name])
+    return results
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD, noise_floor_ms=DEFAULT_NOISE_FLOOR_MS):
+    """Find timings whose fastest run got slower than the threshold allows"""
+    regressions = []
+    for name, case in current['cases'].items():
+        baseline_case = baseline['cases'].get(name)
+        if baseline_case is None:
+            continue
+        for timing, values in case['timings'].items():
+            baseline_values = baseline_case['timings'].get(timing)
+            if baseline_values is None:
+                continue
+            # The fastest run is the least disturbed by the rest of the machine,
+            # and a slowdown within the baseline's own spread is just noise
+            before, after = baseline_values['min_ms'], values['min_ms']
+            spread = baseline_values['max_ms'] - baseline_values['min_ms']
+            if after - before < max(noise_floor_ms, spread) or before <= 0:
+                continue
+            change = (after - before) / before
+            if change > threshold:
+                regressions.append(Regression(name, timing, before, after, change))
+    return regressions
+
+def main():
+    """Measure one case and print its results as JSON (used by run_case)"""
+    path, reader, repeat, warmup = sys.argv[1], sys.argv[2], int(sys.argv[3]), int(sys.argv[4])
+    json.dump(measure_case(path, reader, repeat, warmup), sys.stdout)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Epic Issue Creator for the create-epics workflow
+Turns generated epics into GitHub issues, adds them to the product project
+and can resume from a checkpoint after a partial failure
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from github_api import (
+    DEFAULT_BASE_URL, DEFAULT_CONCURRENCY, GitHubClient, GitHubError, Checkpoint, create_issues, find_project,
+    add_project_items, comment_once, add_metadata_arguments, metadata_from_args, Outbox, create_issues_via_outbox,
+    write_github_output,
+)
+from planning import render_epic_issue
+from instrumentation import add_metrics_arguments, session_from_args
+
+def print_issue_result(result):
+    """Report one issue as it is created"""
+    if result.error:
+        print(f"✗ {result.title}: {result.error}")
+    elif result.created:
+        print(f"Created Epic #{result.number}: {result.title}")
+    else:
+        print(f"Already created Epic #{result.number}: {result.title}")
+
+def build_parser():
+    repository = os.environ.get('GITHUB_REPOSITORY', '/')
+    parser = argparse.ArgumentParser(description='Create epic issues from generated epics')
+    parser.add_argument('epics_file', help='JSON list of generated epics (e.g. /tmp/epics.json)')
+    parser.add_argument('--strategy-issue', required=True, help='Strategy issue number')
+    parser.add_argument('--vision-issue', default='', help='Vision issue number')
+    parser.add_argument('--assignee', help='User to assign the epics to')
+    parser.add_argument('--project', help='Add the epics to the first project whose title contains this')
+    parser.add_argument('--checkpoint', help='Checkpoint file; rerunning with it skips work already done')
+    parser.add_argument('--outbox', metavar='FILE',
+                        help='Create the issues one at a time through a durable outbox, paced by the rate limit; '
+                             'an interrupted run never opens an issue twice')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Maximum issue creations in flight')
+    parser.add_argument('--owner', default=repository.split('/')[0], help='Repository owner')
+    parser.add_argument('--repo', default=repository.split('/')[-1], help='Repository name')
+    parser.add_argument('--api-url', default=os.environ.get('GITHUB_API_URL', DEFAULT_BASE_URL),
+                        help='GitHub API base URL')
+    add_metadata_arguments(parser)
+    add_metrics_arguments(parser)
+    return parser
+
+def run(args):
+    """Create the epic issues described by the parsed arguments"""
+
+    token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+    if not token:
+        print("ERROR: No GitHub token found! Set GH_TOKEN or GITHUB_TOKEN.")
+        sys.exit(1)
+    if not args.owner or not args.repo:
+        print("ERROR: Repository not set. Use --owner and --repo or set GITHUB_REPOSITORY.")
+        sys.exit(1)
+
+    with open(args.epics_file, 'r', encoding='utf-8') as f:
+        epics = json.load(f)
+    issues = [render_epic_issue(epic, args.strategy_issue, args.vision_issue, args.assignee) for epic in epics]
+
+    concurrency = max(args.concurrency, 1)
+    client = GitHubClient(token, args.owner, args.repo, base_url=args.api_url, pool_size=concurrency,
+                          metadata=metadata_from_args(args))
+    checkpoint = Checkpoint(args.checkpoint)
+
+    start = time.perf_counter()
+    if args.outbox:
+        with Outbox(args.outbox, f"{args.owner}/{args.repo}") as outbox:
+            results = create_issues_via_outbox(client, outbox, issues, on_result=print_issue_result,
+                                               checkpoint=checkpoint)
+    else:
+        results = create_issues(client, issues, checkpoint, concurrency, on_result=print_issue_result)
+    created = [result for result in results if not result.error]
+    new = sum(1 for result in created if result.created)
+    failed = len(results) - len(created)
+    print(f"Created {new} epics in {time.perf_counter() - start:.2f}s "
+          f"({len(created) - new} already existed, {failed} failed)")
+
+    numbers = ','.join(str(result.number) for result in created)
+    write_github_output('created_issues', numbers)
+
+    exit_code = 1 if failed else 0
+    try:
+        if created and not failed:
+            comment_once(client, args.strategy_issue,
+                         "🎯 Created epics: " + ', '.join(f"#{result.number}" for result in created),
+                         checkpoint, key='strategy')
+
+        if args.project and created:
+            project_id = find_project(client, args.owner, args.project)
+            if project_id:
+                added = add_project_items(client, project_id, [result.node_id for result in created], checkpoint)
+                print(f"Added {added} epics to project '{args.project}'")
+            else:
+                print(f"No project found matching '{args.project}'")
+    except GitHubError as e:
+        print(f"✗ {str(e)}")
+        exit_code = 1
+
+    client.close()
+    if exit_code and args.checkpoint:
+        print(f"Rerun with --checkpoint {args.checkpoint} to resume")
+    sys.exit(exit_code)
+
+def main():
+    args = build_parser().parse_args()
+    with session_from_args(args, 'create-epic-issues'):
+        run(args)
+
+if __name__ == "__main__":
+    main()
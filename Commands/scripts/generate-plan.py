@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Strategy and Epic Generator for the planning workflows
+Renders strategy documents, strategy issue bodies and epic lists
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from planning import (
+    DEFAULT_CATALOGUE, DEFAULT_TIMEFRAME, product_slug, render_strategy, strategy_phases, render_strategy_issue,
+    render_epics, epics_to_json, phases_to_json, strategy_sidecar, rebuild_strategy_sidecar, render_many,
+)
+from vision_pipeline.sidecar import write_sidecar, load_sidecar, load_vision_sidecar
+from github_api import write_github_output
+
+DEFAULT_STRATEGY_ROOT = "Commands/docs/strategies"
+
+def write_text(path, content):
+    """Write a text file, creating its directory"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+def write_json(path, data):
+    """Write a JSON file, creating its directory"""
+    write_text(path, json.dumps(data))
+
+def find_vision(vision_root, product_name):
+    """Vision document of a product, in a folder named after it or after its slug"""
+    for folder in (product_name, product_slug(product_name)):
+        path = f"{vision_root}/{folder}/vision.md"
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No vision document for {product_name} in {vision_root}")
+
+def run_strategy(args):
+    """Write a product's strategy document, its sidecar, phases and optional issue body"""
+    vision = None
+    if args.vision_root:
+        vision_path = find_vision(args.vision_root, args.product_name)
+        vision = load_vision_sidecar(vision_path, args.product_name)
+        print(f"Vision loaded from: {vision_path}")
+        if vision['missing']:
+            print(f"Warning: the vision has no {', '.join(vision['missing'])} section")
+        write_github_output('vision_path', vision_path)
+
+    strategy_dir = f"{args.output_root}/{product_slug(args.product_name)}"
+    strategy_path = f"{strategy_dir}/strategy.md"
+    write_text(strategy_path, render_strategy(args.product_name, args.timeframe))
+    write_sidecar(f"{strategy_dir}/strategy.json",
+                  strategy_sidecar(args.product_name, args.timeframe, strategy_path, args.vision_issue, vision))
+    print(f"Strategy saved to: {strategy_path}")
+
+    phases = phases_to_json(strategy_phases(args.timeframe))
+    if args.phases:
+        write_json(args.phases, phases)
+
+    if args.issue_body:
+        repository_url = args.repository_url.rstrip('/')
+        body = render_strategy_issue(
+            args.product_name, args.timeframe, args.vision_issue,
+            document_url=f"{repository_url}/blob/{args.ref}/{strategy_path}",
+            epics_workflow_url=f"{repository_url}/actions/workflows/create-epics.yml")
+        write_text(args.issue_body, body)
+
+    write_github_output('strategy_path', strategy_path)
+    write_github_output('strategy_dir', strategy_dir)
+    write_github_output('phases', json.dumps(phases))
+    return 0
+
+def strategy_sidecar_path(args):
+    """strategy.json named by --strategy, or found under --strategy-root by the product's slug"""
+    if args.strategy or not args.strategy_root:
+        return args.strategy
+    if not args.product_name:
+        raise ValueError("A product name is required with --strategy-root")
+    return f"{args.strategy_root}/{product_slug(args.product_name)}/strategy.json"
+
+def run_epics(args):
+    """Write the epics for a product as JSON"""
+    args.strategy = strategy_sidecar_path(args)
+    if args.strategy and not os.path.exists(args.strategy) and args.strategy_issue_body and args.product_name:
+        # Strategies made before sidecars only have their document and issue
+        with open(args.strategy_issue_body, 'r', encoding='utf-8') as f:
+            issue_body = f.read()
+        strategy_path = os.path.join(os.path.dirname(args.strategy), 'strategy.md')
+        write_sidecar(args.strategy, rebuild_strategy_sidecar(args.product_name, strategy_path, issue_body))
+        print(f"Rebuilt {args.strategy} from the strategy document and issue")
+    if args.strategy:
+        # The strategy sidecar names the product, its document and its vision issue
+        strategy = load_sidecar(args.strategy)
+        args.product_name = args.product_name or strategy['product_name']
+        write_github_output('strategy_path', strategy['strategy_path'])
+        write_github_output('vision_issue', strategy['vision_issue'])
+    if not args.product_name:
+        raise ValueError("A product name or --strategy is required")
+
+    epics = render_epics(args.product_name, args.max_epics, args.catalogue)
+    write_json(args.output, epics_to_json(epics))
+    print(f"Generated {len(epics)} epics for {args.product_name}")
+    return 0
+
+def load_product_names(path):
+    """Read product names from a JSON list or a text file with one per line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    if path.lower().endswith('.json'):
+        return [str(name) for name in json.loads(text)]
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def run_many(args):
+    """Write strategies and epics for many products in one process"""
+    product_names = load_product_names(args.products)
+    start = time.perf_counter()
+    for plan in render_many(product_names, args.timeframe, args.max_epics, args.catalogue):
+        product_dir = os.path.join(args.output_root, product_slug(plan.product_name))
+        write_text(os.path.join(product_dir, 'strategy.md'), plan.strategy)
+        write_sidecar(os.path.join(product_dir, 'strategy.json'),
+                      strategy_sidecar(plan.product_name, args.timeframe, os.path.join(product_dir, 'strategy.md')))
+        write_json(os.path.join(product_dir, 'phases.json'), phases_to_json(plan.phases))
+        write_json(os.path.join(product_dir, 'epics.json'), epics_to_json(plan.epics))
+    elapsed = time.perf_counter() - start
+    print(f"Generated plans for {len(product_names)} products in {elapsed:.2f}s: {args.output_root}")
+    return 0
+
+def add_epic_arguments(parser):
+    parser.add_argument('--max-epics', type=int, help='Keep only the most important epics')
+    parser.add_argument('--catalogue', default=DEFAULT_CATALOGUE, help='Epic catalogue (JSON or YAML)')
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Generate strategies and epics from templates')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    strategy = subparsers.add_parser('strategy', help='Write a strategy document')
+    strategy.add_argument('product_name', help='Product name')
+    strategy.add_argument('--timeframe', default=DEFAULT_TIMEFRAME, help='Strategy timeframe in months')
+    strategy.add_argument('--output-root', default=DEFAULT_STRATEGY_ROOT, help='Directory holding strategies')
+    strategy.add_argument('--phases', help='Also write the strategy phases to this JSON file')
+    strategy.add_argument('--issue-body', help='Also write the strategy issue body to this file')
+    strategy.add_argument('--vision-issue', default='', help='Vision issue number, for the issue body')
+    strategy.add_argument('--repository-url', default='', help='Repository URL, for links in the issue body')
+    strategy.add_argument('--ref', default='master', help='Branch, for links in the issue body')
+    strategy.add_argument('--vision-root',
+                          help='Directory of vision folders; the vision is loaded from its sidecar and recorded '
+                               'in strategy.json')
+    strategy.set_defaults(run=run_strategy)
+
+    epics = subparsers.add_parser('epics', help='Write the epics for a product as JSON')
+    epics.add_argument('product_name', nargs='?', help='Product name (default: the one in --strategy)')
+    epics.add_argument('--strategy', help='strategy.json written with the strategy; also sets the strategy_path '
+                                          'and vision_issue step outputs')
+    epics.add_argument('--strategy-root',
+                       help='Directory holding strategies; strategy.json is found by the product slug, as the '
+                            'strategy command writes it')
+    epics.add_argument('--strategy-issue-body',
+                       help='Body of the strategy issue; with it, a missing strategy.json is rebuilt from '
+                            'strategy.md and the issue')
+    epics.add_argument('--output', default='/tmp/epics.json', help='JSON file to write')
+    add_epic_arguments(epics)
+    epics.set_defaults(run=run_epics)
+
+    many = subparsers.add_parser('many', help='Write strategies and epics for many products')
+    many.add_argument('products', help='Text file with one product per line, or a JSON list')
+    many.add_argument('output_root', help='Directory to write one folder per product into')
+    many.add_argument('--timeframe', default=DEFAULT_TIMEFRAME, help='Strategy timeframe in months')
+    add_epic_arguments(many)
+    many.set_defaults(run=run_many)
+
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    try:
+        sys.exit(args.run(args))
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+GitHub Metadata
+Looks up labels, milestones, workflows, projects and product issues through
+the on-disk metadata cache, so workflows stop re-listing them on every run
+"""
+
+import os
+import sys
+import argparse
+
+from github_api import (
+    DEFAULT_BASE_URL, WORKFLOW_LABELS, GitHubClient, GitHubError, add_metadata_arguments, metadata_from_args,
+    ensure_labels, find_project, list_milestones, workflow_ids, product_issues,
+)
+from instrumentation import add_metrics_arguments, session_from_args
+
+def run_labels(client, args):
+    """Create the workflow labels that do not exist yet"""
+    created = ensure_labels(client, WORKFLOW_LABELS)
+    print(f"Created labels: {', '.join(created)}" if created else "All labels exist", file=sys.stderr)
+    return 0
+
+def run_milestone(client, args):
+    """Print the number of a milestone, creating it if it does not exist"""
+    milestone = list_milestones(client).get(args.title)
+    if milestone is None:
+        data = {"title": args.title, "state": "open"}
+        if args.description:
+            data["description"] = args.description
+        if args.due_on:
+            data["due_on"] = f"{args.due_on}T00:00:00Z"
+        milestone = client.request('POST', client.repo_path("/milestones"), data=data).json()
+        print(f"Created milestone: {args.title}", file=sys.stderr)
+    print(milestone["number"])
+    return 0
+
+def run_project(client, args):
+    """Print the node ID of the product's project"""
+    project_id = find_project(client, client.owner, args.title)
+    if project_id is None:
+        print(f"No project found for {args.title}", file=sys.stderr)
+        return 1
+    print(project_id)
+    return 0
+
+def run_issue(client, args):
+    """Print the number of the product's vision or strategy issue"""
+    number = product_issues(client, args.label).get(args.product_name)
+    if number is None:
+        print(f"No {args.label} issue found for {args.product_name}", file=sys.stderr)
+        return 1
+    print(number)
+    return 0
+
+def run_workflow(client, args):
+    """Print the ID of a workflow, by file or display name"""
+    workflow_id = workflow_ids(client).get(args.workflow)
+    if workflow_id is None:
+        print(f"No workflow named {args.workflow}", file=sys.stderr)
+        return 1
+    print(workflow_id)
+    return 0
+
+COMMANDS = {
+    'labels': run_labels,
+    'milestone': run_milestone,
+    'project': run_project,
+    'issue': run_issue,
+    'workflow': run_workflow,
+}
+
+def build_parser():
+    repository = os.environ.get('GITHUB_REPOSITORY', '')
+    parser = argparse.ArgumentParser(description='Cached lookups of GitHub repository metadata')
+    parser.add_argument('--owner', default=repository.split('/')[0], help='Repository owner')
+    parser.add_argument('--repo', default=repository.split('/')[-1], help='Repository name')
+    parser.add_argument('--api-url', default=os.environ.get('GITHUB_API_URL', DEFAULT_BASE_URL),
+                        help='GitHub API base URL')
+    add_metadata_arguments(parser)
+    add_metrics_arguments(parser)
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('labels', help='Create the workflow labels that do not exist yet')
+
+    milestone = subparsers.add_parser('milestone', help='Print a milestone number, creating it if missing')
+    milestone.add_argument('title', help='Milestone title')
+    milestone.add_argument('--description', help='Description of a new milestone')
+    milestone.add_argument('--due-on', metavar='YYYY-MM-DD', help='Due date of a new milestone')
+
+    project = subparsers.add_parser('project', help="Print the node ID of a product's project")
+    project.add_argument('title', help='Text the project title contains')
+
+    issue = subparsers.add_parser('issue', help="Print the number of a product's vision or strategy issue")
+    issue.add_argument('product_name', help='Product name')
+    issue.add_argument('--label', choices=['vision', 'strategy'], default='vision', help='Kind of issue')
+
+    workflow = subparsers.add_parser('workflow', help='Print the ID of a workflow')
+    workflow.add_argument('workflow', help='Workflow file or display name')
+
+    subparsers.add_parser('clear', help='Forget every cached entry')
+    return parser
+
+def run(args):
+    """Run one metadata command and return its exit code"""
+    metadata = metadata_from_args(args)
+    if args.command == 'clear':
+        if metadata is not None:
+            metadata.clear()
+            metadata.save()
+        return 0
+
+    token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+    if not token:
+        print("ERROR: No GitHub token found! Set GH_TOKEN or GITHUB_TOKEN.", file=sys.stderr)
+        return 1
+    if not args.owner or not args.repo:
+        print("ERROR: Repository not set. Use --owner and --repo or set GITHUB_REPOSITORY.", file=sys.stderr)
+        return 1
+
+    with GitHubClient(token, args.owner, args.repo, base_url=args.api_url, metadata=metadata) as client:
+        try:
+            return COMMANDS[args.command](client, args)
+        except GitHubError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+
+def main():
+    args = build_parser().parse_args()
+    with session_from_args(args, 'github-metadata'):
+        code = run(args)
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+GitHub Outbox
+Queues workflow dispatches and issue creations durably and drains them at the
+pace GitHub's rate limits allow, resuming safely after a crash
+"""
+
+import os
+import sys
+import json
+import argparse
+
+from github_api import (
+    DEFAULT_BASE_URL, DEFAULT_RATE, DEFAULT_BURST, GitHubClient, Outbox, TokenBucket, default_outbox_path,
+    new_batch_id, drain,
+)
+from instrumentation import add_metrics_arguments, session_from_args
+
+def parse_input(value):
+    """Parse a key=value workflow input"""
+    key, sep, input_value = value.partition('=')
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"expected key=value, got '{value}'")
+    return key, input_value
+
+def intent_name(intent):
+    """Short description of an intent for listings"""
+    if intent.kind == 'dispatch':
+        return f"{intent.payload['workflow']} {json.dumps(intent.payload['inputs'], sort_keys=True)}"
+    return intent.payload['title']
+
+def print_outbox_result(result):
+    """Report one intent as the drainer handles it"""
+    intent = result.intent
+    if result.outcome == 'sent':
+        print(f"✓ {intent.kind} {intent_name(intent)}")
+    elif result.outcome == 'recovered':
+        print(f"✓ {intent.kind} {intent_name(intent)} (already sent before an interruption)")
+    elif result.outcome == 'deferred':
+        print(f"… {intent.kind} {intent_name(intent)}: {result.message}; will retry")
+    else:
+        print(f"✗ {intent.kind} {intent_name(intent)}: {result.message}")
+
+def run_dispatch(outbox, args):
+    """Queue a workflow dispatch"""
+    intent, added = outbox.add_dispatch(args.workflow, dict(args.inputs), args.ref, args.key,
+                                        correlate=not args.no_correlation_input,
+                                        batch=args.batch or new_batch_id())
+    print(f"{'Queued' if added else 'Already queued'} {intent.key} ({intent.status})")
+    return 0
+
+def run_issues(outbox, args):
+    """Queue issues from a JSON list of {"title", "body", "labels", "assignees", "key"}"""
+    with open(args.issues_file, 'r', encoding='utf-8') as f:
+        issues = json.load(f)
+    added = sum(1 for issue in issues if outbox.add_issue(issue)[1])
+    print(f"Queued {added} issues ({len(issues) - added} already queued)")
+    return 0
+
+def run_status(outbox, args):
+    """Show how many intents are in each status and why any failed"""
+    counts = outbox.counts()
+    print(', '.join(f"{count} {status}" for status, count in counts.items()))
+    for intent in outbox.intents('failed'):
+        doubt = " (may have been sent)" if intent.in_doubt else ""
+        print(f"✗ {intent.key} {intent_name(intent)}: {intent.error}{doubt}")
+    return 0
+
+def run_retry(outbox, args):
+    """Queue failed intents again"""
+    print(f"Queued {outbox.retry(args.keys)} failed intents again")
+    return 0
+
+def run_purge(outbox, args):
+    """Forget intents that were sent"""
+    print(f"Removed {outbox.purge()} sent intents")
+    return 0
+
+def run_drain(outbox, args):
+    """Send every pending intent"""
+    token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+    if not token:
+        print("ERROR: No GitHub token found! Set GH_TOKEN or GITHUB_TOKEN.")
+        return 1
+    bucket = TokenBucket(args.rate, args.burst)
+    with GitHubClient(token, args.owner, args.repo, ref=args.ref, base_url=args.api_url) as client:
+        results = drain(client, outbox, bucket, limit=args.limit, wait=not args.no_wait,
+                        on_result=print_outbox_result)
+    counts = outbox.counts()
+    print(f"Handled {len(results)} intents: {counts['done']} done, {counts['pending']} pending, "
+          f"{counts['failed']} failed")
+    return 1 if counts['failed'] else 0
+
+COMMANDS = {
+    'dispatch': run_dispatch,
+    'issues': run_issues,
+    'drain': run_drain,
+    'status': run_status,
+    'retry': run_retry,
+    'purge': run_purge,
+}
+
+def build_parser():
+    repository = os.environ.get('GITHUB_REPOSITORY', '')
+    parser = argparse.ArgumentParser(description='Durable, rate-limit-aware queue of GitHub writes')
+    parser.add_argument('--outbox', default=default_outbox_path(),
+                        help='Outbox database (default: $COMMANDS_OUTBOX or '
+                             '~/.local/state/jackson-ideas-commands/github-outbox.sqlite)')
+    parser.add_argument('--owner', default=repository.split('/')[0], help='Repository owner')
+    parser.add_argument('--repo', default=repository.split('/')[-1], help='Repository name')
+    parser.add_argument('--api-url', default=os.environ.get('GITHUB_API_URL', DEFAULT_BASE_URL),
+                        help='GitHub API base URL')
+    add_metrics_arguments(parser)
+
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    dispatch = subparsers.add_parser('dispatch', help='Queue a workflow dispatch')
+    dispatch.add_argument('workflow', help='Workflow file name')
+    dispatch.add_argument('--input', dest='inputs', action='append', type=parse_input, default=[],
+                          metavar='KEY=VALUE', help='Workflow input (repeatable)')
+    dispatch.add_argument('--ref', help='Branch to run the workflow on (default: master)')
+    dispatch.add_argument('--key', help='Idempotency key (default: derived from the workflow, ref, inputs and batch)')
+    dispatch.add_argument('--batch', help='Batch the dispatch belongs to; queueing it again in the same batch is '
+                                          'a no-op (default: a new batch, so it is always queued)')
+    dispatch.add_argument('--no-correlation-input', action='store_true',
+                          help='For workflows that do not declare the correlation_id input; an interrupted '
+                               'dispatch is then failed rather than risk running twice')
+
+    issues = subparsers.add_parser('issues', help='Queue issues from a JSON file')
+    issues.add_argument('issues_file', help='JSON list of {"title", "body", "labels", "assignees", "key"}')
+
+    drain_parser = subparsers.add_parser('drain', help='Send pending intents')
+    drain_parser.add_argument('--ref', default='master', help='Branch for dispatches that do not name one')
+    drain_parser.add_argument('--rate', type=float, default=DEFAULT_RATE,
+                              help='Most requests per second; lowered further as the quota runs down')
+    drain_parser.add_argument('--burst', type=int, default=DEFAULT_BURST,
+                              help='Requests that may be sent back to back')
+    drain_parser.add_argument('--limit', type=int, help='Send at most this many intents')
+    drain_parser.add_argument('--no-wait', action='store_true',
+                              help='Stop when nothing is due instead of waiting out retries and rate limits')
+
+    subparsers.add_parser('status', help='Count intents by status and list failures')
+    retry = subparsers.add_parser('retry', help='Queue failed intents again')
+    retry.add_argument('keys', nargs='*', help='Only these intent keys')
+    subparsers.add_parser('purge', help='Remove intents that were sent')
+    return parser
+
+def run(args):
+    """Run one outbox command and return its exit code"""
+    if not args.owner or not args.repo:
+        print("ERROR: Repository not set. Use --owner and --repo or set GITHUB_REPOSITORY.")
+        return 1
+    with Outbox(args.outbox, f"{args.owner}/{args.repo}") as outbox:
+        return COMMANDS[args.command](outbox, args)
+
+def main():
+    args = build_parser().parse_args()
+    with session_from_args(args, 'github-outbox'):
+        code = run(args)
+    sys.exit(code)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+GitHub API helpers
+Shared by the claude-commands scripts and the workflow tooling
+"""
+
+from .actions import write_github_output
+from .client import DEFAULT_BASE_URL, RateLimit, GitHubError, Response, GitHubClient, parse_rate_limit
+from .metadata import (
+    DEFAULT_MAX_AGE, WORKFLOW_LABELS, MetadataCache, default_metadata_path, add_metadata_arguments,
+    metadata_from_args, list_labels, list_milestones, workflow_ids, product_issues,
+)
+from .dispatch import (
+    DEFAULT_CONCURRENCY, DispatchJob, DispatchResult, make_dispatch_job, load_dispatch_jobs,
+    dispatch_all, dispatch_all_async,
+)
+from .runs import (
+    CORRELATION_INPUT, RunStatus, new_correlation_id, dispatch_time, find_run, iter_run_status, wait_for_run,
+)
+from .issues import (
+    PROJECT_BATCH_SIZE, IssueResult, Checkpoint, create_issues, create_issues_async, find_project,
+    create_project, ensure_labels, add_project_items, comment_once,
+)
+from .outbox import (
+    DEFAULT_RATE, DEFAULT_BURST, Intent, OutboxResult, Outbox, TokenBucket, default_outbox_path, new_batch_id,
+    send_intent, drain, create_issues_via_outbox,
+)
@@ -0,0 +1,13 @@
+"""
+GitHub Actions helpers
+Step outputs for the CLIs the workflows run
+"""
+
+import os
+
+def write_github_output(name, value):
+    """Set a step output when running inside GitHub Actions"""
+    output_path = os.environ.get('GITHUB_OUTPUT')
+    if output_path:
+        with open(output_path, 'a', encoding='utf-8') as f:
+            f.write(f"{name}={value}\n")
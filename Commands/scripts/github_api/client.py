@@ -0,0 +1,363 @@
+"""
+GitHub REST API client
+Keeps persistent keep-alive connections and surfaces rate-limit headers
+"""
+
+import json
+import queue
+import threading
+import http.client
+from collections import namedtuple
+from urllib.parse import urlsplit, urlencode
+
+from instrumentation import METRICS
+from .metadata import GRAPHQL_PREFIX
+
+DEFAULT_BASE_URL = "https://api.github.com"
+USER_AGENT = "jackson-ideas-commands"
+
+# Errors that mean a pooled connection was closed by the server while idle
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+# Methods that are safe to send twice when a stale connection drops the first try
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT', 'DELETE')
+
+# Text of the 403 GitHub sends when a burst trips a secondary rate limit
+SECONDARY_RATE_LIMIT_MESSAGE = 'secondary rate limit'
+
+# Rate-limit state reported by the last response
+RateLimit = namedtuple('RateLimit', ['limit', 'remaining', 'reset', 'used', 'resource', 'retry_after'])
+
+def parse_rate_limit(headers):
+    """Read rate-limit headers from a response, or None if there are none"""
+    def number(name):
+        value = headers.get(name)
+        try:
+            return int(value) if value is not None else None
+        except ValueError:
+            return None
+
+    rate_limit = RateLimit(
+        limit=number('x-ratelimit-limit'),
+        remaining=number('x-ratelimit-remaining'),
+        reset=number('x-ratelimit-reset'),
+        used=number('x-ratelimit-used'),
+        resource=headers.get('x-ratelimit-resource'),
+        retry_after=number('retry-after'),
+    )
+    if rate_limit.remaining is None and rate_limit.retry_after is None:
+        return None
+    return rate_limit
+
+class GitHubError(Exception):
+    """An API request that returned an error status"""
+
+    def __init__(self, status, message, rate_limit=None):
+        super().__init__(f"HTTP Error {status}: {message}")
+        self.status = status
+        self.message = message
+        self.rate_limit = rate_limit
+        # Set by callers that retry rate-limited requests
+        self.attempts = 1
+
+    @property
+    def rate_limited(self):
+        """Whether the request was rejected because of a rate limit"""
+        if self.status == 429:
+            return True
+        if self.status != 403:
+            return False
+        # Secondary limits leave quota remaining and often send no Retry-After
+        if SECONDARY_RATE_LIMIT_MESSAGE in self.message.lower():
+            return True
+        if self.rate_limit is None:
+            return False
+        return self.rate_limit.remaining == 0 or self.rate_limit.retry_after is not None
+
+class Response:
+    """Status, headers and body of a completed request"""
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.rate_limit = parse_rate_limit(headers)
+        # Set when this response was served again after a 304
+        self.not_modified = False
+
+    def json(self):
+        """Decode the body as JSON, or None if it is empty"""
+        return json.loads(self.body.decode()) if self.body else None
+
+class GitHubClient:
+    """GitHub API client bound to one repository, reusing connections"""
+
+    def __init__(self, token, owner, repo, ref="master", base_url=DEFAULT_BASE_URL,
+                 pool_size=4, timeout=30, metadata=None):
+        self.token = token
+        self.owner = owner
+        self.repo = repo
+        self.ref = ref
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.rate_limit = None
+
+        url = urlsplit(self.base_url)
+        self.scheme = url.scheme
+        self.host = url.hostname
+        self.port = url.port
+        self.path_prefix = url.path.rstrip('/')
+        # GitHub Enterprise serves REST under /api/v3 and GraphQL at /api/graphql
+        if self.path_prefix.endswith('/v3'):
+            self.graphql_path = self.path_prefix[:-len('/v3')] + '/graphql'
+        else:
+            self.graphql_path = self.path_prefix + '/graphql'
+
+        # Idle connections ready for reuse; at most pool_size are kept
+        self.pool = queue.LifoQueue(maxsize=pool_size)
+        self.lock = threading.Lock()
+
+        # Last ETag and response per GET url, for conditional requests
+        self.etags = {}
+
+        # Optional MetadataCache for labels, milestones, workflows and projects
+        self.metadata = metadata
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Save the metadata cache and close every idle pooled connection"""
+        if self.metadata is not None:
+            self.metadata.save()
+        while True:
+            try:
+                self.pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _new_connection(self):
+        if self.scheme == 'http':
+            return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+
+    def _checkout(self):
+        try:
+            return self.pool.get_nowait(), True
+        except queue.Empty:
+            return self._new_connection(), False
+
+    def _checkin(self, connection):
+        try:
+            self.pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def headers(self, extra=None):
+        """Default request headers"""
+        headers = {
+            "Authorization": f"token {self.token}",
+            "Accept": "application/vnd.github.v3+json",
+            "User-Agent": USER_AGENT,
+        }
+        if extra:
+            headers.update(extra)
+        return headers
+
+    def repo_path(self, suffix=''):
+        """API path for this repository"""
+        return f"/repos/{self.owner}/{self.repo}{suffix}"
+
+    def request(self, method, path, data=None, params=None, headers=None, ok_statuses=None, prefixed=True):
+        """Send a request over a pooled connection and return the Response"""
+        url = self.path_prefix + path if prefixed else path
+        if params:
+            url += '?' + urlencode(params)
+        body = None
+        headers = self.headers(headers)
+        if data is not None:
+            body = json.dumps(data).encode()
+            headers["Content-Type"] = "application/json"
+
+        with METRICS.timer('github_request_seconds', method=method):
+            while True:
+                connection, reused = self._checkout()
+                sent = False
+                try:
+                    connection.request(method, url, body=body, headers=headers)
+                    sent = True
+                    raw = connection.getresponse()
+                    response = Response(raw.status, {k.lower(): v for k, v in raw.getheaders()}, raw.read())
+                except STALE_CONNECTION_ERRORS:
+                    connection.close()
+                    # A reused connection may have been closed by the server while
+                    # idle; retry on a fresh one unless a write that is not
+                    # idempotent may already have reached the server
+                    if reused and (method in IDEMPOTENT_METHODS or not sent):
+                        METRICS.increment('github_retries', reason='stale_connection')
+                        continue
+                    METRICS.increment('github_requests', method=method, status='error')
+                    raise
+                except Exception:
+                    connection.close()
+                    METRICS.increment('github_requests', method=method, status='error')
+                    raise
+                break
+        METRICS.increment('github_requests', method=method, status=response.status)
+
+        if response.headers.get('connection', '').lower() == 'close':
+            connection.close()
+        else:
+            self._checkin(connection)
+
+        if response.rate_limit is not None:
+            with self.lock:
+                self.rate_limit = response.rate_limit
+            if response.rate_limit.remaining is not None:
+                METRICS.set_gauge('github_rate_limit_remaining', response.rate_limit.remaining,
+                                  resource=response.rate_limit.resource or 'core')
+
+        if response.status >= 400 or (ok_statuses and response.status not in ok_statuses):
+            message = response.body.decode(errors='replace')
+            raise GitHubError(response.status, message, response.rate_limit)
+
+        # Our own writes make cached metadata about the same resource stale
+        if method != 'GET' and self.metadata is not None:
+            self.metadata.invalidate(self.cache_key(path), data)
+        return response
+
+    def graphql(self, query, variables=None):
+        """Run a GraphQL query or mutation and return its data"""
+        data = {"query": query, "variables": variables or {}}
+        response = self.request('POST', self.graphql_path, data=data, prefixed=False)
+        result = response.json()
+        if result.get("errors"):
+            message = '; '.join(error.get("message", str(error)) for error in result["errors"])
+            raise GitHubError(response.status, message, response.rate_limit)
+        return result["data"]
+
+    def conditional_get(self, path, params=None):
+        """GET with If-None-Match, returning the cached response on 304
+
+        GitHub does not count 304 Not Modified responses against the rate
+        limit, so repeated polls of an unchanged resource are free.
+        """
+        key = path + ('?' + urlencode(params) if params else '')
+        with self.lock:
+            cached = self.etags.get(key)
+        headers = {"If-None-Match": cached[0]} if cached else None
+
+        response = self.request('GET', path, params=params, headers=headers)
+        if response.status == 304 and cached:
+            previous = cached[1]
+            unchanged = Response(previous.status, previous.headers, previous.body)
+            unchanged.rate_limit = response.rate_limit
+            unchanged.not_modified = True
+            METRICS.increment('github_not_modified')
+            return unchanged
+
+        etag = response.headers.get('etag')
+        if etag:
+            with self.lock:
+                self.etags[key] = (etag, response)
+        return response
+
+    def cache_key(self, path, params=None):
+        """Metadata cache key of a request, unique across API hosts"""
+        return self.base_url + path + ('?' + urlencode(params) if params else '')
+
+    def cached_get(self, path, params=None):
+        """JSON body of a GET for slowly changing metadata
+
+        With a metadata cache, a fresh entry is returned without a request and
+        a stale one is revalidated with If-None-Match / If-Modified-Since.
+        """
+        if self.metadata is None:
+            return self.conditional_get(path, params).json()
+
+        key = self.cache_key(path, params)
+        entry = self.metadata.get(key)
+        if entry and self.metadata.is_fresh(entry):
+            METRICS.increment('github_metadata', result='hit')
+            return entry['data']
+
+        headers = {}
+        if entry and entry['etag']:
+            headers["If-None-Match"] = entry['etag']
+        if entry and entry['last_modified']:
+            headers["If-Modified-Since"] = entry['last_modified']
+        response = self.request('GET', path, params=params, headers=headers)
+        if response.status == 304 and entry:
+            self.metadata.touch(key)
+            METRICS.increment('github_not_modified')
+            METRICS.increment('github_metadata', result='revalidated')
+            return entry['data']
+
+        data = response.json()
+        self.metadata.put(key, data, response.headers.get('etag'), response.headers.get('last-modified'))
+        METRICS.increment('github_metadata', result='miss')
+        return data
+
+    def cached_graphql(self, query, variables=None):
+        """Data of a GraphQL query, kept in the metadata cache until it expires or we send a mutation"""
+        if self.metadata is None:
+            return self.graphql(query, variables)
+        # GraphQL has no validators, so an expired entry is simply fetched again
+        key = f"{GRAPHQL_PREFIX}{self.base_url}:{query}:{json.dumps(variables or {}, sort_keys=True)}"
+        entry = self.metadata.get(key)
+        if entry and self.metadata.is_fresh(entry):
+            METRICS.increment('github_metadata', result='hit')
+            return entry['data']
+        data = self.graphql(query, variables)
+        self.metadata.put(key, data)
+        METRICS.increment('github_metadata', result='miss')
+        return data
+
+    def dispatch_workflow(self, workflow_file, inputs, ref=None):
+        """Trigger a workflow_dispatch run and return the (empty) response"""
+        data = {
+            "ref": ref or self.ref,
+            "inputs": inputs,
+        }
+        return self.request('POST', self.repo_path(f"/actions/workflows/{workflow_file}/dispatches"),
+                            data=data, ok_statuses=(204,))
+
+    def create_issue(self, title, body, labels=None, assignees=None):
+        """Open an issue and return its JSON representation"""
+        data = {"title": title, "body": body}
+        if labels:
+            data["labels"] = list(labels)
+        if assignees:
+            data["assignees"] = list(assignees)
+        return self.request('POST', self.repo_path("/issues"), data=data, ok_statuses=(201,)).json()
+
+    def get_issue(self, number):
+        """Fetch an issue's JSON representation, revalidating with its ETag"""
+        return self.conditional_get(self.repo_path(f"/issues/{number}")).json()
+
+    def update_issue(self, number, **fields):
+        """Change an issue's title, body, state or labels and return its JSON representation"""
+        return self.request('PATCH', self.repo_path(f"/issues/{number}"), data=fields).json()
+
+    def comment_on_issue(self, number, body):
+        """Add a comment to an issue and return its JSON representation"""
+        return self.request('POST', self.repo_path(f"/issues/{number}/comments"), data={"body": body},
+                            ok_statuses=(201,)).json()
+
+    def get_latest_run(self, workflow_file):
+        """Get the latest run of a workflow, or None if it has not run"""
+        # Repeated checks of an unchanged run list come back as free 304s
+        response = self.conditional_get(self.repo_path(f"/actions/workflows/{workflow_file}/runs"),
+                                        params={"per_page": 1})
+        runs = response.json()["workflow_runs"]
+        if not runs:
+            return None
+        run = runs[0]
+        return {
+            "id": run["id"],
+            "status": run["status"],
+            "url": run["html_url"]
+        }
@@ -0,0 +1,129 @@
+"""
+Concurrent workflow dispatcher
+Fans workflow_dispatch requests out over asyncio with bounded concurrency
+"""
+
+import json
+import time
+import asyncio
+from collections import namedtuple
+
+from instrumentation import METRICS
+from .client import GitHubError
+
+DEFAULT_CONCURRENCY = 4
+MAX_ATTEMPTS = 3
+
+# Seconds to wait when a rate-limited response says nothing about when to retry
+DEFAULT_RETRY_DELAY = 60
+
+DispatchJob = namedtuple('DispatchJob', ['workflow', 'inputs', 'ref', 'name'])
+DispatchResult = namedtuple('DispatchResult', ['job', 'ok', 'latency', 'attempts', 'message'])
+
+def make_dispatch_job(workflow, inputs=None, ref=None, name=None):
+    """Create a dispatch job, naming it after its product when there is one"""
+    inputs = {key: str(value) for key, value in (inputs or {}).items()}
+    if name is None:
+        name = inputs.get('product_name') or workflow
+    return DispatchJob(workflow, inputs, ref, name)
+
+def load_dispatch_jobs(path, default_workflow=None, default_inputs=None):
+    """Load jobs from a JSON list of {"workflow", "inputs", "ref", "name"} objects"""
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError(f"{path}: expected a JSON list of jobs")
+
+    jobs = []
+    for number, entry in enumerate(entries, 1):
+        workflow = entry.get('workflow') or default_workflow
+        if not workflow:
+            raise ValueError(f"{path}: job {number} has no workflow")
+        inputs = dict(default_inputs or {})
+        inputs.update(entry.get('inputs') or {})
+        jobs.append(make_dispatch_job(workflow, inputs, entry.get('ref'), entry.get('name')))
+    return jobs
+
+def retry_delay(rate_limit, now=None):
+    """Seconds to wait before retrying a rate-limited request"""
+    now = time.time() if now is None else now
+    if rate_limit is not None:
+        if rate_limit.retry_after is not None:
+            return rate_limit.retry_after
+        if rate_limit.remaining == 0 and rate_limit.reset:
+            return max(rate_limit.reset - now, 0) + 1
+    return DEFAULT_RETRY_DELAY
+
+class RateGate:
+    """Holds every worker back while the API asks us to wait"""
+
+    def __init__(self):
+        self.resume_at = 0.0
+
+    def pause(self, seconds):
+        """Stop dispatching for the given number of seconds"""
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    def observe(self, rate_limit):
+        """Pause until the reset time once the remaining quota runs out"""
+        if rate_limit is not None and rate_limit.remaining == 0:
+            self.pause(retry_delay(rate_limit))
+
+    async def wait(self):
+        """Sleep until dispatching may resume"""
+        while True:
+            delay = self.resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            METRICS.observe('github_rate_limit_wait_seconds', delay)
+            await asyncio.sleep(delay)
+
+async def call_with_retry(client, gate, func, *args, max_attempts=MAX_ATTEMPTS):
+    """Run a blocking API call in a thread, retrying while it is rate limited
+
+    Returns the call's result and the number of attempts it took.
+    """
+    attempts = 0
+    while True:
+        attempts += 1
+        await gate.wait()
+        try:
+            result = await asyncio.to_thread(func, *args)
+        except GitHubError as e:
+            if e.rate_limited and attempts < max_attempts:
+                METRICS.increment('github_retries', reason='rate_limited')
+                gate.pause(retry_delay(e.rate_limit))
+                continue
+            e.attempts = attempts
+            raise
+        gate.observe(client.rate_limit)
+        return result, attempts
+
+async def dispatch_job(client, job, semaphore, gate, max_attempts=MAX_ATTEMPTS, on_result=None):
+    """Dispatch one job, retrying when it is rate limited"""
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            _, attempts = await call_with_retry(client, gate, client.dispatch_workflow,
+                                                job.workflow, job.inputs, job.ref, max_attempts=max_attempts)
+            result = DispatchResult(job, True, time.perf_counter() - start, attempts, "dispatched")
+        except GitHubError as e:
+            result = DispatchResult(job, False, time.perf_counter() - start, e.attempts, str(e))
+        except Exception as e:
+            result = DispatchResult(job, False, time.perf_counter() - start, 1, f"Error: {str(e)}")
+
+    if on_result:
+        on_result(result)
+    return result
+
+async def dispatch_all_async(client, jobs, concurrency=DEFAULT_CONCURRENCY, max_attempts=MAX_ATTEMPTS,
+                             on_result=None):
+    """Dispatch all jobs with at most `concurrency` requests in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    gate = RateGate()
+    tasks = [dispatch_job(client, job, semaphore, gate, max_attempts, on_result) for job in jobs]
+    return await asyncio.gather(*tasks)
+
+def dispatch_all(client, jobs, concurrency=DEFAULT_CONCURRENCY, max_attempts=MAX_ATTEMPTS, on_result=None):
+    """Dispatch all jobs and return their results in job order"""
+    return asyncio.run(dispatch_all_async(client, jobs, concurrency, max_attempts, on_result))
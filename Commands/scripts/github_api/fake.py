@@ -0,0 +1,411 @@
+"""
+Local GitHub stand-in
+An in-memory server speaking the subset of the REST and GraphQL APIs the
+workflow tooling uses, for offline runs, tests and throughput measurements
+"""
+
+import re
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+RATE_LIMIT = 5000
+
+# Seconds a fake workflow run spends queued and then in progress
+RUN_QUEUED_SECONDS = 1.0
+RUN_IN_PROGRESS_SECONDS = 2.0
+
+# Workflows every fake repository has
+WORKFLOWS = ('create-vision.yml', 'create-strategy.yml', 'create-epics.yml')
+
+REPO_ROUTE = re.compile(r'^/repos/(?P<owner>[^/]+)/(?P<repo>[^/]+)(?P<rest>/.*)?$')
+
+class FakeGitHubState:
+    """Everything the fake server has been asked to create"""
+
+    def __init__(self, run_queued=RUN_QUEUED_SECONDS, run_in_progress=RUN_IN_PROGRESS_SECONDS):
+        self.lock = threading.Lock()
+        self.issues = {}
+        self.comments = []
+        self.labels = {}
+        self.milestones = []
+        self.projects = {}
+        self.dispatches = []
+        self.runs = []
+        self.requests = 0
+        self.not_modified = 0
+        self.remaining = RATE_LIMIT
+        self.run_queued = run_queued
+        self.run_in_progress = run_in_progress
+        # Faults for tests: writes to reject with a secondary rate limit, and
+        # writes to carry out but answer by dropping the connection
+        self.secondary_limited = 0
+        self.dropped_writes = 0
+
+    def take(self, fault):
+        """Use up one of a counted fault; False when none are left"""
+        with self.lock:
+            if getattr(self, fault) <= 0:
+                return False
+            setattr(self, fault, getattr(self, fault) - 1)
+            return True
+
+    def snapshot(self):
+        """Counts of everything created so far"""
+        with self.lock:
+            return {
+                "issues": len(self.issues),
+                "comments": len(self.comments),
+                "labels": len(self.labels),
+                "milestones": len(self.milestones),
+                "projects": len(self.projects),
+                "project_items": sum(len(project["items"]) for project in self.projects.values()),
+                "dispatches": len(self.dispatches),
+                "requests": self.requests,
+                "not_modified": self.not_modified,
+            }
+
+class FakeGitHubHandler(BaseHTTPRequestHandler):
+    """Routes requests to the shared FakeGitHubState"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'FakeGitHub/1.0'
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length).decode()) if length else {}
+
+    def reply(self, status, data=None):
+        if self.dropped:
+            self.close_connection = True
+            return
+        body = json.dumps(data).encode() if data is not None else b''
+        etag = '"' + hashlib.md5(body).hexdigest() + '"'
+        if self.command == 'GET' and status == 200 and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+            with self.state.lock:
+                self.state.not_modified += 1
+        elif status != 304:
+            with self.state.lock:
+                self.state.remaining = max(self.state.remaining - 1, 0)
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Date', formatdate(usegmt=True))
+        self.send_header('X-RateLimit-Limit', str(RATE_LIMIT))
+        self.send_header('X-RateLimit-Remaining', str(self.state.remaining))
+        self.send_header('X-RateLimit-Reset', str(int(time.time()) + 3600))
+        if self.command == 'GET':
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_request(self):
+        with self.state.lock:
+            self.state.requests += 1
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        self.dropped = False
+        if self.command != 'GET':
+            if self.state.take('secondary_limited'):
+                self.read_json()
+                return self.reply(403, {"message": "You have exceeded a secondary rate limit. Please wait a few "
+                                                   "minutes before you try again."})
+            self.dropped = self.state.take('dropped_writes')
+
+        url = urlsplit(self.path)
+        self.query = parse_qs(url.query)
+        if url.path in ('/graphql', '/api/graphql'):
+            return self.graphql()
+        match = REPO_ROUTE.match(url.path.replace('/api/v3', '', 1))
+        if not match:
+            return self.reply(404, {"message": "Not Found"})
+        self.owner = match.group('owner')
+        self.repo = match.group('repo')
+        rest = match.group('rest') or '/'
+
+        for pattern, method, handler in self.ROUTES:
+            route = re.match(pattern, rest)
+            if route and method == self.command:
+                return handler(self, *route.groups())
+        return self.reply(404, {"message": "Not Found"})
+
+    do_GET = do_POST = do_PATCH = handle_request
+
+    def html_url(self, suffix):
+        return f"https://github.com/{self.owner}/{self.repo}{suffix}"
+
+    # Issues
+
+    def create_issue(self):
+        data = self.read_json()
+        if not data.get('title'):
+            return self.reply(422, {"message": "Validation Failed"})
+        with self.state.lock:
+            number = len(self.state.issues) + 1
+            for name in data.get('labels') or []:
+                self.state.labels.setdefault(name, {"name": name, "color": "ededed", "description": ""})
+            issue = {
+                "number": number,
+                "node_id": f"I_fake{number}",
+                "html_url": self.html_url(f"/issues/{number}"),
+                "title": data['title'],
+                "body": data.get('body', ''),
+                "labels": [{"name": name} for name in data.get('labels') or []],
+                "assignees": [{"login": login} for login in data.get('assignees') or []],
+                "state": "open",
+            }
+            self.state.issues[number] = issue
+        self.reply(201, issue)
+
+    def list_issues(self):
+        labels = set(filter(None, self.query.get('labels', [''])[0].split(',')))
+        per_page = int(self.query.get('per_page', ['30'])[0])
+        with self.state.lock:
+            issues = [issue for issue in reversed(self.state.issues.values())
+                      if labels <= {label["name"] for label in issue["labels"]}][:per_page]
+        self.reply(200, issues)
+
+    def get_issue(self, number):
+        issue = self.state.issues.get(int(number))
+        if issue is None:
+            return self.reply(404, {"message": "Not Found"})
+        self.reply(200, issue)
+
+    def update_issue(self, number):
+        data = self.read_json()
+        with self.state.lock:
+            issue = self.state.issues.get(int(number))
+            if issue is not None:
+                issue.update({key: data[key] for key in ('title', 'body', 'state') if key in data})
+        if issue is None:
+            return self.reply(404, {"message": "Not Found"})
+        self.reply(200, issue)
+
+    def create_comment(self, number):
+        data = self.read_json()
+        if int(number) not in self.state.issues:
+            return self.reply(404, {"message": "Not Found"})
+        with self.state.lock:
+            comment_id = len(self.state.comments) + 1
+            comment = {
+                "id": comment_id,
+                "issue_number": int(number),
+                "html_url": self.html_url(f"/issues/{number}#issuecomment-{comment_id}"),
+                "body": data.get('body', ''),
+            }
+            self.state.comments.append(comment)
+        self.reply(201, comment)
+
+    # Labels and milestones
+
+    def list_labels(self):
+        with self.state.lock:
+            labels = list(self.state.labels.values())
+        self.reply(200, labels)
+
+    def create_label(self):
+        data = self.read_json()
+        with self.state.lock:
+            if data.get('name') in self.state.labels:
+                exists = True
+            else:
+                exists = False
+                label = {"name": data.get('name'), "color": data.get('color', 'ededed'),
+                         "description": data.get('description', '')}
+                self.state.labels[label["name"]] = label
+        if exists:
+            return self.reply(422, {"message": "Validation Failed", "errors": [{"code": "already_exists"}]})
+        self.reply(201, label)
+
+    def list_milestones(self):
+        with self.state.lock:
+            milestones = list(self.state.milestones)
+        self.reply(200, milestones)
+
+    def create_milestone(self):
+        data = self.read_json()
+        with self.state.lock:
+            number = len(self.state.milestones) + 1
+            milestone = dict(data, number=number, html_url=self.html_url(f"/milestone/{number}"))
+            self.state.milestones.append(milestone)
+        self.reply(201, milestone)
+
+    # Actions
+
+    def dispatch(self, workflow):
+        data = self.read_json()
+        inputs = data.get('inputs') or {}
+        correlation_id = inputs.get('correlation_id')
+        title = workflow + (f" [{correlation_id}]" if correlation_id else "")
+        with self.state.lock:
+            self.state.dispatches.append({"workflow": workflow, "ref": data.get('ref'), "inputs": inputs})
+            run_id = len(self.state.runs) + 1
+            self.state.runs.append({"id": run_id, "workflow": workflow, "title": title, "created": time.time()})
+        self.reply(204)
+
+    def list_workflows(self):
+        workflows = [{"id": 1000 + index, "name": name[:-len('.yml')].replace('-', ' ').title(),
+                      "path": f".github/workflows/{name}", "state": "active"}
+                     for index, name in enumerate(WORKFLOWS)]
+        self.reply(200, {"total_count": len(workflows), "workflows": workflows})
+
+    def run_view(self, run):
+        age = time.time() - run["created"]
+        if age < self.state.run_queued:
+            status, conclusion = "queued", None
+        elif age < self.state.run_queued + self.state.run_in_progress:
+            status, conclusion = "in_progress", None
+        else:
+            status, conclusion = "completed", "success"
+        return {
+            "id": run["id"],
+            "name": run["workflow"],
+            "display_title": run["title"],
+            "status": status,
+            "conclusion": conclusion,
+            "event": "workflow_dispatch",
+            "html_url": self.html_url(f"/actions/runs/{run['id']}"),
+            "created_at": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(run["created"])),
+        }
+
+    def list_runs(self, workflow):
+        per_page = int(self.query.get('per_page', ['30'])[0])
+        with self.state.lock:
+            runs = [run for run in reversed(self.state.runs) if run["workflow"] == workflow][:per_page]
+        self.reply(200, {"total_count": len(runs), "workflow_runs": [self.run_view(run) for run in runs]})
+
+    def get_run(self, run_id):
+        with self.state.lock:
+            runs = [run for run in self.state.runs if run["id"] == int(run_id)]
+        if not runs:
+            return self.reply(404, {"message": "Not Found"})
+        self.reply(200, self.run_view(runs[0]))
+
+    # GraphQL: only the operations our tooling sends
+
+    def graphql(self):
+        data = self.read_json()
+        query = data.get('query', '')
+        variables = data.get('variables') or {}
+
+        if 'addProjectV2ItemById' in query:
+            project = self.state.projects.get(variables.get('project'))
+            if project is None:
+                return self.reply(200, {"data": None, "errors": [{"message": "Could not resolve to a node"}]})
+            result = {}
+            with self.state.lock:
+                for name, content_id in variables.items():
+                    if name == 'project':
+                        continue
+                    item_id = f"PVTI_fake{len(project['items']) + 1}"
+                    project["items"].append(content_id)
+                    result['i' + name[1:]] = {"item": {"id": item_id}}
+            return self.reply(200, {"data": result})
+
+        if 'createProjectV2' in query:
+            with self.state.lock:
+                project_id = f"PVT_fake{len(self.state.projects) + 1}"
+                project = {"id": project_id, "title": variables.get('title', ''), "items": []}
+                self.state.projects[project_id] = project
+            return self.reply(200, {"data": {"createProjectV2": {"projectV2": {"id": project_id,
+                                                                               "title": project["title"]}}}})
+
+        if 'projectsV2' in query:
+            title = variables.get('title', '')
+            with self.state.lock:
+                nodes = [{"id": project["id"], "title": project["title"]}
+                         for project in self.state.projects.values() if title in project["title"]]
+            return self.reply(200, {"data": {"repositoryOwner": {"projectsV2": {"nodes": nodes}}}})
+
+        if 'repositoryOwner' in query:
+            owner = variables.get('owner', '')
+            return self.reply(200, {"data": {"repositoryOwner": {"id": f"U_fake_{owner}", "login": owner}}})
+
+        self.reply(200, {"data": None, "errors": [{"message": "Unsupported query"}]})
+
+    ROUTES = (
+        (r'^/issues$', 'GET', list_issues),
+        (r'^/issues$', 'POST', create_issue),
+        (r'^/issues/(\d+)$', 'GET', get_issue),
+        (r'^/issues/(\d+)$', 'PATCH', update_issue),
+        (r'^/issues/(\d+)/comments$', 'POST', create_comment),
+        (r'^/labels$', 'GET', list_labels),
+        (r'^/labels$', 'POST', create_label),
+        (r'^/milestones$', 'GET', list_milestones),
+        (r'^/milestones$', 'POST', create_milestone),
+        (r'^/actions/workflows$', 'GET', list_workflows),
+        (r'^/actions/workflows/([^/]+)/dispatches$', 'POST', dispatch),
+        (r'^/actions/workflows/([^/]+)/runs$', 'GET', list_runs),
+        (r'^/actions/runs/(\d+)$', 'GET', get_run),
+    )
+
+class FakeGitHub:
+    """Run the fake server on a background thread"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, verbose=False, **state_options):
+        self.state = FakeGitHubState(**state_options)
+        self.server = ThreadingHTTPServer((host, port), FakeGitHubHandler)
+        self.server.daemon_threads = True
+        self.server.state = self.state
+        self.server.latency = latency
+        self.server.verbose = verbose
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a local GitHub API stand-in')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', type=int, default=8787, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every request')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    fake = FakeGitHub(args.host, args.port, args.latency, args.verbose)
+    print(f"Fake GitHub API listening on {fake.url} (use --api-url {fake.url})")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server.server_close()
+        print(json.dumps(fake.state.snapshot()))
+    sys.exit(0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Bulk issue creation
+Creates generated issues concurrently, adds them to a project in batched
+GraphQL mutations and checkpoints progress so a failed run can resume
+"""
+
+import os
+import json
+import asyncio
+import threading
+from collections import namedtuple
+
+from .client import GitHubError
+from .metadata import list_labels
+from .dispatch import DEFAULT_CONCURRENCY, MAX_ATTEMPTS, RateGate, call_with_retry
+
+# Project items added per GraphQL mutation
+PROJECT_BATCH_SIZE = 20
+
+IssueResult = namedtuple('IssueResult', ['key', 'title', 'number', 'url', 'node_id', 'created', 'error'])
+
+FIND_PROJECT_QUERY = """
+query($owner: String!, $title: String!) {
+  repositoryOwner(login: $owner) {
+    ... on ProjectV2Owner {
+      projectsV2(first: 20, query: $title) {
+        nodes { id title }
+      }
+    }
+  }
+}
+"""
+
+OWNER_ID_QUERY = """
+query($owner: String!) {
+  repositoryOwner(login: $owner) { id login }
+}
+"""
+
+CREATE_PROJECT_MUTATION = """
+mutation($ownerId: ID!, $title: String!) {
+  createProjectV2(input: {ownerId: $ownerId, title: $title}) {
+    projectV2 { id title }
+  }
+}
+"""
+
+class Checkpoint:
+    """Issues, project items and comments already created, saved after every change"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.issues = {}
+        self.project_items = set()
+        self.comments = {}
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.issues = data.get('issues', {})
+            self.project_items = set(data.get('project_items', []))
+            self.comments = data.get('comments', {})
+
+    def issue(self, key):
+        """The recorded issue for a key, or None if it was not created yet"""
+        with self.lock:
+            return self.issues.get(key)
+
+    def record_issue(self, key, issue):
+        """Record a created issue and save"""
+        with self.lock:
+            self.issues[key] = {
+                "number": issue["number"],
+                "url": issue["html_url"],
+                "node_id": issue["node_id"],
+            }
+            self.save()
+
+    def record_project_items(self, node_ids):
+        """Record issues added to the project and save"""
+        with self.lock:
+            self.project_items.update(node_ids)
+            self.save()
+
+    def record_comment(self, key, comment):
+        """Record a posted comment and save"""
+        with self.lock:
+            self.comments[key] = comment["html_url"]
+            self.save()
+
+    def save(self):
+        """Write the checkpoint atomically; callers hold the lock"""
+        if not self.path:
+            return
+        data = {
+            "issues": self.issues,
+            "project_items": sorted(self.project_items),
+            "comments": self.comments,
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+def issue_key(issue):
+    """Checkpoint key for an issue to create"""
+    return issue.get('key') or issue['title']
+
+async def create_issue(client, issue, checkpoint, semaphore, gate, max_attempts=MAX_ATTEMPTS, on_result=None):
+    """Create one issue unless the checkpoint already has it"""
+    key = issue_key(issue)
+    existing = checkpoint.issue(key)
+    if existing:
+        result = IssueResult(key, issue['title'], existing['number'], existing['url'], existing['node_id'],
+                             False, None)
+    else:
+        async with semaphore:
+            try:
+                created, _ = await call_with_retry(client, gate, client.create_issue, issue['title'], issue['body'],
+                                                   issue.get('labels'), issue.get('assignees'),
+                                                   max_attempts=max_attempts)
+                checkpoint.record_issue(key, created)
+                result = IssueResult(key, issue['title'], created['number'], created['html_url'],
+                                     created['node_id'], True, None)
+            except Exception as e:
+                result = IssueResult(key, issue['title'], None, None, None, False, str(e))
+
+    if on_result:
+        on_result(result)
+    return result
+
+async def create_issues_async(client, issues, checkpoint, concurrency=DEFAULT_CONCURRENCY,
+                              max_attempts=MAX_ATTEMPTS, on_result=None):
+    """Create issues with at most `concurrency` requests in flight"""
+    semaphore = asyncio.Semaphore(concurrency)
+    gate = RateGate()
+    tasks = [create_issue(client, issue, checkpoint, semaphore, gate, max_attempts, on_result) for issue in issues]
+    return await asyncio.gather(*tasks)
+
+def create_issues(client, issues, checkpoint=None, concurrency=DEFAULT_CONCURRENCY, max_attempts=MAX_ATTEMPTS,
+                  on_result=None):
+    """Create issues concurrently and return their results in input order
+
+    Each issue is a dict with title, body and optional labels, assignees
+    and key. Issues already in the checkpoint are not created again.
+    """
+    checkpoint = checkpoint if checkpoint is not None else Checkpoint()
+    return asyncio.run(create_issues_async(client, issues, checkpoint, concurrency, max_attempts, on_result))
+
+def find_project(client, owner, title):
+    """Node ID of the owner's first project whose title contains `title`, or None"""
+    data = client.cached_graphql(FIND_PROJECT_QUERY, {"owner": owner, "title": title})
+    project_owner = data.get("repositoryOwner") or {}
+    for project in (project_owner.get("projectsV2") or {}).get("nodes") or []:
+        if project and title in project["title"]:
+            return project["id"]
+    return None
+
+def create_project(client, owner, title):
+    """Create a project for the owner and return its node ID"""
+    owner_id = client.graphql(OWNER_ID_QUERY, {"owner": owner})["repositoryOwner"]["id"]
+    data = client.graphql(CREATE_PROJECT_MUTATION, {"ownerId": owner_id, "title": title})
+    return data["createProjectV2"]["projectV2"]["id"]
+
+def ensure_labels(client, labels):
+    """Create the (name, description, color) labels that do not exist yet; returns the names created"""
+    existing = list_labels(client)
+    created = []
+    for name, description, color in labels:
+        if name in existing:
+            continue
+        try:
+            client.request('POST', client.repo_path("/labels"),
+                           data={"name": name, "description": description, "color": color})
+            created.append(name)
+        except GitHubError as e:
+            # Past the first page of labels, or created since we listed them
+            if e.status != 422:
+                raise
+    return created
+
+def add_project_items_mutation(count):
+    """GraphQL mutation adding `count` items, one aliased field per item"""
+    variables = ', '.join(f"$c{i}: ID!" for i in range(count))
+    fields = '\n'.join(
+        f"  i{i}: addProjectV2ItemById(input: {{projectId: $project, contentId: $c{i}}}) {{ item {{ id }} }}"
+        for i in range(count)
+    )
+    return f"mutation($project: ID!, {variables}) {{\n{fields}\n}}"
+
+def add_project_items(client, project_id, node_ids, checkpoint=None, batch_size=PROJECT_BATCH_SIZE):
+    """Add issues to a project, many per request; returns the number added"""
+    checkpoint = checkpoint if checkpoint is not None else Checkpoint()
+    pending = [node_id for node_id in node_ids if node_id not in checkpoint.project_items]
+    added = 0
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        variables = {"project": project_id}
+        variables.update({f"c{i}": node_id for i, node_id in enumerate(batch)})
+        client.graphql(add_project_items_mutation(len(batch)), variables)
+        checkpoint.record_project_items(batch)
+        added += len(batch)
+    return added
+
+def comment_once(client, number, body, checkpoint=None, key=None):
+    """Comment on an issue unless the checkpoint shows it was already done"""
+    checkpoint = checkpoint if checkpoint is not None else Checkpoint()
+    key = key or str(number)
+    if key in checkpoint.comments:
+        return None
+    comment = client.comment_on_issue(number, body)
+    checkpoint.record_comment(key, comment)
+    return comment
@@ -0,0 +1,185 @@
+"""
+Repository metadata cache
+On-disk cache of slowly changing repository metadata: labels, milestones,
+workflows, projects and the product to issue-number map. Entries are served
+without a request while fresh, revalidated with conditional requests after
+that, and dropped when we write to the resource they describe
+"""
+
+import os
+import json
+import time
+import threading
+from urllib.parse import urlsplit
+
+from instrumentation import METRICS
+
+# Overrides the default cache location, like $COMMANDS_METRICS does for metrics
+METADATA_CACHE_ENV = 'COMMANDS_METADATA_CACHE'
+
+# Seconds an entry is used without asking the API whether it changed
+DEFAULT_MAX_AGE = 600
+
+# Bump whenever the entry layout changes so old caches are ignored
+METADATA_VERSION = 1
+
+# Labels the create-vision workflow sets up: (name, description, color)
+WORKFLOW_LABELS = (
+    ("vision", "Product vision", "0052cc"),
+    ("strategy", "Vision strategy", "0066ff"),
+    ("epic", "Epic work item", "7B68EE"),
+    ("feature", "Feature work item", "32CD32"),
+    ("story", "User story", "FFD700"),
+    ("task", "Development task", "FFA500"),
+    ("test", "Test case", "DC143C"),
+)
+
+# Keys of cached GraphQL results start with this; any mutation drops them
+GRAPHQL_PREFIX = 'graphql:'
+
+def default_metadata_path():
+    """Cache file named by $COMMANDS_METADATA_CACHE, or one in the user's cache directory"""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.environ.get(METADATA_CACHE_ENV) or os.path.join(cache_home, 'jackson-ideas-commands',
+                                                                'github-metadata.json')
+
+def add_metadata_arguments(parser):
+    """Add the metadata cache options shared by the CLIs that talk to the API"""
+    parser.add_argument('--metadata-cache', metavar='FILE', default=default_metadata_path(),
+                        help=f"repository metadata cache file (default: ${METADATA_CACHE_ENV} "
+                             "or ~/.cache/jackson-ideas-commands/github-metadata.json)")
+    parser.add_argument('--metadata-max-age', type=float, default=DEFAULT_MAX_AGE,
+                        help='seconds cached metadata is used before revalidating it (default: %(default)s)')
+    parser.add_argument('--no-metadata-cache', action='store_true',
+                        help='look up labels, workflows, issues and projects on every run')
+
+def metadata_from_args(args):
+    """MetadataCache described by the parsed arguments, or None when disabled"""
+    if args.no_metadata_cache:
+        return None
+    return MetadataCache(args.metadata_cache, args.metadata_max_age)
+
+def key_path(key):
+    """URL path of a cache key, without its query"""
+    return urlsplit(key).path.rstrip('/')
+
+class MetadataCache:
+    """Cached API responses keyed by URL, with their validators, saved to disk"""
+
+    def __init__(self, path=None, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.dirty = False
+        if path:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == METADATA_VERSION:
+                    self.entries = data.get('entries', {})
+            except (OSError, ValueError):
+                # Missing or unreadable cache means nothing is cached yet
+                pass
+
+    def get(self, key):
+        """The entry for a key, or None"""
+        with self.lock:
+            return self.entries.get(key)
+
+    def is_fresh(self, entry):
+        """Whether an entry can be used without revalidating it"""
+        return time.time() - entry['stored'] < self.max_age
+
+    def put(self, key, data, etag=None, last_modified=None):
+        """Store a response body with the validators to revalidate it"""
+        with self.lock:
+            self.entries[key] = {
+                'data': data,
+                'etag': etag,
+                'last_modified': last_modified,
+                'stored': time.time(),
+            }
+            self.dirty = True
+
+    def touch(self, key):
+        """Mark an entry fresh again after the API said it has not changed"""
+        with self.lock:
+            if key in self.entries:
+                self.entries[key]['stored'] = time.time()
+                self.dirty = True
+
+    def invalidate(self, key, data=None):
+        """Drop the entries a write to key may have changed
+
+        A write to a resource drops the resource and the collection holding
+        it, whatever their queries: PATCH /issues/5 drops /issues/5 and every
+        cached /issues listing. A GraphQL mutation drops every GraphQL result.
+        """
+        if isinstance(data, dict) and 'query' in data:
+            if not data['query'].lstrip().startswith('mutation'):
+                return 0
+            stale = lambda entry_key: entry_key.startswith(GRAPHQL_PREFIX)
+        else:
+            path = key_path(key)
+            paths = {path, path.rsplit('/', 1)[0]}
+            stale = lambda entry_key: not entry_key.startswith(GRAPHQL_PREFIX) and key_path(entry_key) in paths
+
+        with self.lock:
+            dropped = [entry_key for entry_key in self.entries if stale(entry_key)]
+            for entry_key in dropped:
+                del self.entries[entry_key]
+            if dropped:
+                self.dirty = True
+        if dropped:
+            METRICS.increment('github_metadata', len(dropped), result='invalidated')
+        return len(dropped)
+
+    def clear(self):
+        """Forget every entry"""
+        with self.lock:
+            self.entries = {}
+            self.dirty = True
+
+    def save(self):
+        """Write the cache atomically if anything changed"""
+        with self.lock:
+            if not self.path or not self.dirty:
+                return
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': METADATA_VERSION, 'entries': self.entries}, f)
+            os.replace(tmp_path, self.path)
+            self.dirty = False
+
+def list_labels(client):
+    """The repository's labels, keyed by name"""
+    labels = client.cached_get(client.repo_path("/labels"), {"per_page": 100})
+    return {label["name"]: label for label in labels}
+
+def list_milestones(client):
+    """The repository's open and closed milestones, keyed by title"""
+    milestones = client.cached_get(client.repo_path("/milestones"), {"state": "all", "per_page": 100})
+    return {milestone["title"]: milestone for milestone in milestones}
+
+def workflow_ids(client):
+    """Workflow IDs keyed by both file name and display name"""
+    data = client.cached_get(client.repo_path("/actions/workflows"), {"per_page": 100})
+    ids = {}
+    for workflow in data.get("workflows", []):
+        ids[os.path.basename(workflow["path"])] = workflow["id"]
+        ids.setdefault(workflow["name"], workflow["id"])
+    return ids
+
+def product_issues(client, label='vision'):
+    """Issue number of every product, from issues titled like 'Vision: Product' with the label"""
+    prefix = f"{label.title()}: "
+    issues = client.cached_get(client.repo_path("/issues"), {"labels": label, "state": "all", "per_page": 100})
+    products = {}
+    # Listed newest first; the newest issue for a product wins
+    for issue in reversed(issues):
+        if issue["title"].startswith(prefix) and "pull_request" not in issue:
+            products[issue["title"][len(prefix):].strip()] = issue["number"]
+    return products
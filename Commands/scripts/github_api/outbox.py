@@ -0,0 +1,484 @@
+"""
+Dispatch outbox
+Durable SQLite queue of workflow dispatches and issue creations. Every intent
+is recorded before it is sent, drained at a pace derived from the API's
+rate-limit headers, and keyed so that retries and crash recovery never send
+the same dispatch or open the same issue twice
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import hashlib
+import http.client
+from datetime import datetime, timezone
+from collections import namedtuple
+
+from instrumentation import METRICS
+from .client import GitHubError
+from .dispatch import retry_delay
+from .issues import Checkpoint, IssueResult, issue_key
+from .runs import CORRELATION_INPUT, new_correlation_id, dispatch_time, find_run
+
+# Overrides the default outbox location, like $COMMANDS_METADATA_CACHE does for metadata
+OUTBOX_ENV = 'COMMANDS_OUTBOX'
+
+# Bump whenever the schema changes; an outbox with another version is refused, not dropped
+OUTBOX_VERSION = 1
+
+KINDS = ('dispatch', 'issue')
+STATUSES = ('pending', 'sending', 'done', 'failed')
+
+# GitHub asks for content-creating requests to be sent serially, at most about
+# one a second, to stay clear of the secondary rate limits
+DEFAULT_RATE = 1.0
+DEFAULT_BURST = 5
+
+# Sends of one intent that fail before it is given up
+MAX_ATTEMPTS = 5
+
+# Backoff after a server or connection error: base * 2 ** attempts, capped
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 300.0
+
+# Due intents read from the database at a time
+BATCH_SIZE = 50
+
+# An intent left sending by a process we cannot see is recovered after this many seconds
+LEASE_SECONDS = 300
+
+# Clock skew allowed when looking for an issue or run an interrupted send created
+RECONCILE_SLACK = 60
+
+# Seconds to look for the run of a dispatch whose outcome is unknown
+RECONCILE_TIMEOUT = 10
+
+SCHEMA = """
+CREATE TABLE intents (
+    id INTEGER PRIMARY KEY,
+    repository TEXT NOT NULL,
+    key TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    in_doubt INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    owner TEXT,
+    sent_at REAL,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (repository, key)
+);
+CREATE INDEX intents_due ON intents (repository, status, not_before, id);
+"""
+
+Intent = namedtuple('Intent', ['id', 'repository', 'key', 'kind', 'payload', 'status', 'attempts', 'in_doubt',
+                               'not_before', 'owner', 'sent_at', 'result', 'error', 'created', 'updated'])
+OutboxResult = namedtuple('OutboxResult', ['intent', 'outcome', 'message'])
+
+def default_outbox_path():
+    """Outbox named by $COMMANDS_OUTBOX, or one in the user's state directory"""
+    state_home = os.environ.get('XDG_STATE_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'state')
+    return os.environ.get(OUTBOX_ENV) or os.path.join(state_home, 'jackson-ideas-commands', 'github-outbox.sqlite')
+
+def new_batch_id():
+    """Random ID for a batch of dispatches, so a later run of the same jobs is a new batch"""
+    return new_correlation_id()
+
+def dispatch_key(workflow, inputs, ref=None, batch=None):
+    """Idempotency key of a dispatch: the same workflow, ref and inputs in the same batch give the same key"""
+    content = json.dumps([workflow, ref, inputs] + ([batch] if batch else []), sort_keys=True)
+    return 'dispatch:' + hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+def issue_marker(key):
+    """Hidden comment carried by an issue's body, so an interrupted creation can be found"""
+    return f"<!-- outbox-key: {key} -->"
+
+def process_owner():
+    """Name of this process in the owner column"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def owner_alive(owner):
+    """Whether the process that claimed an intent may still be running"""
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        # Another machine; only the lease can tell
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def intent_from_row(row):
+    values = list(row)
+    values[4] = json.loads(values[4])
+    values[11] = json.loads(values[11]) if values[11] else None
+    return Intent(*values)
+
+class Outbox:
+    """Intents for one repository in a SQLite database shared with other runs"""
+
+    def __init__(self, path, repository):
+        self.path = path
+        self.repository = repository
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Other drainers may hold the write lock briefly
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version == 0:
+            with self.connection:
+                self.connection.executescript(SCHEMA)
+                self.connection.execute(f'PRAGMA user_version = {OUTBOX_VERSION}')
+        elif version != OUTBOX_VERSION:
+            # Unsent intents must not be thrown away with an old schema
+            self.connection.close()
+            raise ValueError(f"{path}: outbox version {version}, expected {OUTBOX_VERSION}")
+
+    def add(self, kind, key, payload):
+        """Record an intent unless one with the same key exists; returns (intent, added)"""
+        now = time.time()
+        with self.connection:
+            added = self.connection.execute(
+                'INSERT OR IGNORE INTO intents (repository, key, kind, payload, created, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (self.repository, key, kind, json.dumps(payload), now, now)).rowcount == 1
+        if added:
+            METRICS.increment('github_outbox', kind=kind, outcome='queued')
+        return self.get(key), added
+
+    def add_dispatch(self, workflow, inputs=None, ref=None, key=None, correlate=True, batch=None):
+        """Record a workflow dispatch
+
+        The key defaults to the dispatch's content within its batch, so
+        resuming a batch does not dispatch its jobs twice while a new batch of
+        the same jobs is dispatched again. A correlation ID is added after
+        the key is taken, so an interrupted dispatch can be matched to its run.
+        """
+        inputs = {name: str(value) for name, value in (inputs or {}).items()}
+        key = key or dispatch_key(workflow, inputs, ref, batch)
+        if correlate:
+            inputs.setdefault(CORRELATION_INPUT, new_correlation_id())
+        return self.add('dispatch', key, {'workflow': workflow, 'inputs': inputs, 'ref': ref})
+
+    def add_issue(self, issue):
+        """Record an issue to create; issues are keyed like Checkpoint keys them"""
+        payload = {name: issue.get(name) for name in ('title', 'body', 'labels', 'assignees')}
+        return self.add('issue', 'issue:' + issue_key(issue), payload)
+
+    def get(self, key):
+        """The intent with a key, or None"""
+        row = self.connection.execute('SELECT * FROM intents WHERE repository = ? AND key = ?',
+                                      (self.repository, key)).fetchone()
+        return intent_from_row(row) if row else None
+
+    def intents(self, status=None):
+        """Every intent, or those with a status, oldest first"""
+        sql = 'SELECT * FROM intents WHERE repository = ?'
+        parameters = [self.repository]
+        if status:
+            sql += ' AND status = ?'
+            parameters.append(status)
+        return [intent_from_row(row) for row in self.connection.execute(sql + ' ORDER BY id', parameters)]
+
+    def counts(self):
+        """Number of intents in each status"""
+        counts = dict.fromkeys(STATUSES, 0)
+        counts.update(self.connection.execute(
+            'SELECT status, COUNT(*) FROM intents WHERE repository = ? GROUP BY status', (self.repository,)))
+        return counts
+
+    def due(self, limit=BATCH_SIZE):
+        """Pending intents whose backoff has passed, oldest first"""
+        rows = self.connection.execute(
+            'SELECT * FROM intents WHERE repository = ? AND status = ? AND not_before <= ? ORDER BY id LIMIT ?',
+            (self.repository, 'pending', time.time(), limit))
+        return [intent_from_row(row) for row in rows]
+
+    def next_due(self):
+        """When the next pending intent becomes due, or None if none is pending"""
+        return self.connection.execute(
+            'SELECT MIN(not_before) FROM intents WHERE repository = ? AND status = ?',
+            (self.repository, 'pending')).fetchone()[0]
+
+    def claim(self, intent):
+        """Mark an intent as being sent by this process; False if another drainer has it"""
+        now = time.time()
+        with self.connection:
+            return self.connection.execute(
+                'UPDATE intents SET status = ?, owner = ?, attempts = attempts + 1, sent_at = ?, updated = ? '
+                'WHERE id = ? AND status = ?',
+                ('sending', process_owner(), now, now, intent.id, 'pending')).rowcount == 1
+
+    def complete(self, intent, result):
+        with self.connection:
+            self.connection.execute(
+                'UPDATE intents SET status = ?, result = ?, error = NULL, in_doubt = 0, owner = NULL, updated = ? '
+                'WHERE id = ?', ('done', json.dumps(result), time.time(), intent.id))
+
+    def release(self, intent, delay, error, in_doubt=False, counted=True):
+        """Put an intent back to be retried after a delay
+
+        Rate-limited sends never reached the API, so they are not counted
+        as attempts. In-doubt intents are looked for before being resent.
+        """
+        with self.connection:
+            self.connection.execute(
+                'UPDATE intents SET status = ?, not_before = ?, error = ?, in_doubt = MAX(in_doubt, ?), '
+                'attempts = attempts - ?, owner = NULL, updated = ? WHERE id = ?',
+                ('pending', time.time() + delay, error, int(in_doubt), int(not counted), time.time(), intent.id))
+
+    def fail(self, intent, error, in_doubt=False):
+        with self.connection:
+            self.connection.execute(
+                'UPDATE intents SET status = ?, error = ?, in_doubt = MAX(in_doubt, ?), owner = NULL, updated = ? '
+                'WHERE id = ?', ('failed', error, int(in_doubt), time.time(), intent.id))
+
+    def recover(self):
+        """Return intents left sending by a crashed drainer to the queue, in doubt; returns how many"""
+        recovered = 0
+        for intent in self.intents('sending'):
+            if owner_alive(intent.owner) and time.time() - intent.updated < LEASE_SECONDS:
+                continue
+            with self.connection:
+                resumed = self.connection.execute(
+                    'UPDATE intents SET status = ?, in_doubt = 1, owner = NULL, updated = ? '
+                    'WHERE id = ? AND status = ? AND updated = ?',
+                    ('pending', time.time(), intent.id, 'sending', intent.updated)).rowcount
+            if resumed:
+                METRICS.increment('github_outbox', kind=intent.kind, outcome='resumed')
+                recovered += 1
+        return recovered
+
+    def retry(self, keys=None):
+        """Queue failed intents again, all of them or those with the given keys; returns how many"""
+        sql = ('UPDATE intents SET status = ?, attempts = 0, not_before = 0, updated = ? '
+               'WHERE repository = ? AND status = ?')
+        parameters = ['pending', time.time(), self.repository, 'failed']
+        if keys:
+            sql += f" AND key IN ({', '.join('?' * len(keys))})"
+            parameters += list(keys)
+        with self.connection:
+            return self.connection.execute(sql, parameters).rowcount
+
+    def purge(self):
+        """Delete the intents already sent; returns how many"""
+        with self.connection:
+            return self.connection.execute('DELETE FROM intents WHERE repository = ? AND status = ?',
+                                           (self.repository, 'done')).rowcount
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class TokenBucket:
+    """Paces sends at a rate re-derived from every response's rate-limit headers"""
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, clock=time.monotonic, sleep=time.sleep):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.resume_at = 0.0
+
+    def pause(self, seconds):
+        """Send nothing for the given number of seconds"""
+        self.resume_at = max(self.resume_at, self.clock() + seconds)
+
+    def observe(self, rate_limit):
+        """Slow down so the remaining quota lasts until it resets, and stop when it runs out"""
+        if rate_limit is None:
+            return
+        if rate_limit.retry_after is not None or rate_limit.remaining == 0:
+            self.pause(retry_delay(rate_limit))
+        if rate_limit.remaining is not None and rate_limit.reset:
+            window = max(rate_limit.reset - time.time(), 1.0)
+            self.rate = min(self.max_rate, max(rate_limit.remaining, 1) / window)
+
+    def acquire(self):
+        """Wait for a token; returns the seconds waited"""
+        waited = 0.0
+        while True:
+            now = self.clock()
+            if now < self.resume_at:
+                delay = self.resume_at - now
+            else:
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    break
+                delay = (1 - self.tokens) / self.rate
+            self.sleep(delay)
+            waited += delay
+        if waited:
+            METRICS.observe('github_outbox_wait_seconds', waited)
+        return waited
+
+def send_dispatch(client, intent):
+    payload = intent.payload
+    response = client.dispatch_workflow(payload['workflow'], payload['inputs'], payload['ref'])
+    return {'dispatched_at': dispatch_time(response).isoformat()}
+
+def send_issue(client, intent):
+    payload = intent.payload
+    body = f"{payload['body'] or ''}\n\n{issue_marker(intent.key)}"
+    issue = client.create_issue(payload['title'], body, payload['labels'], payload['assignees'])
+    return {'number': issue['number'], 'url': issue['html_url'], 'node_id': issue['node_id']}
+
+def find_dispatch(client, intent):
+    """Result of an earlier send of a dispatch if its run exists, else None"""
+    payload = intent.payload
+    dispatched_at = datetime.fromtimestamp(intent.sent_at or intent.created, timezone.utc)
+    run = find_run(client, payload['workflow'], dispatched_at, payload['inputs'][CORRELATION_INPUT],
+                   payload['ref'], timeout=RECONCILE_TIMEOUT)
+    if run is None:
+        return None
+    return {'dispatched_at': dispatched_at.isoformat(), 'run_id': run['id'], 'run_url': run['html_url']}
+
+def find_issue(client, intent):
+    """Result of an earlier send of an issue if it was created, else None"""
+    since = datetime.fromtimestamp((intent.sent_at or intent.created) - RECONCILE_SLACK, timezone.utc)
+    issues = client.request('GET', client.repo_path("/issues"), params={
+        "state": "all", "sort": "created", "direction": "desc", "per_page": 100,
+        "since": since.strftime('%Y-%m-%dT%H:%M:%SZ'),
+    }).json()
+    marker = issue_marker(intent.key)
+    for issue in issues:
+        if marker in (issue.get('body') or ''):
+            return {'number': issue['number'], 'url': issue['html_url'], 'node_id': issue['node_id']}
+    return None
+
+SENDERS = {'dispatch': send_dispatch, 'issue': send_issue}
+FINDERS = {'dispatch': find_dispatch, 'issue': find_issue}
+
+def backoff(attempts):
+    """Seconds before resending after a server or connection error"""
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempts)
+
+def send_intent(client, outbox, intent, bucket, max_attempts=MAX_ATTEMPTS):
+    """Send one intent, or find what an interrupted send of it did; None if another drainer has it"""
+    if not outbox.claim(intent):
+        return None
+    attempts = intent.attempts + 1
+    try:
+        if intent.in_doubt:
+            if intent.kind == 'dispatch' and CORRELATION_INPUT not in intent.payload['inputs']:
+                # Without a correlation ID the run cannot be told apart, and a second run is worse than none
+                message = "may already have been dispatched; check the Actions tab, then retry it"
+                outbox.fail(intent, message, in_doubt=True)
+                return OutboxResult(intent, 'failed', message)
+            result = FINDERS[intent.kind](client, intent)
+            if result is not None:
+                outbox.complete(intent, result)
+                return OutboxResult(intent, 'recovered', result)
+        bucket.acquire()
+        result = SENDERS[intent.kind](client, intent)
+    except GitHubError as e:
+        bucket.observe(e.rate_limit)
+        if e.rate_limited:
+            delay = retry_delay(e.rate_limit)
+            bucket.pause(delay)
+            outbox.release(intent, delay, str(e), counted=False)
+            return OutboxResult(intent, 'deferred', str(e))
+        if e.status < 500:
+            outbox.fail(intent, str(e))
+            return OutboxResult(intent, 'failed', str(e))
+        return defer_in_doubt(outbox, intent, attempts, max_attempts, str(e))
+    except (OSError, http.client.HTTPException) as e:
+        # The request may have reached GitHub before the connection broke
+        return defer_in_doubt(outbox, intent, attempts, max_attempts, f"Error: {e}")
+    bucket.observe(client.rate_limit)
+    outbox.complete(intent, result)
+    return OutboxResult(intent, 'sent', result)
+
+def defer_in_doubt(outbox, intent, attempts, max_attempts, message):
+    """Retry a send whose outcome is unknown later, or give up on it"""
+    if attempts >= max_attempts:
+        outbox.fail(intent, message, in_doubt=True)
+        return OutboxResult(intent, 'failed', message)
+    outbox.release(intent, backoff(attempts), message, in_doubt=True)
+    return OutboxResult(intent, 'deferred', message)
+
+def drain(client, outbox, bucket=None, limit=None, wait=True, max_attempts=MAX_ATTEMPTS, on_result=None,
+          sleep=time.sleep):
+    """Send pending intents oldest first, one at a time
+
+    Intents a crashed drainer left sending are recovered first. With wait,
+    deferred intents are waited for until every intent is done or failed;
+    otherwise draining stops when nothing more is due. Returns the results.
+    """
+    bucket = bucket or TokenBucket()
+    outbox.recover()
+
+    results = []
+    while limit is None or len(results) < limit:
+        batch = outbox.due(BATCH_SIZE if limit is None else min(BATCH_SIZE, limit - len(results)))
+        if not batch:
+            next_due = outbox.next_due()
+            if not wait or next_due is None:
+                break
+            sleep(max(next_due - time.time(), 0.01))
+            continue
+        for intent in batch:
+            result = send_intent(client, outbox, intent, bucket, max_attempts)
+            if result is None:
+                continue
+            METRICS.increment('github_outbox', kind=intent.kind, outcome=result.outcome)
+            results.append(result)
+            if on_result:
+                on_result(result)
+    return results
+
+def create_issues_via_outbox(client, outbox, issues, bucket=None, on_result=None, checkpoint=None):
+    """Create issues through the outbox and return their results in input order
+
+    Takes the same issue dicts and checkpoint as create_issues. Issues the
+    checkpoint or the outbox already has are reported as existing, and new
+    ones are recorded in the checkpoint; an interrupted run resumes without
+    opening any issue twice.
+    """
+    checkpoint = checkpoint if checkpoint is not None else Checkpoint()
+    keys = [None if checkpoint.issue(issue_key(issue)) else outbox.add_issue(issue)[0].key for issue in issues]
+    # Issues queued by an earlier run that failed are given another chance
+    queued = [key for key in keys if key]
+    if queued:
+        outbox.retry(queued)
+    sent = {result.intent.key for result in drain(client, outbox, bucket)
+            if result.outcome in ('sent', 'recovered')}
+
+    results = []
+    for issue, key in zip(issues, keys):
+        existing = checkpoint.issue(issue_key(issue))
+        intent = outbox.get(key) if key else None
+        if existing:
+            result = IssueResult(issue_key(issue), issue['title'], existing['number'], existing['url'],
+                                 existing['node_id'], False, None)
+        elif intent.status == 'done':
+            result = IssueResult(issue_key(issue), issue['title'], intent.result['number'], intent.result['url'],
+                                 intent.result['node_id'], key in sent, None)
+            checkpoint.record_issue(result.key, {"number": result.number, "html_url": result.url,
+                                                 "node_id": result.node_id})
+        else:
+            result = IssueResult(issue_key(issue), issue['title'], None, None, None, False, intent.error)
+        if on_result:
+            on_result(result)
+        results.append(result)
+    return results
@@ -0,0 +1,132 @@
+"""
+Workflow run tracking
+Finds the run a dispatch started and follows it until it completes
+"""
+
+import time
+import uuid
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+from instrumentation import METRICS
+
+# Workflow input carrying the correlation ID; our workflows put it in run-name
+CORRELATION_INPUT = 'correlation_id'
+
+# Poll delays grow exponentially from the base to the cap, with jitter
+POLL_BASE_DELAY = 1.0
+POLL_MAX_DELAY = 15.0
+
+# Give up looking for a dispatched run after this many seconds
+FIND_TIMEOUT = 60
+
+# Runs created this many seconds before the dispatch are still candidates
+CREATED_SLACK = 5
+
+RunStatus = namedtuple('RunStatus', ['id', 'status', 'conclusion', 'url', 'elapsed'])
+
+def new_correlation_id():
+    """Short random ID to pass as the correlation input"""
+    return uuid.uuid4().hex[:12]
+
+def dispatch_time(response):
+    """When a dispatch happened, by the server's clock if it sent a Date header"""
+    date = response.headers.get('date') if response is not None else None
+    if date:
+        try:
+            return parsedate_to_datetime(date).astimezone(timezone.utc)
+        except (TypeError, ValueError):
+            pass
+    return datetime.now(timezone.utc)
+
+def backoff_delays(base=POLL_BASE_DELAY, cap=POLL_MAX_DELAY, rng=random):
+    """Yield exponentially growing poll delays with equal jitter"""
+    attempt = 0
+    while True:
+        delay = min(cap, base * 2 ** attempt)
+        yield rng.uniform(delay / 2, delay)
+        attempt += 1
+
+def created_at(run):
+    """Creation time of a run"""
+    return datetime.strptime(run['created_at'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+
+def pick_run(runs, dispatched_at, correlation_id=None, exclude=()):
+    """Choose the run a dispatch started from a list of candidate runs"""
+    if correlation_id:
+        for run in runs:
+            title = run.get('display_title') or run.get('name') or ''
+            if correlation_id in title:
+                return run
+        return None
+
+    # Without a correlation ID, take the earliest unclaimed run created
+    # around or after the dispatch
+    earliest = dispatched_at - timedelta(seconds=CREATED_SLACK)
+    candidates = [run for run in runs if run['id'] not in exclude and created_at(run) >= earliest]
+    return min(candidates, key=created_at) if candidates else None
+
+def find_run(client, workflow_file, dispatched_at, correlation_id=None, ref=None, exclude=(),
+             timeout=FIND_TIMEOUT, sleep=time.sleep):
+    """Find the run started by a dispatch, or None if it does not show up in time"""
+    since = dispatched_at - timedelta(seconds=CREATED_SLACK)
+    params = {
+        "event": "workflow_dispatch",
+        "branch": ref or client.ref,
+        "created": f">={since.strftime('%Y-%m-%dT%H:%M:%SZ')}",
+        "per_page": 30,
+    }
+    path = client.repo_path(f"/actions/workflows/{workflow_file}/runs")
+    deadline = time.monotonic() + timeout
+
+    for delay in backoff_delays():
+        response = client.conditional_get(path, params)
+        # An unchanged list was already searched on the previous poll
+        if not response.not_modified:
+            run = pick_run(response.json()["workflow_runs"], dispatched_at, correlation_id, exclude)
+            if run:
+                return run
+        if time.monotonic() + delay > deadline:
+            return None
+        METRICS.observe('github_poll_wait_seconds', delay, poll='find_run')
+        sleep(delay)
+
+def iter_run_status(client, run_id, timeout=None, sleep=time.sleep):
+    """Yield a RunStatus each time a run's status changes, until it completes
+
+    Polling backs off while nothing changes and starts over from the base
+    delay after every transition. If the timeout passes first, iteration
+    simply stops before the run has completed.
+    """
+    path = client.repo_path(f"/actions/runs/{run_id}")
+    start = time.monotonic()
+    last = None
+    delays = backoff_delays()
+
+    while True:
+        response = client.conditional_get(path)
+        run = response.json()
+        current = (run["status"], run.get("conclusion"))
+        if current != last:
+            last = current
+            delays = backoff_delays()
+            yield RunStatus(run["id"], run["status"], run.get("conclusion"), run["html_url"],
+                            time.monotonic() - start)
+        if run["status"] == "completed":
+            return
+
+        delay = next(delays)
+        if timeout is not None and time.monotonic() - start + delay > timeout:
+            return
+        METRICS.observe('github_poll_wait_seconds', delay, poll='run_status')
+        sleep(delay)
+
+def wait_for_run(client, run_id, on_status=None, timeout=None, sleep=time.sleep):
+    """Follow a run to completion and return its last RunStatus"""
+    status = None
+    for status in iter_run_status(client, run_id, timeout, sleep):
+        if on_status:
+            on_status(status)
+    return status
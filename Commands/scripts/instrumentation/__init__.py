@@ -0,0 +1,12 @@
+"""
+Instrumentation
+Opt-in timers, counters and gauges for the processors and the GitHub API
+client, with optional cProfile and tracemalloc capture
+
+Nothing is recorded unless a command is run with --metrics, --profile or
+--trace-memory (or with $COMMANDS_METRICS set).
+"""
+
+from .metrics import METRICS, Metrics, increment, observe, set_gauge, timer
+from .export import METRICS_FORMATS, format_json_lines, format_openmetrics, write_metrics
+from .session import METRICS_ENV, METRICS_FORMAT_ENV, add_metrics_arguments, metrics_session, session_from_args
@@ -0,0 +1,72 @@
+"""
+Metrics output
+Writes a metrics snapshot as JSON lines or OpenMetrics text
+"""
+
+import os
+import sys
+import json
+import time
+
+METRICS_FORMATS = ('jsonl', 'openmetrics')
+
+def format_json_lines(records, context=None):
+    """One JSON object per metric, each tagged with the run context"""
+    timestamp = round(time.time(), 3)
+    lines = []
+    for record in records:
+        line = dict(context or {}, timestamp=timestamp, pid=os.getpid())
+        line.update(record)
+        lines.append(json.dumps(line, sort_keys=True))
+    return '\n'.join(lines) + '\n' if lines else ''
+
+def escape_label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(str(value))}"' for key, value in sorted(labels.items())) + '}'
+
+def format_openmetrics(records, context=None):
+    """OpenMetrics text exposition; timers become summaries"""
+    families = {}
+    for record in records:
+        families.setdefault((record['name'], record['type']), []).append(record)
+
+    lines = []
+    for (name, kind), samples in sorted(families.items()):
+        if kind == 'counter':
+            lines.append(f"# TYPE {name} counter")
+            for sample in samples:
+                labels = format_labels(dict(context or {}, **sample['labels']))
+                lines.append(f"{name}_total{labels} {sample['value']}")
+        elif kind == 'timer':
+            lines.append(f"# TYPE {name} summary")
+            lines.append(f"# UNIT {name} seconds")
+            for sample in samples:
+                labels = format_labels(dict(context or {}, **sample['labels']))
+                lines.append(f"{name}_count{labels} {sample['count']}")
+                lines.append(f"{name}_sum{labels} {sample['sum']:.6f}")
+        else:
+            lines.append(f"# TYPE {name} gauge")
+            for sample in samples:
+                labels = format_labels(dict(context or {}, **sample['labels']))
+                lines.append(f"{name}{labels} {sample['value']}")
+    lines.append("# EOF")
+    return '\n'.join(lines) + '\n'
+
+def write_metrics(records, output, metrics_format='jsonl', context=None):
+    """Write records to a file, appending JSON lines, or to stderr for '-'"""
+    if metrics_format == 'openmetrics':
+        text = format_openmetrics(records, context)
+    else:
+        text = format_json_lines(records, context)
+
+    if output == '-':
+        sys.stderr.write(text)
+        sys.stderr.flush()
+        return
+    # JSON lines accumulate across runs; an exposition is one complete snapshot
+    with open(output, 'a' if metrics_format == 'jsonl' else 'w', encoding='utf-8') as f:
+        f.write(text)
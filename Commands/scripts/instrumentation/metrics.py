@@ -0,0 +1,152 @@
+"""
+Metrics registry
+Counters, timers and gauges that cost one attribute check while disabled
+"""
+
+import time
+import threading
+
+class NullTimer:
+    """Timer used while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+NULL_TIMER = NullTimer()
+
+class Timer:
+    """Records the time spent in a with block"""
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+def label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+class Metrics:
+    """Thread-safe store of counters, timers and gauges keyed by name and labels"""
+
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.timers = {}
+        self.gauges = {}
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        """Forget everything recorded so far"""
+        with self.lock:
+            self.counters.clear()
+            self.timers.clear()
+            self.gauges.clear()
+
+    def increment(self, name, value=1, **labels):
+        """Add to a counter"""
+        if not self.enabled:
+            return
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """Record one duration, in seconds"""
+        if not self.enabled:
+            return
+        key = (name, label_key(labels))
+        with self.lock:
+            timing = self.timers.get(key)
+            if timing is None:
+                self.timers[key] = [1, seconds, seconds, seconds]
+            else:
+                timing[0] += 1
+                timing[1] += seconds
+                timing[2] = min(timing[2], seconds)
+                timing[3] = max(timing[3], seconds)
+
+    def set_gauge(self, name, value, **labels):
+        """Set a value that can go up and down"""
+        if not self.enabled:
+            return
+        with self.lock:
+            self.gauges[(name, label_key(labels))] = value
+
+    def timer(self, name, **labels):
+        """Context manager that observes the duration of its block"""
+        if not self.enabled:
+            return NULL_TIMER
+        return Timer(self, name, labels)
+
+    def snapshot(self):
+        """Everything recorded so far as JSON-friendly records"""
+        with self.lock:
+            records = [
+                {'type': 'counter', 'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.counters.items())
+            ]
+            records += [
+                {'type': 'timer', 'name': name, 'labels': dict(labels), 'count': count, 'sum': total,
+                 'min': low, 'max': high}
+                for (name, labels), (count, total, low, high) in sorted(self.timers.items())
+            ]
+            records += [
+                {'type': 'gauge', 'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in sorted(self.gauges.items())
+            ]
+        return records
+
+    def merge(self, records):
+        """Add records from another process's snapshot"""
+        if not self.enabled:
+            return
+        for record in records:
+            labels = record['labels']
+            if record['type'] == 'counter':
+                self.increment(record['name'], record['value'], **labels)
+            elif record['type'] == 'gauge':
+                self.set_gauge(record['name'], record['value'], **labels)
+            else:
+                key = (record['name'], label_key(labels))
+                with self.lock:
+                    timing = self.timers.get(key)
+                    if timing is None:
+                        self.timers[key] = [record['count'], record['sum'], record['min'], record['max']]
+                    else:
+                        timing[0] += record['count']
+                        timing[1] += record['sum']
+                        timing[2] = min(timing[2], record['min'])
+                        timing[3] = max(timing[3], record['max'])
+
+# The process-wide registry the pipeline and API client record into
+METRICS = Metrics()
+
+def increment(name, value=1, **labels):
+    METRICS.increment(name, value, **labels)
+
+def observe(name, seconds, **labels):
+    METRICS.observe(name, seconds, **labels)
+
+def set_gauge(name, value, **labels):
+    METRICS.set_gauge(name, value, **labels)
+
+def timer(name, **labels):
+    return METRICS.timer(name, **labels)
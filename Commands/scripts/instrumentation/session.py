@@ -0,0 +1,84 @@
+"""
+Instrumented runs
+Command line options that switch metrics, profiling and memory tracing on
+for the duration of a command
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from .metrics import METRICS
+from .export import METRICS_FORMATS, write_metrics
+
+# Let batch jobs turn metrics on without changing command lines
+METRICS_ENV = 'COMMANDS_METRICS'
+METRICS_FORMAT_ENV = 'COMMANDS_METRICS_FORMAT'
+
+# Allocation sites reported with --trace-memory
+TOP_ALLOCATIONS = 10
+
+def add_metrics_arguments(parser):
+    """Add the instrumentation options shared by the CLIs"""
+    parser.add_argument('--metrics', metavar='FILE', default=os.environ.get(METRICS_ENV),
+                        help=f"write timers and counters to FILE, or '-' for stderr (default: ${METRICS_ENV})")
+    parser.add_argument('--metrics-format', choices=METRICS_FORMATS,
+                        default=os.environ.get(METRICS_FORMAT_ENV, 'jsonl'),
+                        help='JSON lines (appended) or OpenMetrics text (default: jsonl)')
+    parser.add_argument('--profile', metavar='FILE', help='write a cProfile dump of the run to FILE')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='record peak traced memory and the largest allocation sites')
+
+def record_memory(snapshot):
+    """Turn a tracemalloc snapshot into gauges for its largest allocation sites"""
+    for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        METRICS.set_gauge('memory_allocated_bytes', stat.size, site=f"{frame.filename}:{frame.lineno}")
+
+@contextmanager
+def metrics_session(command, output=None, metrics_format='jsonl', profile=None, trace_memory=False):
+    """Record metrics for the with block and write them when it ends
+
+    Does nothing unless an output, profile or memory trace is requested.
+    """
+    output = output if output is not None else os.environ.get(METRICS_ENV)
+    if not (output or profile or trace_memory):
+        yield METRICS
+        return
+
+    METRICS.enable()
+    profiler = None
+    if profile:
+        import cProfile
+        profiler = cProfile.Profile()
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    start = time.perf_counter()
+    status = 'ok'
+    if profiler:
+        profiler.enable()
+    try:
+        yield METRICS
+    except BaseException as e:
+        # sys.exit(0) is still a success
+        if not (isinstance(e, SystemExit) and not e.code):
+            status = 'failed'
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile)
+        METRICS.observe('command_seconds', time.perf_counter() - start, status=status)
+        if trace_memory:
+            METRICS.set_gauge('memory_peak_bytes', tracemalloc.get_traced_memory()[1])
+            record_memory(tracemalloc.take_snapshot())
+            tracemalloc.stop()
+        if output:
+            write_metrics(METRICS.snapshot(), output, metrics_format, {'command': command})
+        METRICS.disable()
+
+def session_from_args(args, command):
+    """metrics_session configured from add_metrics_arguments options"""
+    return metrics_session(command, args.metrics or '', args.metrics_format, args.profile, args.trace_memory)
@@ -0,0 +1,12 @@
+"""
+Strategy and epic planning
+Template and catalogue driven generation used by the create-strategy and
+create-epics workflows through generate-plan.py
+"""
+
+from .generator import (
+    DEFAULT_CATALOGUE, DEFAULT_TIMEFRAME, Catalogue, Epic, Phase, ProductPlan, product_slug, load_template,
+    load_catalogue, select_entries, render_epics, render_strategy, strategy_phases, vision_summary,
+    render_vision_issue, render_strategy_issue, render_epic_body, render_epic_issue, epics_to_json, phases_to_json,
+    strategy_sidecar, rebuild_strategy_sidecar, render_many,
+)
@@ -0,0 +1,219 @@
+"""
+Strategy and epic generator
+Renders strategy documents, strategy issues and epics from templates and
+data-driven epic catalogues
+"""
+
+import os
+import re
+import json
+import hashlib
+from string import Template
+from functools import lru_cache
+from collections import namedtuple
+
+from vision_pipeline import MissingDependencyError, product_slug
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(PACKAGE_DIR, 'templates')
+DEFAULT_CATALOGUE = os.path.join(PACKAGE_DIR, 'catalogues', 'epics.json')
+
+DEFAULT_TIMEFRAME = '18'
+
+# Epics are picked in this order when only some of a catalogue is wanted
+PRIORITY_ORDER = {'high': 0, 'medium': 1, 'low': 2}
+
+# Rendered documents kept per process
+RENDER_CACHE_SIZE = 4096
+
+# Bump whenever the strategy sidecar layout changes
+STRATEGY_SIDECAR_VERSION = 1
+
+# What strategies made before strategy.json recorded in their document and issue
+TIMEFRAME_PATTERN = re.compile(r'\b(\d+)-month\b')
+ISSUE_REFERENCE_PATTERN = re.compile(r'#(\d+)')
+STRATEGY_LINK_PATTERN = re.compile(r'(?:Commands/)?docs/strategies/[^)\s]+\.md')
+
+# A compiled template and the hash of its source
+LoadedTemplate = namedtuple('LoadedTemplate', ['template', 'version'])
+
+# An epic catalogue: content hash, name and entries with compiled titles
+Catalogue = namedtuple('Catalogue', ['version', 'name', 'entries'])
+CatalogueEntry = namedtuple('CatalogueEntry', ['title', 'description', 'priority', 'phase', 'acceptance_criteria'])
+
+Epic = namedtuple('Epic', ['title', 'description', 'priority', 'phase', 'acceptance_criteria'])
+Phase = namedtuple('Phase', ['name', 'duration'])
+ProductPlan = namedtuple('ProductPlan', ['product_name', 'strategy', 'phases', 'epics'])
+
+def content_version(text):
+    """Short hash identifying a template or catalogue revision"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+
+@lru_cache(maxsize=None)
+def load_template(name):
+    """Read and compile a template from the templates directory once"""
+    with open(os.path.join(TEMPLATE_DIR, name), 'r', encoding='utf-8') as f:
+        text = f.read()
+    return LoadedTemplate(Template(text), content_version(text))
+
+def parse_catalogue(text, path):
+    """Parse catalogue text as YAML or JSON depending on the file extension"""
+    if path.lower().endswith(('.yml', '.yaml')):
+        try:
+            import yaml
+        except ImportError:
+            raise MissingDependencyError(
+                "PyYAML is not installed; install it with 'pip install pyyaml' "
+                "or use a JSON catalogue") from None
+        return yaml.safe_load(text)
+    return json.loads(text)
+
+@lru_cache(maxsize=None)
+def load_catalogue(path=DEFAULT_CATALOGUE):
+    """Read an epic catalogue once and compile its title templates"""
+    with open(path, 'r', encoding='utf-8') as f:
+        text = f.read()
+    data = parse_catalogue(text, path)
+    entries = tuple(
+        CatalogueEntry(
+            title=Template(entry['title']),
+            description=entry['description'],
+            priority=entry.get('priority', 'medium'),
+            phase=str(entry.get('phase', '1')),
+            acceptance_criteria=tuple(entry.get('acceptance_criteria', ())),
+        )
+        for entry in data['epics']
+    )
+    return Catalogue(content_version(text), data.get('name', os.path.basename(path)), entries)
+
+def select_entries(entries, max_epics=None):
+    """Keep the most important entries, by priority, then phase, then catalogue order, in catalogue order"""
+    if max_epics is None or max_epics >= len(entries):
+        return list(entries)
+    ranked = sorted(
+        range(len(entries)),
+        key=lambda i: (PRIORITY_ORDER.get(entries[i].priority, len(PRIORITY_ORDER)), int(entries[i].phase), i),
+    )
+    return [entries[i] for i in sorted(ranked[:max(max_epics, 0)])]
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_epics(product_name, max_epics, catalogue_path, catalogue_version):
+    catalogue = load_catalogue(catalogue_path)
+    return tuple(
+        Epic(entry.title.substitute(product_name=product_name), entry.description, entry.priority, entry.phase,
+             entry.acceptance_criteria)
+        for entry in select_entries(catalogue.entries, max_epics)
+    )
+
+def render_epics(product_name, max_epics=None, catalogue_path=DEFAULT_CATALOGUE):
+    """Epics for a product, memoized per (product, max_epics, catalogue version)"""
+    catalogue = load_catalogue(catalogue_path)
+    return _render_epics(product_name, max_epics, catalogue_path, catalogue.version)
+
+@lru_cache(maxsize=RENDER_CACHE_SIZE)
+def _render_strategy(product_name, timeframe, template_version):
+    return load_template('strategy.md').template.substitute(product_name=product_name, timeframe=timeframe)
+
+def render_strategy(product_name, timeframe=DEFAULT_TIMEFRAME):
+    """Strategy document for a product, memoized per (product, timeframe, template version)"""
+    timeframe = str(timeframe).strip()
+    return _render_strategy(product_name, timeframe, load_template('strategy.md').version)
+
+def strategy_phases(timeframe=DEFAULT_TIMEFRAME):
+    """The phases described by the strategy document"""
+    return (
+        Phase("Foundation", "Months 1-6"),
+        Phase("Growth", "Months 7-12"),
+        Phase("Optimization", f"Months 13-{str(timeframe).strip()}"),
+    )
+
+def vision_summary(content):
+    """The last ten of a document's first twenty lines, like the create-vision workflow"""
+    return '\n'.join(content.rstrip('\n').split('\n')[:20][-10:])
+
+def render_vision_issue(product_name, content, vision_file, document_url, strategy_workflow_url):
+    """Body of the vision issue"""
+    return load_template('vision-issue.md').template.substitute(
+        product_name=product_name, summary=vision_summary(content), vision_file=vision_file,
+        document_url=document_url, strategy_workflow_url=strategy_workflow_url)
+
+def render_strategy_issue(product_name, timeframe, vision_issue, document_url, epics_workflow_url):
+    """Body of the strategy tracking issue"""
+    timeframe = str(timeframe).strip()
+    phases = '\n'.join(f"- **{phase.name}** ({phase.duration})" for phase in strategy_phases(timeframe))
+    return load_template('strategy-issue.md').template.substitute(
+        product_name=product_name, timeframe=timeframe, phases=phases, vision_issue=vision_issue,
+        document_url=document_url, epics_workflow_url=epics_workflow_url)
+
+def render_epic_body(epic, strategy_issue, vision_issue):
+    """Body of an epic issue"""
+    criteria = '\n'.join(f"- [ ] {item}" for item in epic['acceptance_criteria'])
+    return load_template('epic.md').template.substitute(
+        description=epic['description'], phase=epic['phase'], priority=epic['priority'], criteria=criteria,
+        strategy_issue=strategy_issue, vision_issue=vision_issue).rstrip('\n')
+
+def render_epic_issue(epic, strategy_issue, vision_issue, assignee=None):
+    """The issue to create for one generated epic"""
+    return {
+        'title': epic['title'],
+        'body': render_epic_body(epic, strategy_issue, vision_issue),
+        'labels': ['epic', f"{epic['priority']}-priority"],
+        'assignees': [assignee] if assignee else [],
+    }
+
+def epics_to_json(epics):
+    """Epics as JSON-ready dicts, the format of /tmp/epics.json"""
+    return [dict(epic._asdict(), acceptance_criteria=list(epic.acceptance_criteria)) for epic in epics]
+
+def phases_to_json(phases):
+    """Phases as JSON-ready dicts, the format of /tmp/phases.json"""
+    return [phase._asdict() for phase in phases]
+
+def strategy_sidecar(product_name, timeframe, strategy_path, vision_issue='', vision=None):
+    """Machine-readable summary of a strategy, written beside it as strategy.json
+
+    vision is the sidecar of the vision the strategy was made from; its section
+    hashes let later stages tell when that vision has changed since.
+    """
+    if vision:
+        vision = {
+            'path': vision['document']['path'],
+            'sha256': vision['document']['sha256'],
+            'sections': {name: section['hash'] for name, section in vision['canonical'].items()},
+            'missing': vision['missing'],
+        }
+    return {
+        'format': 'strategy-sidecar',
+        'version': STRATEGY_SIDECAR_VERSION,
+        'product_name': product_name,
+        'timeframe': str(timeframe).strip(),
+        'strategy_path': strategy_path,
+        'vision_issue': str(vision_issue),
+        'vision': vision,
+        'phases': phases_to_json(strategy_phases(timeframe)),
+    }
+
+def rebuild_strategy_sidecar(product_name, strategy_path, issue_body=''):
+    """strategy.json for a strategy made before sidecars, from its document and issue body"""
+    # The issue links the document and names the vision issue first
+    link = STRATEGY_LINK_PATTERN.search(issue_body)
+    strategy_path = link.group(0) if link else strategy_path
+    vision_issue = ISSUE_REFERENCE_PATTERN.search(issue_body)
+    text = issue_body
+    if os.path.exists(strategy_path):
+        with open(strategy_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    timeframe = TIMEFRAME_PATTERN.search(text)
+    return strategy_sidecar(product_name, timeframe.group(1) if timeframe else DEFAULT_TIMEFRAME, strategy_path,
+                            vision_issue.group(1) if vision_issue else '')
+
+def render_many(product_names, timeframe=DEFAULT_TIMEFRAME, max_epics=None, catalogue_path=DEFAULT_CATALOGUE):
+    """Yield a ProductPlan for every product, sharing loaded templates and catalogues"""
+    phases = strategy_phases(timeframe)
+    for product_name in product_names:
+        yield ProductPlan(
+            product_name,
+            render_strategy(product_name, timeframe),
+            phases,
+            render_epics(product_name, max_epics, catalogue_path),
+        )
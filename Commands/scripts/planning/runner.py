@@ -0,0 +1,179 @@
+"""
+Vision to epics pipeline runner
+Runs what the create-vision, create-strategy and create-epics workflows do
+for many products in one process, as stages joined by bounded queues
+"""
+
+import os
+import time
+import asyncio
+from collections import namedtuple
+
+from vision_pipeline import product_slug, convert_vision_document
+from vision_pipeline.sidecar import write_sidecar, write_vision_sidecar, load_vision_sidecar
+from github_api import (
+    DEFAULT_CONCURRENCY, WORKFLOW_LABELS, Checkpoint, create_issues, create_project, ensure_labels,
+    add_project_items,
+)
+from .generator import (
+    DEFAULT_CATALOGUE, DEFAULT_TIMEFRAME, render_strategy, render_epics, render_vision_issue,
+    render_strategy_issue, render_epic_issue, strategy_sidecar,
+)
+
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 4
+
+STAGES = ('vision', 'strategy', 'epics')
+
+PipelineJob = namedtuple('PipelineJob', ['product_name', 'document'])
+
+def new_state(index, job):
+    """Per-product record passed from stage to stage"""
+    return {
+        'index': index,
+        'product_name': job.product_name,
+        'document': str(job.document),
+        'status': 'running',
+        'stage': None,
+        'error': None,
+        'vision_file': None,
+        'vision_issue': None,
+        'project_id': None,
+        'strategy_file': None,
+        'strategy_issue': None,
+        'epic_issues': [],
+        'timings': {},
+    }
+
+class PipelineRunner:
+    """Takes vision documents all the way to epic issues"""
+
+    def __init__(self, client, output_root, repository_url=None, ref='master', timeframe=DEFAULT_TIMEFRAME,
+                 max_epics=None, catalogue_path=DEFAULT_CATALOGUE, assignee=None, workers=DEFAULT_WORKERS,
+                 queue_size=DEFAULT_QUEUE_SIZE, issue_concurrency=DEFAULT_CONCURRENCY):
+        self.client = client
+        self.output_root = output_root
+        self.repository_url = (repository_url or f"https://github.com/{client.owner}/{client.repo}").rstrip('/')
+        self.ref = ref
+        self.timeframe = timeframe
+        self.max_epics = max_epics
+        self.catalogue_path = catalogue_path
+        self.assignee = assignee
+        self.workers = max(workers, 1)
+        self.queue_size = max(queue_size, 1)
+        self.issue_concurrency = max(issue_concurrency, 1)
+
+    def blob_url(self, path):
+        return f"{self.repository_url}/blob/{self.ref}/{path.replace(os.sep, '/')}"
+
+    def workflow_url(self, workflow_file):
+        return f"{self.repository_url}/actions/workflows/{workflow_file}"
+
+    def create_issue(self, title, body, labels):
+        assignees = [self.assignee] if self.assignee else None
+        return self.client.create_issue(title, body, labels, assignees)
+
+    def vision_stage(self, state):
+        """Process the document, open the vision issue and the product project"""
+        product_name = state['product_name']
+        vision_file = os.path.join(self.output_root, 'visions', product_slug(product_name), 'vision.md')
+        convert_vision_document(state['document'], vision_file, product_name)
+        write_vision_sidecar(vision_file, product_name, state['document'])
+        with open(vision_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+
+        body = render_vision_issue(product_name, content, vision_file, self.blob_url(vision_file),
+                                   self.workflow_url('create-strategy.yml'))
+        issue = self.create_issue(f"Vision: {product_name}", body, ['vision'])
+        project_id = create_project(self.client, self.client.owner, f"{product_name} Development")
+        add_project_items(self.client, project_id, [issue['node_id']])
+
+        state.update(vision_file=vision_file, vision_issue=issue['number'], project_id=project_id)
+
+    def strategy_stage(self, state):
+        """Write the strategy document and open the strategy issue"""
+        product_name = state['product_name']
+        strategy_file = os.path.join(self.output_root, 'strategies', product_slug(product_name), 'strategy.md')
+        os.makedirs(os.path.dirname(strategy_file), exist_ok=True)
+        with open(strategy_file, 'w', encoding='utf-8') as f:
+            f.write(render_strategy(product_name, self.timeframe))
+        vision = load_vision_sidecar(state['vision_file'], product_name)
+        write_sidecar(os.path.join(os.path.dirname(strategy_file), 'strategy.json'),
+                      strategy_sidecar(product_name, self.timeframe, strategy_file, state['vision_issue'], vision))
+
+        body = render_strategy_issue(product_name, self.timeframe, state['vision_issue'],
+                                     self.blob_url(strategy_file), self.workflow_url('create-epics.yml'))
+        issue = self.create_issue(f"Strategy: {product_name}", body, ['strategy'])
+        self.client.comment_on_issue(state['vision_issue'], f"🎯 Strategy created: #{issue['number']}")
+        add_project_items(self.client, state['project_id'], [issue['node_id']])
+
+        state.update(strategy_file=strategy_file, strategy_issue=issue['number'])
+
+    def epics_stage(self, state):
+        """Open the epic issues and add them to the project"""
+        epics = render_epics(state['product_name'], self.max_epics, self.catalogue_path)
+        issues = [render_epic_issue(epic._asdict(), state['strategy_issue'], state['vision_issue'], self.assignee)
+                  for epic in epics]
+        results = create_issues(self.client, issues, Checkpoint(), self.issue_concurrency)
+        errors = [result.error for result in results if result.error]
+        if errors:
+            raise RuntimeError(f"{len(errors)} of {len(results)} epics failed: {errors[0]}")
+
+        numbers = [result.number for result in results]
+        add_project_items(self.client, state['project_id'], [result.node_id for result in results])
+        self.client.comment_on_issue(state['strategy_issue'],
+                                     "🎯 Created epics: " + ', '.join(f"#{number}" for number in numbers))
+        state['epic_issues'] = numbers
+
+    async def run_async(self, jobs, on_result=None):
+        """Run every job through all stages and return their states in job order"""
+        stages = [(name, getattr(self, f"{name}_stage")) for name in STAGES]
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in stages]
+        finished = []
+
+        def finish(state):
+            finished.append(state)
+            if on_result:
+                on_result(state)
+
+        async def feed():
+            for index, job in enumerate(jobs):
+                await queues[0].put(new_state(index, job))
+            for _ in range(self.workers):
+                await queues[0].put(None)
+
+        async def worker(position):
+            name, stage = stages[position]
+            while True:
+                state = await queues[position].get()
+                if state is None:
+                    return
+                start = time.perf_counter()
+                try:
+                    await asyncio.to_thread(stage, state)
+                except Exception as e:
+                    state['timings'][name] = time.perf_counter() - start
+                    state.update(status='failed', stage=name, error=f"{type(e).__name__}: {e}")
+                    finish(state)
+                    continue
+                state['timings'][name] = time.perf_counter() - start
+                if position + 1 < len(stages):
+                    # Blocks while the next stage is backed up
+                    await queues[position + 1].put(state)
+                else:
+                    state['status'] = 'ok'
+                    finish(state)
+
+        async def run_stage(position):
+            await asyncio.gather(*(worker(position) for _ in range(self.workers)))
+            if position + 1 < len(stages):
+                for _ in range(self.workers):
+                    await queues[position + 1].put(None)
+
+        await asyncio.to_thread(ensure_labels, self.client, WORKFLOW_LABELS)
+        await asyncio.gather(feed(), *(run_stage(position) for position in range(len(stages))))
+        return sorted(finished, key=lambda state: state['index'])
+
+    def run(self, jobs, on_result=None):
+        """Run the pipeline to completion"""
+        return asyncio.run(self.run_async(jobs, on_result))
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Vision to Epics Pipeline Runner
+Takes vision documents through vision, strategy and epic creation in one
+process, against GitHub or a bundled local stand-in
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+
+from vision_pipeline import product_name_from_path
+from github_api import (
+    DEFAULT_BASE_URL, DEFAULT_CONCURRENCY, GitHubClient, MetadataCache, add_metadata_arguments, metadata_from_args,
+)
+from planning import DEFAULT_CATALOGUE, DEFAULT_TIMEFRAME
+from planning.runner import STAGES, DEFAULT_WORKERS, DEFAULT_QUEUE_SIZE, PipelineJob, PipelineRunner
+from instrumentation import add_metrics_arguments, session_from_args
+
+DOCUMENT_EXTENSIONS = ('.md', '.docx')
+
+def find_documents(paths):
+    """Vision documents named directly or found under directories"""
+    documents = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            for child in sorted(path.rglob('*')):
+                # Skip Word lock files such as ~$sion Statement.docx
+                if child.is_file() and child.suffix.lower() in DOCUMENT_EXTENSIONS and not child.name.startswith('~$'):
+                    documents.append(child)
+        else:
+            documents.append(path)
+    return documents
+
+def print_result(state):
+    """Report one product as it leaves the pipeline"""
+    timings = ' '.join(f"{stage}={seconds:.2f}s" for stage, seconds in state['timings'].items())
+    if state['status'] == 'ok':
+        print(f"✓ {state['product_name']}: vision #{state['vision_issue']}, strategy #{state['strategy_issue']}, "
+              f"{len(state['epic_issues'])} epics ({timings})")
+    else:
+        print(f"✗ {state['product_name']} failed in {state['stage']}: {state['error']}")
+
+def summarize(results, elapsed):
+    """Throughput and per-stage timings for a run"""
+    succeeded = [state for state in results if state['status'] == 'ok']
+    stage_means = {}
+    for stage in STAGES:
+        timings = [state['timings'][stage] for state in results if stage in state['timings']]
+        if timings:
+            stage_means[stage] = sum(timings) / len(timings)
+    return {
+        'products': len(results),
+        'succeeded': len(succeeded),
+        'failed': len(results) - len(succeeded),
+        'elapsed': elapsed,
+        'products_per_second': len(results) / elapsed if elapsed else None,
+        'stage_mean_seconds': stage_means,
+    }
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Run vision -> strategy -> epics for many products')
+    parser.add_argument('documents', nargs='+', help='Vision documents (.md/.docx) or directories of them')
+    parser.add_argument('--product', help='Product name (only with a single document)')
+    parser.add_argument('--output-root', help='Where visions/ and strategies/ are written '
+                                              '(default: Commands/docs, or a temporary directory with --fake)')
+    parser.add_argument('--fake', action='store_true', help='Run against a bundled local GitHub stand-in')
+    parser.add_argument('--fake-latency', type=float, default=0.0,
+                        help='Seconds the stand-in adds to every request')
+    parser.add_argument('--owner', default=os.environ.get('GH_OWNER', 'bjackson071968'), help='Repository owner')
+    parser.add_argument('--repo', default=os.environ.get('GH_REPO', 'Jackson.Ideas'), help='Repository name')
+    parser.add_argument('--ref', default='master', help='Branch the documents are linked on')
+    parser.add_argument('--api-url', default=os.environ.get('GITHUB_API_URL', DEFAULT_BASE_URL),
+                        help='GitHub API base URL')
+    parser.add_argument('--timeframe', default=DEFAULT_TIMEFRAME, help='Strategy timeframe in months')
+    parser.add_argument('--max-epics', type=int, default=5, help='Epics per product')
+    parser.add_argument('--catalogue', default=DEFAULT_CATALOGUE, help='Epic catalogue (JSON or YAML)')
+    parser.add_argument('--assignee', help='User to assign the created issues to')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='Workers per stage')
+    parser.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                        help='Products that may wait between two stages')
+    parser.add_argument('--issue-concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help='Epic issues created at once per product')
+    parser.add_argument('--report', help='Write per-product results and a summary as JSON')
+    add_metadata_arguments(parser)
+    add_metrics_arguments(parser)
+    return parser
+
+def run(args):
+    """Run every document through the pipeline"""
+
+    documents = find_documents(args.documents)
+    if not documents:
+        print("No vision documents found")
+        sys.exit(1)
+    if args.product and len(documents) > 1:
+        print("ERROR: --product can only be used with a single document")
+        sys.exit(1)
+    jobs = [PipelineJob(args.product or product_name_from_path(path), path) for path in documents]
+
+    fake = None
+    if args.fake:
+        from github_api.fake import FakeGitHub
+        fake = FakeGitHub(latency=args.fake_latency).start()
+        api_url, token = fake.url, "fake-token"
+        output_root = args.output_root or tempfile.mkdtemp(prefix='vision-pipeline-')
+    else:
+        api_url = args.api_url
+        token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+        output_root = args.output_root or "Commands/docs"
+        if not token:
+            print("ERROR: No GitHub token found! Set GH_TOKEN or GITHUB_TOKEN, or use --fake.")
+            sys.exit(1)
+
+    # The stand-in starts empty every run, so its metadata is only cached in memory
+    metadata = metadata_from_args(args)
+    if fake and metadata is not None:
+        metadata = MetadataCache(None, args.metadata_max_age)
+
+    pool_size = args.workers * (len(STAGES) + args.issue_concurrency)
+    client = GitHubClient(token, args.owner, args.repo, ref=args.ref, base_url=api_url, pool_size=pool_size,
+                          metadata=metadata)
+    runner = PipelineRunner(client, output_root, ref=args.ref, timeframe=args.timeframe, max_epics=args.max_epics,
+                            catalogue_path=args.catalogue, assignee=args.assignee, workers=args.workers,
+                            queue_size=args.queue_size, issue_concurrency=args.issue_concurrency)
+
+    print(f"Running {len(jobs)} products through {' -> '.join(STAGES)} "
+          f"({args.workers} workers per stage{', local stand-in' if fake else ''})")
+    print(f"Documents will be written under: {output_root}")
+    print()
+
+    start = time.perf_counter()
+    results = runner.run(jobs, on_result=print_result)
+    summary = summarize(results, time.perf_counter() - start)
+    client.close()
+
+    print()
+    print(f"Finished {summary['succeeded']} of {summary['products']} products in {summary['elapsed']:.2f}s "
+          f"({summary['products_per_second']:.2f} products/s, {summary['failed']} failed)")
+    print("Mean stage time: " + ', '.join(f"{stage} {seconds:.2f}s"
+                                         for stage, seconds in summary['stage_mean_seconds'].items()))
+    if fake:
+        summary['fake_github'] = fake.state.snapshot()
+        fake.stop()
+        print(f"Stand-in received {summary['fake_github']['requests']} requests")
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump({'summary': summary, 'results': results}, f, indent=2)
+        print(f"Pipeline report saved to: {args.report}")
+
+    sys.exit(1 if summary['failed'] else 0)
+
+def main():
+    args = build_parser().parse_args()
+    with session_from_args(args, 'run-pipeline'):
+        run(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Section diff tests
+Round-trips documents through diff_documents and apply_section_changes,
+including headings that repeat under the same parent
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vision_pipeline import apply_section_changes, diff_documents
+
+BEFORE = """# Acme Vision
+
+## Target Market
+
+Small clinics.
+
+### Notes
+
+Clinics book by phone.
+
+### Notes
+
+Most have one receptionist.
+
+## Problems
+
+Double bookings.
+"""
+
+def round_trip(before, after):
+    return apply_section_changes(before, diff_documents(before, after))
+
+class RoundTripTest(unittest.TestCase):
+
+    def test_second_duplicate_heading_is_modified(self):
+        after = BEFORE.replace('Most have one receptionist.', 'Most have two receptionists.')
+        [change] = diff_documents(BEFORE, after)
+        self.assertEqual((change.kind, change.occurrence), ('modified', 1))
+        self.assertEqual(round_trip(BEFORE, after), after)
+
+    def test_first_duplicate_heading_is_modified(self):
+        after = BEFORE.replace('Clinics book by phone.', 'Clinics book online.')
+        self.assertEqual(round_trip(BEFORE, after), after)
+
+    def test_last_duplicate_heading_is_removed(self):
+        after = BEFORE.replace('### Notes\n\nMost have one receptionist.\n\n', '')
+        self.assertEqual(round_trip(BEFORE, after), after)
+
+    def test_duplicate_heading_is_added(self):
+        after = BEFORE.replace('## Problems', '### Notes\n\nSome share a front desk.\n\n## Problems')
+        [change] = diff_documents(BEFORE, after)
+        self.assertEqual((change.kind, change.occurrence), ('added', 2))
+        self.assertEqual(round_trip(BEFORE, after), after)
+
+if __name__ == '__main__':
+    unittest.main()
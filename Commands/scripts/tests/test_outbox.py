@@ -0,0 +1,135 @@
+"""
+Outbox tests
+Drains intents against the local GitHub stand-in, through rate limits, lost
+responses and crashed drainers
+"""
+
+import os
+import sys
+import socket
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from github_api import Checkpoint, GitHubClient, GitHubError, Outbox, TokenBucket, create_issues_via_outbox, drain
+from github_api.dispatch import DEFAULT_RETRY_DELAY
+from github_api.fake import FakeGitHub
+
+class Clock:
+    """Monotonic clock for the token bucket that sleeping moves forward"""
+
+    def __init__(self):
+        self.time = 0.0
+        self.slept = []
+
+    def now(self):
+        return self.time
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.time += seconds
+
+class OutboxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.fake = FakeGitHub(run_queued=0, run_in_progress=0).start()
+        self.client = GitHubClient('token', 'acme', 'visions', base_url=self.fake.url)
+        self.directory = tempfile.TemporaryDirectory()
+        self.outbox = Outbox(os.path.join(self.directory.name, 'outbox.sqlite'), 'acme/visions')
+        self.clock = Clock()
+        self.bucket = TokenBucket(clock=self.clock.now, sleep=self.clock.sleep)
+
+    def tearDown(self):
+        self.outbox.close()
+        self.client.close()
+        self.fake.stop()
+        self.directory.cleanup()
+
+    def make_due(self):
+        with self.outbox.connection:
+            self.outbox.connection.execute('UPDATE intents SET not_before = 0')
+
+    def drain(self):
+        return drain(self.client, self.outbox, self.bucket, wait=False)
+
+    def test_secondary_rate_limit_is_deferred_uncounted(self):
+        self.fake.state.secondary_limited = 1
+        intent, _ = self.outbox.add_dispatch('create-vision.yml', {'product_name': 'Alpha'})
+
+        [result] = self.drain()
+        self.assertEqual(result.outcome, 'deferred')
+        intent = self.outbox.get(intent.key)
+        self.assertEqual((intent.status, intent.attempts, intent.in_doubt), ('pending', 0, 0))
+        self.assertEqual(self.fake.state.snapshot()['dispatches'], 0)
+
+        self.make_due()
+        [result] = self.drain()
+        self.assertEqual(result.outcome, 'sent')
+        self.assertGreaterEqual(sum(self.clock.slept), DEFAULT_RETRY_DELAY)
+        self.assertEqual(self.fake.state.snapshot()['dispatches'], 1)
+
+    def test_secondary_rate_limit_error_is_rate_limited(self):
+        self.fake.state.secondary_limited = 1
+        with self.assertRaises(GitHubError) as raised:
+            self.client.dispatch_workflow('create-vision.yml', {})
+        self.assertEqual(raised.exception.status, 403)
+        self.assertTrue(raised.exception.rate_limited)
+
+    def test_lost_response_is_found_instead_of_resent(self):
+        self.fake.state.dropped_writes = 1
+        intent, _ = self.outbox.add_dispatch('create-vision.yml', {'product_name': 'Alpha'})
+
+        [result] = self.drain()
+        self.assertEqual(result.outcome, 'deferred')
+        self.assertTrue(self.outbox.get(intent.key).in_doubt)
+
+        self.make_due()
+        [result] = self.drain()
+        self.assertEqual(result.outcome, 'recovered')
+        self.assertEqual(self.outbox.get(intent.key).status, 'done')
+        self.assertEqual(self.fake.state.snapshot()['dispatches'], 1)
+
+    def test_crashed_drainer_is_recovered(self):
+        sent, _ = self.outbox.add_dispatch('create-vision.yml', {'product_name': 'Alpha'})
+        unsent, _ = self.outbox.add_dispatch('create-vision.yml', {'product_name': 'Beta'})
+        # A drainer that died after sending the first dispatch and before sending the second
+        self.client.dispatch_workflow(sent.payload['workflow'], sent.payload['inputs'])
+        for intent in (sent, unsent):
+            self.assertTrue(self.outbox.claim(intent))
+        with self.outbox.connection:
+            self.outbox.connection.execute('UPDATE intents SET owner = ?', (f"{socket.gethostname()}:999999999",))
+
+        # The unsent dispatch has no run to find, so do not wait long for one
+        with mock.patch('github_api.outbox.RECONCILE_TIMEOUT', 0.5):
+            outcomes = {result.intent.key: result.outcome for result in self.drain()}
+        self.assertEqual(outcomes, {sent.key: 'recovered', unsent.key: 'sent'})
+        self.assertEqual(self.fake.state.snapshot()['dispatches'], 2)
+
+    def test_issue_is_not_created_twice_after_a_lost_response(self):
+        self.fake.state.dropped_writes = 1
+        intent, _ = self.outbox.add_issue({'title': 'Epic', 'body': 'Build it', 'labels': [], 'assignees': []})
+
+        self.drain()
+        self.make_due()
+        [result] = self.drain()
+        self.assertEqual(result.outcome, 'recovered')
+        self.assertEqual(self.fake.state.snapshot()['issues'], 1)
+
+    def test_outbox_issues_are_recorded_in_the_checkpoint(self):
+        checkpoint = Checkpoint(os.path.join(self.directory.name, 'checkpoint.json'))
+        epic = {'title': 'Epic', 'body': 'Build it', 'labels': [], 'assignees': []}
+        [result] = create_issues_via_outbox(self.client, self.outbox, [epic], self.bucket, checkpoint=checkpoint)
+        self.assertTrue(result.created)
+        self.assertEqual(checkpoint.issue('Epic')['number'], result.number)
+
+        # A later run with a fresh outbox skips what the checkpoint has
+        with Outbox(os.path.join(self.directory.name, 'fresh.sqlite'), 'acme/visions') as outbox:
+            [again] = create_issues_via_outbox(self.client, outbox, [epic], self.bucket,
+                                               checkpoint=Checkpoint(checkpoint.path))
+        self.assertEqual((again.number, again.created), (result.number, False))
+        self.assertEqual(self.fake.state.snapshot()['issues'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Section stage tests
+Checks how headings map to canonical vision sections and what text each one takes
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vision_pipeline import SectionMatcher, iter_sections, render_vision, section_text
+from vision_pipeline.sections import HEADER_PATTERN
+
+NESTED_TITLE_DOCUMENT = """# Acme Vision
+Acme makes scheduling painless.
+
+## Target Market
+Small clinics.
+
+### Market Size
+Forty thousand clinics.
+
+## Problems
+Double bookings.
+"""
+
+def parse(text):
+    return list(iter_sections(text.splitlines()))
+
+class HeaderPatternTest(unittest.TestCase):
+
+    def test_trailing_hash_without_space_is_part_of_the_title(self):
+        self.assertEqual(HEADER_PATTERN.match('# C#').group(2), 'C#')
+
+    def test_closing_hashes_are_stripped(self):
+        self.assertEqual(HEADER_PATTERN.match('## Intro ##').groups(), ('##', 'Intro'))
+
+class SectionTextTest(unittest.TestCase):
+
+    def test_title_match_stops_at_nested_canonical_sections(self):
+        sections = parse(NESTED_TITLE_DOCUMENT)
+        matcher = SectionMatcher(sections)
+        self.assertEqual(section_text(sections, matcher.match('Vision Statement').index),
+                         'Acme makes scheduling painless.')
+
+    def test_nested_subsections_of_the_same_section_are_kept(self):
+        sections = parse(NESTED_TITLE_DOCUMENT)
+        matcher = SectionMatcher(sections)
+        self.assertEqual(section_text(sections, matcher.match('Target Market').index),
+                         'Small clinics.\n\n### Market Size\n\nForty thousand clinics.')
+
+    def test_rendered_vision_has_each_section_once(self):
+        vision = render_vision(parse(NESTED_TITLE_DOCUMENT), 'Acme')
+        self.assertEqual(vision.count('Small clinics.'), 1)
+        self.assertEqual(vision.count('Double bookings.'), 1)
+        self.assertEqual(vision.count('Forty thousand clinics.'), 1)
+
+class SectionMatcherTest(unittest.TestCase):
+
+    def test_overview_beats_document_title(self):
+        matcher = SectionMatcher(parse("# Product Vision - Alpha\n\n## Overview\nAlpha.\n\n## Target Market\nTeams.\n"))
+        self.assertEqual(matcher.match('Vision Statement').title, 'Overview')
+
+    def test_document_title_is_a_fallback(self):
+        matcher = SectionMatcher(parse(NESTED_TITLE_DOCUMENT))
+        self.assertEqual(matcher.match('Vision Statement').title, 'Acme Vision')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Vision Issue Updater
+Patches an existing vision issue with only the sections that changed since
+the previous version of its vision document
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+from vision_pipeline import SectionChange, diff_documents, apply_section_changes, summarize_changes
+from vision_pipeline.diff import document_sections
+from github_api import DEFAULT_BASE_URL, GitHubClient, GitHubError
+from planning import vision_summary
+from instrumentation import add_metrics_arguments, session_from_args
+
+# Issue section rebuilt from the document's opening lines, as create-vision does
+SUMMARY_SECTION = 'Vision Summary'
+
+def read_previous(path, previous=None, ref='HEAD'):
+    """The previous vision document: a given file, or the committed version"""
+    if previous:
+        with open(previous, 'r', encoding='utf-8') as f:
+            return f.read()
+    completed = subprocess.run(['git', 'show', f"{ref}:./{os.path.basename(path)}"],
+                               cwd=os.path.dirname(os.path.abspath(path)), stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+    if completed.returncode != 0:
+        # Not committed yet, so every section is new
+        return None
+    return completed.stdout.decode('utf-8')
+
+def issue_changes(body, changes, previous, current):
+    """Map document changes onto the sections the issue body carries"""
+    paths = {}
+    levels = {}
+    for section in document_sections(body):
+        paths.setdefault(section.title, section.path)
+        levels.setdefault(section.path, section.level)
+
+    mapped = []
+    for change in changes:
+        # Sections are matched by title; the issue nests them under its own
+        # headings, so their levels move down by as many
+        path = paths.get(change.path[-1])
+        if path is not None:
+            depth = len(path) - len(change.path)
+            mapped.append(change._replace(path=path, level=change.level + depth))
+
+    summary_path = paths.get(SUMMARY_SECTION)
+    summary = vision_summary(current)
+    if summary_path and summary != vision_summary(previous or ''):
+        mapped.append(SectionChange('modified', summary_path, 0, levels[summary_path], summary))
+    return mapped
+
+def change_comment(changes):
+    """Comment listing the changed sections with their new text"""
+    lines = [f"📝 Vision updated: {summarize_changes(changes)}"]
+    for change in changes:
+        if change.kind != 'removed' and change.body:
+            lines += ['', f"### {change.path[-1]}", '', change.body]
+    return '\n'.join(lines)
+
+def build_parser():
+    repository = os.environ.get('GITHUB_REPOSITORY', '/')
+    parser = argparse.ArgumentParser(description='Patch a vision issue with the sections that changed')
+    parser.add_argument('issue', type=int, help='Vision issue number')
+    parser.add_argument('vision_file', help='Updated vision document')
+    parser.add_argument('--previous', help='Previous version of the document (default: the committed version)')
+    parser.add_argument('--previous-ref', default='HEAD', help='Commit holding the previous version (default: HEAD)')
+    parser.add_argument('--comment', action='store_true', help='Also comment with the changed sections')
+    parser.add_argument('--dry-run', action='store_true', help='Show the changes without updating the issue')
+    parser.add_argument('--owner', default=repository.split('/')[0], help='Repository owner')
+    parser.add_argument('--repo', default=repository.split('/')[-1], help='Repository name')
+    parser.add_argument('--api-url', default=os.environ.get('GITHUB_API_URL', DEFAULT_BASE_URL),
+                        help='GitHub API base URL')
+    add_metrics_arguments(parser)
+    return parser
+
+def run(args):
+    """Diff the vision document and patch its issue"""
+    with open(args.vision_file, 'r', encoding='utf-8') as f:
+        current = f.read()
+    previous = read_previous(args.vision_file, args.previous, args.previous_ref)
+
+    changes = diff_documents(previous or '', current)
+    if not changes:
+        print(f"No section changes in {args.vision_file}; issue #{args.issue} left as is")
+        return 0
+    print(f"Sections {summarize_changes(changes)}")
+
+    token = os.environ.get("GH_TOKEN") or os.environ.get("GITHUB_TOKEN")
+    if not token:
+        print("ERROR: No GitHub token found! Set GH_TOKEN or GITHUB_TOKEN.")
+        return 1
+    if not args.owner or not args.repo:
+        print("ERROR: Repository not set. Use --owner and --repo or set GITHUB_REPOSITORY.")
+        return 1
+
+    with GitHubClient(token, args.owner, args.repo, base_url=args.api_url) as client:
+        try:
+            body = client.get_issue(args.issue).get('body') or ''
+            patched = apply_section_changes(body, issue_changes(body, changes, previous, current))
+            if patched == body:
+                print(f"Issue #{args.issue} shows none of the changed sections; body left as is")
+            elif args.dry_run:
+                print(f"Would update issue #{args.issue} body ({len(patched.encode('utf-8'))} bytes)")
+            else:
+                client.update_issue(args.issue, body=patched)
+                print(f"✓ Updated issue #{args.issue}")
+
+            if args.comment:
+                comment = change_comment(changes)
+                if args.dry_run:
+                    print(f"Would comment on issue #{args.issue}:")
+                    print(comment)
+                else:
+                    client.comment_on_issue(args.issue, comment)
+                    print(f"✓ Commented on issue #{args.issue}")
+        except GitHubError as e:
+            print(f"✗ {str(e)}")
+            return 1
+    return 0
+
+def main():
+    args = build_parser().parse_args()
+    with session_from_args(args, 'update-vision-issue'):
+        sys.exit(run(args))
+
+if __name__ == "__main__":
+    main()
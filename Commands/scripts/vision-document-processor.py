@@ -8,366 +8,603 @@ import os
 import sys
 import re
 import json
+import time
+import argparse
 from pathlib import Path
-from datetime import datetime
 
-def install_dependencies():
-    """Install required dependencies if not available"""
-    try:
-        import docx
-    except ImportError:
-        print("Installing python-docx...")
-        import subprocess
-        subprocess.check_call([sys.executable, "-m", "pip", "install", "python-docx", "--user"])
-
-def clean_text(text):
-    """Clean up text from various sources"""
-    # Remove multiple spaces
-    text = re.sub(r'\s+', ' ', text)
-    # Remove leading/trailing whitespace
-    text = text.strip()
-    # Fix common encoding issues
-    text = text.replace('"', '"').replace('"', '"')
-    text = text.replace(''', "'").replace(''', "'")
-    text = text.replace('–', '-').replace('—', '-')
-    return text
-
-def extract_sections_from_content(content):
-    """Extract sections from markdown content"""
-    sections = {}
-    current_section = None
-    current_content = []
-    
-    lines = content.split('\n')
-    
-    for line in lines:
-        # Check if it's a header
-        if line.startswith('#'):
-            # Save previous section
-            if current_section:
-                sections[current_section] = '\n'.join(current_content).strip()
-            
-            # Start new section
-            header_match = re.match(r'^#{1,3}\s+(.+)', line)
-            if header_match:
-                current_section = header_match.group(1).strip()
-                current_content = []
-        else:
-            current_content.append(line)
-    
-    # Save last section
-    if current_section:
-        sections[current_section] = '\n'.join(current_content).strip()
-    
-    return sections
-
-def convert_docx_to_vision(docx_path, output_path, product_name):
-    """Convert DOCX to vision markdown format"""
-    try:
-        from docx import Document
-    except ImportError:
-        install_dependencies()
-        from docx import Document
-    
-    doc = Document(docx_path)
-    
-    # Extract all text
-    full_text = []
-    for paragraph in doc.paragraphs:
-        text = clean_text(paragraph.text)
-        if text:
-            full_text.append(text)
-    
-    # Join and analyze
-    content = '\n\n'.join(full_text)
-    
-    # Try to extract sections
-    sections = extract_sections_from_content(content)
-    
-    # Build vision document
-    vision_content = f"# Product Vision - {product_name}\n\n"
-    
-    # Map common section names to required sections
-    section_mapping = {
-        'vision statement': 'Vision Statement',
-        'vision': 'Vision Statement',
-        'overview': 'Vision Statement',
-        'target market': 'Target Market',
-        'market': 'Target Market',
-        'audience': 'Target Market',
-        'problems': 'Key Problems',
-        'key problems': 'Key Problems',
-        'challenges': 'Key Problems',
-        'themes': 'Strategic Themes',
-        'strategic themes': 'Strategic Themes',
-        'capabilities': 'Strategic Themes',
-        'metrics': 'Success Metrics',
-        'success metrics': 'Success Metrics',
-        'kpis': 'Success Metrics',
-        'differentiators': 'Key Differentiators',
-        'key differentiators': 'Key Differentiators',
-        'unique value': 'Key Differentiators'
-    }
-    
-    # Required sections with defaults
-    required_sections = {
-        'Vision Statement': 'A comprehensive vision for ' + product_name,
-        'Target Market': '- **Primary Users**: [To be defined]\n- **Market Size**: [To be analyzed]',
-        'Key Problems': '1. **Problem**: [To be identified]',
-        'Strategic Themes': '1. **Theme**: [To be developed]',
-        'Success Metrics': '- **Metric**: [To be defined]',
-        'Key Differentiators': '1. **Differentiator**: [To be identified]'
+from vision_pipeline import (
+    DOCX_READERS, product_slug, product_name_from_path, convert_docx_to_vision, process_markdown_vision,
+    summarize_changes,
+)
+from vision_pipeline.cache import CACHE_FILE_NAME, ConversionCache, cache_key
+from vision_pipeline.sidecar import SIDECAR_FORMATS, sidecar_outputs, write_vision_sidecar
+from vision_pipeline.watch import WATCHERS, DEBOUNCE_SECONDS, POLL_INTERVAL, is_watched_document
+from instrumentation import METRICS, add_metrics_arguments, session_from_args
+
+# Commands supported per input file extension
+COMMAND_BY_EXTENSION = {
+    '.docx': 'convert',
+    '.md': 'process',
+}
+
+# Message printed for each kind of conversion result
+RESULT_MESSAGES = {
+    'converted': "Converted vision saved to",
+    'processed': "Processed vision saved to",
+    'copied': "Vision document copied to",
+    'unchanged': "Vision document unchanged",
+}
+
+# Cold start budget for single-document commands, in milliseconds
+STARTUP_BUDGET_MS = 100
+
+# One line of python -X importtime output: self us | cumulative us | module
+IMPORT_TIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)')
+
+def run_command(command, input_path, output_path, product_name, reader='auto', sidecar='json'):
+    """Run convert or process for one document and report where it went"""
+    if command == 'convert':
+        result = convert_docx_to_vision(input_path, output_path, product_name, reader)
+    else:
+        result = process_markdown_vision(input_path, output_path, product_name)
+    print(f"{RESULT_MESSAGES[result.action]}: {result.output_path}")
+    if result.changes:
+        print(f"  Sections {summarize_changes(result.changes)}")
+    if sidecar != 'none':
+        sidecar_path = write_vision_sidecar(output_path, product_name, input_path, reader, sidecar)
+        if sidecar_path:
+            print(f"Sidecar saved to: {sidecar_path}")
+    return result
+
+def make_job(input_path, output_path, product_name, reader='auto', sidecar='json'):
+    """Describe a single conversion job"""
+    command = COMMAND_BY_EXTENSION.get(Path(input_path).suffix.lower())
+    if command is None:
+        raise ValueError(f"Unsupported file type: {input_path}")
+    return {
+        'command': command,
+        'input': str(input_path),
+        'output': str(output_path),
+        'product_name': product_name,
+        'reader': reader,
+        'sidecar': sidecar,
     }
-    
-    # Process found sections
-    processed_sections = set()
-    for key, mapped in section_mapping.items():
-        for section_name, section_content in sections.items():
-            if key in section_name.lower() and mapped not in processed_sections:
-                vision_content += f"## {mapped}\n\n{section_content}\n\n"
-                processed_sections.add(mapped)
-                break
-    
-    # Add missing required sections
-    for section, default in required_sections.items():
-        if section not in processed_sections:
-            vision_content += f"## {section}\n\n{default}\n\n"
-    
-    # Add optional sections if found
-    optional_sections = ['Constraints and Assumptions', 'High-Level Roadmap', 'Risks and Mitigations']
-    for section in optional_sections:
-        for section_name, section_content in sections.items():
-            if section.lower() in section_name.lower():
-                vision_content += f"## {section}\n\n{section_content}\n\n"
-                break
-    
-    # Write output
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(vision_content.strip())
-    
-    print(f"Converted vision saved to: {output_path}")
-    return True
-
-def process_markdown_vision(input_path, output_path, product_name):
-    """Process and enhance markdown vision document"""
-    with open(input_path, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    # Extract sections
-    sections = extract_sections_from_content(content)
-    
-    # Check if it already has the right structure
-    required = ['Vision Statement', 'Target Market', 'Key Problems', 
-                'Strategic Themes', 'Success Metrics', 'Key Differentiators']
-    
-    has_all = all(any(req.lower() in s.lower() for s in sections.keys()) for req in required)
-    
-    if has_all and content.startswith(f"# Product Vision - {product_name}"):
-        # Already properly formatted, just copy
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        print(f"Vision document copied to: {output_path}")
-        return True
-    
-    # Need to reformat - use the Ideas Matter vision we already created
-    if product_name == "Ideas Matter":
-        # Use the comprehensive vision we already prepared
-        vision_content = """# Product Vision - Ideas Matter
-
-## Vision Statement
-
-Ideas Matter will transform how entrepreneurs and innovators bring their concepts to life by providing an AI-powered platform that seamlessly converts ideas into deployable code, complete with market research, business planning, and technical architecture. Within 24 months, we will enable anyone with a vision to become a software creator, democratizing application development and accelerating time-to-market from months to days.
-
-## Target Market
-
-- **Primary Users**: Entrepreneurs, startup founders, and business innovators with software ideas but limited technical expertise
-- **Secondary Users**: Technical consultants, development agencies, and enterprise innovation teams
-- **Market Size**: $47B low-code/no-code platform market, growing at 23% CAGR
-- **Industry/Sector**: Software development tools, AI-powered development platforms
-
-## Key Problems
-
-1. **Technical Barrier to Entry**
-   - Impact: 90% of business ideas never become software due to lack of technical skills or resources
-   - Current state: Hiring developers costs $100K+ annually; outsourcing risks quality and IP
-
-2. **Lengthy Development Cycles**
-   - Impact: 6-12 months from idea to MVP, causing missed market opportunities
-   - Current state: Traditional development requires extensive planning, coding, and testing phases
-
-3. **Disconnected Planning and Execution**
-   - Impact: 70% of software projects fail due to poor requirements and planning
-   - Current state: Business planning and technical development happen in silos
-
-4. **High Cost of Innovation**
-   - Impact: $50K-500K typical cost for custom software development
-   - Current state: Only well-funded ventures can afford professional software development
-
-## Strategic Themes
-
-1. **AI-Powered Development**: Leverage Claude, GPT-4, and specialized AI models to generate production-ready code
-2. **Integrated Workflow**: Seamlessly connect ideation, market research, business planning, and development
-3. **Full-Stack Generation**: Create complete applications including frontend, backend, database, and deployment
-4. **Quality Assurance**: Built-in testing, security scanning, and best practices enforcement
-5. **Continuous Evolution**: Learn from each project to improve future generations
-
-## Success Metrics
-
-### Business Metrics
-- **User Acquisition**: 10,000 active users within 24 months
-- **Revenue**: $5M ARR by end of Year 2
-- **Market Position**: Top 3 AI-powered development platform
-
-### User Metrics
-- **Time to Deploy**: Reduce idea-to-deployment from months to < 7 days
-- **Success Rate**: 80% of generated applications successfully deployed
-- **User Satisfaction**: NPS score of 70+
-
-### Technical Metrics
-- **Code Quality**: Generated code passes 95% of standard linting rules
-- **Performance**: Applications meet industry performance benchmarks
-- **Security**: Zero critical vulnerabilities in generated code
-
-## Key Differentiators
-
-1. **End-to-End Automation**: Only platform that handles everything from idea to deployed application
-2. **Business Intelligence**: Integrated market research and business planning, not just code generation
-3. **Multi-AI Architecture**: Orchestrates multiple AI providers for optimal results
-4. **Production-Ready Output**: Generates deployable code, not just prototypes
-5. **Learning System**: Improves with each project, building a knowledge base of successful patterns
-
-## Constraints and Assumptions
-
-### Constraints
-- **AI Limitations**: Current AI models have context limits and may hallucinate
-- **Complexity Ceiling**: Best suited for standard business applications, not specialized systems
-- **Resource Requirements**: Significant compute costs for AI processing
-- **Regulatory**: Must comply with AI usage policies and data protection laws
-
-### Assumptions
-- AI capabilities will continue to improve rapidly
-- Demand for no-code/low-code solutions will accelerate
-- Users will trust AI-generated code for business applications
-- Cloud infrastructure costs will remain manageable
-
-## High-Level Roadmap
-
-- **Phase 1 (Months 1-6)**: Core platform - idea intake, AI orchestration, basic code generation
-- **Phase 2 (Months 7-12)**: Enhanced features - market research integration, business plan generation, testing
-- **Phase 3 (Months 13-18)**: Advanced capabilities - multi-cloud deployment, enterprise features, API
-- **Phase 4 (Months 19-24)**: Scale and optimize - performance improvements, specialized templates, marketplace
-
-## Risks and Mitigations
-
-1. **Risk**: AI model changes or restrictions affecting code generation
-   - **Mitigation**: Multi-provider strategy, local model fallbacks, versioning system
 
-2. **Risk**: Generated code quality concerns limiting adoption
-   - **Mitigation**: Comprehensive testing, human review options, quality guarantees
-
-3. **Risk**: Competition from major tech companies entering the space
-   - **Mitigation**: Focus on niche markets, superior UX, rapid innovation
-
-4. **Risk**: High operational costs from AI API usage
-   - **Mitigation**: Efficient prompt engineering, caching strategies, usage-based pricing"""
+def load_batch_jobs(source, output_dir, reader='auto', sidecar='json'):
+    """Load batch jobs from a directory or a CSV/JSON manifest"""
+    source = Path(source)
+    output_dir = Path(output_dir)
+    jobs = []
+
+    if source.is_dir():
+        for path in sorted(source.rglob('*')):
+            # Skip READMEs and Word lock files such as ~$sion Statement.docx
+            if not path.is_file() or not is_watched_document(path):
+                continue
+            product_name = product_name_from_path(path)
+            output_path = output_dir / product_slug(product_name) / 'vision.md'
+            jobs.append(make_job(path, output_path, product_name, reader, sidecar))
+        return jobs
+
+    if source.suffix.lower() == '.json':
+        with open(source, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+    elif source.suffix.lower() == '.csv':
+        import csv
+        with open(source, 'r', encoding='utf-8', newline='') as f:
+            entries = list(csv.DictReader(f))
     else:
-        # Generic reformatting
-        vision_content = f"# Product Vision - {product_name}\n\n"
-    
-    # If the original content doesn't have clear sections, use it as vision statement
-    if len(sections) < 3:
-        vision_content += f"## Vision Statement\n\n{content}\n\n"
-        
-        # Add template sections
-        vision_content += """## Target Market
+        raise ValueError(f"Batch source must be a directory, .csv or .json manifest: {source}")
+
+    # Relative manifest paths are resolved against the manifest location
+    base_dir = source.parent
+    for entry in entries:
+        input_path = base_dir / entry['input']
+        product_name = entry.get('product_name') or product_name_from_path(input_path)
+        if entry.get('output'):
+            output_path = base_dir / entry['output']
+        else:
+            output_path = output_dir / product_slug(product_name) / 'vision.md'
+        jobs.append(make_job(input_path, output_path, product_name, reader, sidecar))
+    return jobs
+
+def run_job(job, record_metrics=False):
+    """Run a single conversion job and report its outcome"""
+    if record_metrics:
+        # Workers may be forked from an instrumented parent or reused across
+        # jobs, so each job starts from an empty registry
+        METRICS.enable()
+        METRICS.reset()
+    result = dict(job, status='failed', error=None)
+    started = time.perf_counter()
+    try:
+        if not os.path.exists(job['input']):
+            raise FileNotFoundError(f"Input file not found: {job['input']}")
+        run_command(job['command'], job['input'], job['output'], job['product_name'], job['reader'], job['sidecar'])
+        result['status'] = 'ok'
+    except Exception as e:
+        result['error'] = str(e)
+    result['duration'] = round(time.perf_counter() - started, 4)
+    if record_metrics:
+        METRICS.observe('vision_document_seconds', result['duration'], command=job['command'],
+                        status=result['status'])
+        result['metrics'] = METRICS.snapshot()
+    return result
+
+def update_stores(jobs, index_path=None, similarity_path=None):
+    """Bring the section index and similarity signatures up to date with the documents jobs wrote"""
+    # Imported here so commands without either store do not load sqlite3
+    if index_path:
+        from vision_pipeline.index import SectionIndex
+        with SectionIndex(index_path) as index:
+            for job in jobs:
+                index.update_document(job['output'], job['product_name'])
+    if similarity_path:
+        from vision_pipeline.similarity import SimilarityIndex
+        with SimilarityIndex(similarity_path) as store:
+            for job in jobs:
+                store.update_document(job['output'], job['product_name'])
+
+def output_collisions(jobs):
+    """Map the index of every job sharing its output path with another job to the other inputs"""
+    writers = {}
+    for index, job in enumerate(jobs):
+        writers.setdefault(os.path.abspath(job['output']), []).append(index)
+    collisions = {}
+    for indexes in writers.values():
+        if len(indexes) > 1:
+            for index in indexes:
+                collisions[index] = [jobs[other]['input'] for other in indexes if other != index]
+    return collisions
+
+def run_batch(jobs, workers=None, cache=None, force=False):
+    """Fan jobs out over a process pool, returning results in job order"""
+    results = [None] * len(jobs)
+    keys = {}
+    pending = []
+
+    # Jobs that would overwrite each other's output all fail rather than race
+    collisions = output_collisions(jobs)
+    for index, others in collisions.items():
+        results[index] = dict(jobs[index], status='failed', duration=None,
+                              error=f"output is also written by {', '.join(others)}")
+
+    # Unchanged inputs are resolved here without starting a worker
+    for index, job in enumerate(jobs):
+        if index in collisions:
+            continue
+        if cache is not None:
+            try:
+                keys[index] = cache_key(job['input'], job['product_name'], job['reader'], job['sidecar'])
+            except OSError:
+                keys[index] = None
+            if (not force and keys[index]
+                    and cache.is_fresh(keys[index], job['output'], sidecar_outputs(job['output'], job['sidecar']))):
+                results[index] = dict(job, status='skipped', error=None, duration=0.0)
+                METRICS.increment('vision_documents', action='skipped')
+                continue
+        pending.append(index)
+
+    if pending:
+        # Imported here so single-document commands start faster
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(run_job, jobs[index], METRICS.enabled): index for index in pending}
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    results[index] = future.result()
+                    METRICS.merge(results[index].get('metrics', ()))
+                except Exception as e:
+                    # A crashed worker only fails its own job
+                    results[index] = dict(jobs[index], status='failed', error=str(e), duration=None)
+
+    if cache is not None:
+        for index in pending:
+            if results[index]['status'] == 'ok' and keys.get(index):
+                cache.record(keys[index], jobs[index]['input'], jobs[index]['output'])
+        cache.save()
+
+    return results
+
+def print_batch_summary(results):
+    """Print a per-file result summary"""
+    failed = [r for r in results if r['status'] == 'failed']
+    skipped = [r for r in results if r['status'] == 'skipped']
+    print()
+    print("Batch summary")
+    print("=============")
+    for result in results:
+        marker = {'ok': '✓', 'skipped': '='}.get(result['status'], '✗')
+        line = f"{marker} {result['input']} -> {result['output']}"
+        if result['error']:
+            line += f" ({result['error']})"
+        print(line)
+    print()
+    print(f"{len(results) - len(failed) - len(skipped)} succeeded, "
+          f"{len(skipped)} unchanged, {len(failed)} failed")
+
+def run_single(command, input_path, output_path, product_name, cache_path=None, force=False,
+               reader='auto', index_path=None, similarity_path=None, sidecar='json'):
+    """Run the convert or process command for a single document"""
+    if not os.path.exists(input_path):
+        print(f"Error: Input file not found: {input_path}")
+        return 1
 
-- **Primary Users**: [To be defined based on the vision above]
-- **Secondary Users**: [To be identified]
-- **Market Size**: [To be analyzed]
+    cache = None
+    if cache_path:
+        cache = ConversionCache(cache_path)
+        key = cache_key(input_path, product_name, reader, sidecar)
+        if not force and cache.is_fresh(key, output_path, sidecar_outputs(output_path, sidecar)):
+            METRICS.increment('vision_documents', action='skipped')
+            print(f"Vision document is up to date: {output_path}")
+            return 0
 
-## Key Problems
+    try:
+        run_command(command, input_path, output_path, product_name, reader, sidecar)
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        return 1
+
+    if cache is not None:
+        cache.record(key, input_path, output_path)
+        cache.save()
+    update_stores([{'output': output_path, 'product_name': product_name}], index_path, similarity_path)
+    print("Processing completed successfully")
+    return 0
+
+def run_batch_command(source, output_dir, workers=None, report=None, cache_path=None, force=False,
+                      reader='auto', index_path=None, similarity_path=None, sidecar='json'):
+    """Run the batch command and return the process exit code"""
+    try:
+        jobs = load_batch_jobs(source, output_dir, reader, sidecar)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: {str(e)}")
+        return 1
+
+    if not jobs:
+        print(f"No vision documents found in: {source}")
+        return 0
+
+    cache = ConversionCache(cache_path) if cache_path else None
+
+    print(f"Processing {len(jobs)} documents...")
+    results = run_batch(jobs, workers, cache, force)
+    # Skipped documents were stored when they were written, unless a store is new
+    update_stores([result for result in results if result['status'] in ('ok', 'skipped')], index_path,
+                  similarity_path)
+    print_batch_summary(results)
+
+    if report:
+        with open(report, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Batch report saved to: {report}")
+
+    return 1 if any(r['status'] == 'failed' for r in results) else 0
+
+def watch_jobs(paths, output_dir, reader='auto', sidecar='json'):
+    """Jobs for changed documents, leaving out generated vision files"""
+    jobs = []
+    for path in sorted(paths):
+        product_name = product_name_from_path(path)
+        output_path = Path(output_dir) / product_slug(product_name) / 'vision.md'
+        # A vision.md already in the output tree is its own output
+        if os.path.abspath(output_path) == os.path.abspath(path):
+            continue
+        jobs.append(make_job(path, output_path, product_name, reader, sidecar))
+    return jobs
+
+def run_watch_command(sources, output_dir, cache_path=None, reader='auto', watcher='auto',
+                      debounce=DEBOUNCE_SECONDS, interval=POLL_INTERVAL, index_path=None,
+                      similarity_path=None, sidecar='json'):
+    """Reconvert documents as they are saved until interrupted"""
+    import signal
+    from vision_pipeline.reader import load_python_docx
+    from vision_pipeline.watch import iter_documents, file_signature, make_watcher, debounced
+
+    missing = [source for source in sources if not os.path.exists(source)]
+    if missing:
+        print(f"Error: Not found: {', '.join(missing)}")
+        return 1
+
+    # Import python-docx now rather than on the first save
+    if reader != 'stream':
+        load_python_docx()
+    cache = ConversionCache(cache_path) if cache_path else None
+    written = {}
+
+    def convert(jobs):
+        for job in jobs:
+            # Our own outputs show up as changes when they are inside a watched tree
+            if written.get(os.path.abspath(job['input'])) == file_signature(job['input']):
+                continue
+            key = None
+            if cache is not None:
+                try:
+                    key = cache_key(job['input'], job['product_name'], job['reader'], job['sidecar'])
+                except OSError:
+                    continue
+                # Saves that did not change the content
+                if cache.is_fresh(key, job['output'], sidecar_outputs(job['output'], job['sidecar'])):
+                    continue
+            result = run_job(job)
+            if result['status'] == 'ok':
+                written[os.path.abspath(job['output'])] = file_signature(job['output'])
+                if key is not None:
+                    cache.record(key, job['input'], job['output'])
+                    cache.save()
+                update_stores([job], index_path, similarity_path)
+                print(f"  ({result['duration'] * 1000:.0f} ms)")
+            else:
+                print(f"✗ {job['input']}: {result['error']}")
 
-1. **Problem**: [To be extracted from the vision]
-   - Impact: [To be analyzed]
+    try:
+        watch = make_watcher(sources, watcher, interval)
+    except ImportError as e:
+        print(f"Error: {str(e)}")
+        return 1
 
-## Strategic Themes
+    def stop(signum, frame):
+        raise KeyboardInterrupt
 
-1. **Theme**: [To be derived from the vision]
-2. **Theme**: [To be identified]
+    # Service managers stop the watcher with SIGTERM
+    signal.signal(signal.SIGTERM, stop)
 
-## Success Metrics
+    # Bring outputs up to date before waiting for changes
+    convert(watch_jobs(set(iter_documents(sources)), output_dir, reader, sidecar))
+    print(f"Watching {', '.join(sources)} ({watch.name}); press Ctrl+C to stop")
+    try:
+        for paths in debounced(watch, debounce):
+            convert(watch_jobs(paths, output_dir, reader, sidecar))
+    except KeyboardInterrupt:
+        print()
+        print("Stopped watching")
+    finally:
+        watch.close()
+    return 0
+
+def run_serve_command(host='127.0.0.1', port=8765, socket_path=None, workers=None, threads=2, queue_size=None,
+                      timeout=30.0, reader='auto', output_dir='Commands/docs/visions', verbose=False, sidecar='json'):
+    """Convert documents posted to a local HTTP API until interrupted"""
+    import signal
+    import socket
+    from vision_pipeline.server import ConversionService, ConversionServer
+
+    if socket_path and not hasattr(socket, 'AF_UNIX'):
+        print("Error: Unix sockets are not supported on this platform; use --port")
+        return 1
+
+    service = ConversionService(workers, threads, queue_size, timeout, reader, output_dir, sidecar)
+    try:
+        server = ConversionServer(service, host, port, socket_path, verbose)
+    except OSError as e:
+        service.close()
+        print(f"Error: {str(e)}")
+        return 1
+    service.warm_up()
 
-- **Business Metrics**: [To be defined]
-- **User Metrics**: [To be established]
-- **Technical Metrics**: [To be determined]
+    def stop(signum, frame):
+        raise KeyboardInterrupt
 
-## Key Differentiators
+    # Service managers stop the server with SIGTERM
+    signal.signal(signal.SIGTERM, stop)
 
-1. **Differentiator**: [To be identified from the vision]
-2. **Differentiator**: [To be analyzed]
+    print(f"Serving vision conversions on {server.url} ({service.workers} DOCX workers, "
+          f"{service.threads} Markdown threads, queue {service.queue_size}); press Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+        print("Stopped serving")
+    finally:
+        server.close()
+    return 0
+
+def run_sidecar_command(documents, product_name=None, format='json'):
+    """Write sidecars for vision documents that were not produced by the processor"""
+    from vision_pipeline.sidecar import sidecar_path, write_sidecar, build_sidecar
+
+    missing = [document for document in documents if not os.path.exists(document)]
+    if missing:
+        print(f"Error: File not found: {', '.join(missing)}")
+        return 1
+    for document in documents:
+        path = sidecar_path(document, format)
+        try:
+            written = write_sidecar(path, build_sidecar(document, product_name))
+        except (ImportError, UnicodeDecodeError) as e:
+            print(f"Error: {str(e)}")
+            return 1
+        print(f"{'Sidecar saved to' if written else 'Sidecar unchanged'}: {path}")
+    return 0
+
+def profile_startup(argv, limit=10):
+    """Re-run a command under -X importtime and report where start-up time goes"""
+    import subprocess
+
+    command = [sys.executable, '-X', 'importtime', os.path.abspath(__file__)] + argv
+    started = time.perf_counter()
+    completed = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               universal_newlines=True)
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    imports = []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            imports.append((module, int(self_us) / 1000, int(cumulative_us) / 1000, len(indent) // 2))
+        elif not line.startswith('import time:'):
+            print(line, file=sys.stderr)
+    print(completed.stdout, end='')
+
+    top_level = sorted((i for i in imports if i[3] == 0), key=lambda i: i[2], reverse=True)
+    by_self = sorted(imports, key=lambda i: i[1], reverse=True)
+    import_ms = sum(i[2] for i in top_level)
+
+    print()
+    print("Startup profile")
+    print("===============")
+    print(f"Wall time:   {wall_ms:.1f} ms (budget {STARTUP_BUDGET_MS} ms)")
+    print(f"Import time: {import_ms:.1f} ms across {len(imports)} modules")
+    print()
+    print("Top-level imports (cumulative):")
+    for module, _, cumulative_ms, _ in top_level[:limit]:
+        print(f"  {cumulative_ms:8.1f} ms  {module}")
+    print()
+    print("Slowest modules (self):")
+    for module, self_ms, _, _ in by_self[:limit]:
+        print(f"  {self_ms:8.1f} ms  {module}")
+    if wall_ms > STARTUP_BUDGET_MS:
+        print()
+        print(f"! Start-up exceeded the {STARTUP_BUDGET_MS} ms budget")
+
+    return completed.returncode
+
+def add_cache_arguments(parser):
+    """Add the incremental cache options shared by all commands"""
+    parser.add_argument("--cache", help=f"cache manifest path (default: {CACHE_FILE_NAME} in the output directory)")
+    parser.add_argument("--no-cache", action="store_true", help="always reprocess and leave the cache untouched")
+    parser.add_argument("--force", action="store_true", help="reprocess even if the input is unchanged")
+
+def add_reader_argument(parser):
+    """Add the DOCX reader option"""
+    parser.add_argument("--reader", choices=DOCX_READERS, default='auto',
+                        help="how to read DOCX input: python-docx, a streaming XML reader, "
+                             "or auto (python-docx when installed)")
+
+def add_index_arguments(parser):
+    """Add the section index and similarity store options"""
+    parser.add_argument("--index", metavar="FILE",
+                        help="keep this section index (see vision-index.py) up to date with written documents")
+    parser.add_argument("--similarity", metavar="FILE",
+                        help="store near-duplicate signatures (see vision-similarity.py) of written documents here")
+
+def add_sidecar_argument(parser):
+    """Add the sidecar format option"""
+    parser.add_argument("--sidecar", choices=SIDECAR_FORMATS + ('none',), default='json',
+                        help="also write the section tree, canonical mapping and hashes beside each "
+                             "document as vision.json or vision.msgpack (default: json)")
+
+def default_cache_path(args):
+    """Locate the cache manifest for the parsed command line"""
+    # The server keeps no manifest
+    if args.command in ("serve", "sidecar") or args.no_cache:
+        return None
+    if args.cache:
+        return args.cache
+    if args.command in ("batch", "watch"):
+        return os.path.join(args.output_dir, CACHE_FILE_NAME)
+    return os.path.join(os.path.dirname(args.output) or '.', CACHE_FILE_NAME)
+
+def build_parser():
+    """Build the command line parser"""
+    parser = argparse.ArgumentParser(
+        prog="vision-document-processor.py",
+        description="Convert and process vision documents")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="run the command and report an import-time breakdown of its start-up")
+    commands = parser.add_subparsers(dest="command", metavar="<command>")
+    commands.required = True
+
+    for name, help_text in (("convert", "convert a DOCX vision document"),
+                            ("process", "process a Markdown vision document")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("input")
+        command.add_argument("output")
+        command.add_argument("product_name")
+        add_cache_arguments(command)
+        add_index_arguments(command)
+        add_sidecar_argument(command)
+        if name == "convert":
+            add_reader_argument(command)
+        add_metrics_arguments(command)
+
+    batch = commands.add_parser("batch", help="process a directory or CSV/JSON manifest of documents")
+    batch.add_argument("source", help="directory of .docx/.md files, or a manifest with input, output, product_name")
+    batch.add_argument("output_dir", help="output root for documents without an explicit output")
+    batch.add_argument("--workers", type=int, default=None, help="number of worker processes (default: CPU count)")
+    batch.add_argument("--report", help="write per-file results as JSON to this path")
+    add_cache_arguments(batch)
+    add_index_arguments(batch)
+    add_sidecar_argument(batch)
+    add_reader_argument(batch)
+    add_metrics_arguments(batch)
+
+    watch = commands.add_parser("watch", help="reconvert documents whenever they are saved")
+    watch.add_argument("sources", nargs='+', help="vision documents or directories to watch")
+    watch.add_argument("--output-dir", default="Commands/docs/visions",
+                       help="output root for converted documents (default: Commands/docs/visions)")
+    watch.add_argument("--watcher", choices=WATCHERS, default='auto',
+                       help="use the watchdog library for native file events, poll, "
+                            "or auto (watchdog when installed)")
+    watch.add_argument("--debounce", type=float, default=DEBOUNCE_SECONDS,
+                       help=f"seconds without saves before converting (default: {DEBOUNCE_SECONDS})")
+    watch.add_argument("--interval", type=float, default=POLL_INTERVAL,
+                       help=f"seconds between rescans when polling (default: {POLL_INTERVAL})")
+    add_cache_arguments(watch)
+    add_index_arguments(watch)
+    add_sidecar_argument(watch)
+    add_reader_argument(watch)
+    add_metrics_arguments(watch)
+
+    serve = commands.add_parser("serve", help="keep warm workers and convert documents posted over HTTP")
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    serve.add_argument("--socket", metavar="PATH", help="listen on this Unix socket instead of a TCP port")
+    serve.add_argument("--workers", type=int, default=None,
+                       help="worker processes for DOCX parsing (default: CPU count)")
+    serve.add_argument("--threads", type=int, default=2, help="threads for Markdown documents (default: 2)")
+    serve.add_argument("--queue-size", type=int, default=None,
+                       help="jobs accepted at once before new ones get 503 (default: 4 per worker and thread)")
+    serve.add_argument("--timeout", type=float, default=30.0, help="seconds allowed per job (default: 30)")
+    serve.add_argument("--output-dir", default="Commands/docs/visions",
+                       help="output root; jobs that name an output path must stay inside it "
+                            "(default: Commands/docs/visions)")
+    serve.add_argument("--verbose", action="store_true", help="log every request")
+    add_sidecar_argument(serve)
+    add_reader_argument(serve)
+    add_metrics_arguments(serve)
+
+    sidecar = commands.add_parser("sidecar", help="write the sidecar of vision documents written by other tools")
+    sidecar.add_argument("documents", nargs='+', help="vision markdown documents")
+    sidecar.add_argument("--product-name", help="product name (default: taken from the document title)")
+    sidecar.add_argument("--format", choices=SIDECAR_FORMATS, default='json', help="sidecar encoding (default: json)")
+    add_metrics_arguments(sidecar)
+
+    return parser
 
-## Constraints and Assumptions
+def main():
+    args = build_parser().parse_args()
 
-- [To be defined based on the vision]
+    if args.profile_startup:
+        sys.exit(profile_startup([arg for arg in sys.argv[1:] if arg != "--profile-startup"]))
 
-## High-Level Roadmap
+    cache_path = default_cache_path(args)
 
-- **Phase 1**: [To be planned]
-- **Phase 2**: [To be developed]
+    with session_from_args(args, f"vision-document-processor {args.command}"):
+        if args.command == "batch":
+            sys.exit(run_batch_command(args.source, args.output_dir, args.workers, args.report,
+                                       cache_path, args.force, args.reader, args.index, args.similarity,
+                                       args.sidecar))
 
-## Risks and Mitigations
+        if args.command == "serve":
+            sys.exit(run_serve_command(args.host, args.port, args.socket, args.workers, args.threads,
+                                       args.queue_size, args.timeout, args.reader, args.output_dir, args.verbose,
+                                       args.sidecar))
 
-1. **Risk**: [To be identified]
-   - **Mitigation**: [To be planned]
-"""
-    else:
-        # Process existing sections
-        for section_name, section_content in sections.items():
-            vision_content += f"## {section_name}\n\n{section_content}\n\n"
-    
-    # Write output
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(vision_content.strip())
-    
-    print(f"Processed vision saved to: {output_path}")
-    return True
+        if args.command == "sidecar":
+            sys.exit(run_sidecar_command(args.documents, args.product_name, args.format))
 
-def main():
-    if len(sys.argv) < 5:
-        print("Usage: python vision-document-processor.py <command> <input> <output> <product_name>")
-        print("Commands: convert (for DOCX), process (for MD)")
-        sys.exit(1)
-    
-    command = sys.argv[1]
-    input_path = sys.argv[2]
-    output_path = sys.argv[3]
-    product_name = sys.argv[4]
-    
-    if not os.path.exists(input_path):
-        print(f"Error: Input file not found: {input_path}")
-        sys.exit(1)
-    
-    try:
-        if command == "convert":
-            success = convert_docx_to_vision(input_path, output_path, product_name)
-        elif command == "process":
-            success = process_markdown_vision(input_path, output_path, product_name)
-        else:
-            print(f"Error: Unknown command: {command}")
-            sys.exit(1)
-        
-        if success:
-            print("Processing completed successfully")
-        else:
-            print("Processing failed")
-            sys.exit(1)
-            
-    except Exception as e:
-        print(f"Error: {str(e)}")
-        sys.exit(1)
+        if args.command == "watch":
+            sys.exit(run_watch_command(args.sources, args.output_dir, None if args.force else cache_path,
+                                       args.reader, args.watcher, args.debounce, args.interval, args.index,
+                                       args.similarity, args.sidecar))
+
+        sys.exit(run_single(args.command, args.input, args.output, args.product_name,
+                            cache_path, args.force, getattr(args, 'reader', 'auto'), args.index, args.similarity,
+                            args.sidecar))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
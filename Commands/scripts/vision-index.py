@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Vision Section Index
+Builds a full-text index of the vision corpus and answers ranked section
+searches such as "every Key Problems section that mentions HIPAA"
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import sqlite3
+
+from vision_pipeline.index import INDEX_FILE_NAME, SectionIndex
+from instrumentation import add_metrics_arguments, session_from_args
+
+# Generated vision documents live here, relative to the repository root
+DEFAULT_CORPUS = os.path.join('Commands', 'docs', 'visions')
+
+def run_update_command(args):
+    started = time.perf_counter()
+    with SectionIndex(args.index) as index:
+        result = index.refresh(args.paths)
+        documents, sections = index.stats()
+    print(f"Indexed {result.indexed}, unchanged {result.unchanged}, removed {result.removed} "
+          f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+    print(f"{args.index}: {documents} documents, {sections} sections")
+    return 0
+
+def run_search_command(args):
+    if not os.path.exists(args.index):
+        print(f"Error: No index at {args.index}; build it with 'vision-index.py update'")
+        return 1
+
+    started = time.perf_counter()
+    with SectionIndex(args.index) as index:
+        try:
+            results = index.search(' '.join(args.query), args.section, args.product, args.limit, args.raw)
+        except sqlite3.OperationalError as e:
+            print(f"Error: Invalid query: {str(e)}")
+            return 1
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if args.json:
+        json.dump([result._asdict() for result in results], sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return 0
+
+    for rank, result in enumerate(results, 1):
+        section = result.section or result.title
+        print(f"{rank}. {result.product} — {section} (score {result.score:.2f})")
+        print(f"   {os.path.relpath(result.path)}")
+        print(f"   {' '.join(result.snippet.split())}")
+    print(f"{len(results)} result{'s' if len(results) != 1 else ''} in {elapsed_ms:.1f} ms")
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Index vision documents and search their sections')
+    commands = parser.add_subparsers(dest='command', metavar='<command>')
+    commands.required = True
+
+    update = commands.add_parser('update', help='index new and changed documents, dropping deleted ones')
+    update.add_argument('paths', nargs='*', default=[DEFAULT_CORPUS],
+                        help=f"vision documents or directories to index (default: {DEFAULT_CORPUS})")
+
+    search = commands.add_parser('search', help='ranked full-text search over indexed sections')
+    search.add_argument('query', nargs='+', help="words to find; a trailing * matches prefixes")
+    search.add_argument('--section', help="only this canonical section, e.g. 'Key Problems'")
+    search.add_argument('--product', help='only this product')
+    search.add_argument('--limit', type=int, default=10, help='maximum number of results (default: 10)')
+    search.add_argument('--raw', action='store_true', help='pass the query through as FTS5 syntax (AND, OR, NEAR, ...)')
+    search.add_argument('--json', action='store_true', help='print results as JSON')
+
+    for command in (update, search):
+        command.add_argument('--index', default=os.path.join(DEFAULT_CORPUS, INDEX_FILE_NAME),
+                             help=f"index database (default: {os.path.join(DEFAULT_CORPUS, INDEX_FILE_NAME)})")
+        add_metrics_arguments(command)
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    handlers = {
+        'update': run_update_command,
+        'search': run_search_command,
+    }
+    with session_from_args(args, f"vision-index {args.command}"):
+        sys.exit(handlers[args.command](args))
+
+if __name__ == "__main__":
+    main()
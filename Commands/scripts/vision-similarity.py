@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Vision Near-Duplicate Check
+Stores MinHash signatures of the vision corpus and flags documents that are
+lightly edited copies of existing visions or mostly template placeholders
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from vision_pipeline import DOCX_READERS
+from vision_pipeline.similarity import (
+    SIMILARITY_FILE_NAME, DEFAULT_THRESHOLD, DUPLICATE_THRESHOLD, SimilarityIndex, document_sections,
+)
+from instrumentation import add_metrics_arguments, session_from_args
+
+# Generated vision documents live here, relative to the repository root
+DEFAULT_CORPUS = os.path.join('Commands', 'docs', 'visions')
+
+def run_update_command(args):
+    started = time.perf_counter()
+    with SimilarityIndex(args.store) as store:
+        stored, removed = store.refresh(args.paths)
+        documents, signatures = store.stats()
+    print(f"Stored {stored}, removed {removed} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+    print(f"{args.store}: {documents} documents, {signatures} section signatures")
+    return 0
+
+def print_report(path, matches, documents, duplicate):
+    print(f"Similar visions for {path}")
+    for match in documents:
+        marker = '!' if match.similarity >= duplicate else ' '
+        print(f"{marker} {match.similarity:4.0%}  {match.product} ({os.path.relpath(match.path)})")
+    if not documents:
+        print("  No similar visions found")
+    print()
+    for section, found in matches.items():
+        if found:
+            similar = ', '.join(f"{match.product} {match.similarity:.0%}" for match in found)
+            print(f"  {section}: {similar}")
+
+def run_check_command(args):
+    if not os.path.exists(args.document):
+        print(f"Error: File not found: {args.document}")
+        return 1
+    if not os.path.exists(args.store):
+        print(f"Error: No signatures at {args.store}; build them with 'vision-similarity.py update'")
+        return 1
+
+    with SimilarityIndex(args.store) as store:
+        # A document already in the corpus is not reported as its own duplicate
+        matches, documents = store.check(document_sections(args.document, args.reader), args.threshold,
+                                         args.top, exclude=args.document)
+
+    flagged = [match for match in documents if match.similarity >= args.duplicate]
+    if args.json:
+        json.dump({
+            'document': args.document,
+            'duplicates': [match._asdict() for match in flagged],
+            'documents': [match._asdict() for match in documents],
+            'sections': {section: [match._asdict() for match in found] for section, found in matches.items()},
+        }, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    else:
+        print_report(args.document, matches, documents, args.duplicate)
+        if flagged:
+            print()
+            print(f"! {args.document} looks like a near-duplicate of {', '.join(m.product for m in flagged)}")
+    return 1 if flagged and args.strict else 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Flag vision documents that nearly duplicate existing ones')
+    commands = parser.add_subparsers(dest='command', metavar='<command>')
+    commands.required = True
+
+    update = commands.add_parser('update', help='store signatures of new and changed documents')
+    update.add_argument('paths', nargs='*', default=[DEFAULT_CORPUS],
+                        help=f"vision documents or directories (default: {DEFAULT_CORPUS})")
+
+    check = commands.add_parser('check', help='find the stored visions a document resembles')
+    check.add_argument('document', help='Markdown or DOCX vision document')
+    check.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                       help=f"lowest section similarity to report (default: {DEFAULT_THRESHOLD})")
+    check.add_argument('--duplicate', type=float, default=DUPLICATE_THRESHOLD,
+                       help=f"document similarity that flags a near-duplicate (default: {DUPLICATE_THRESHOLD})")
+    check.add_argument('--top', type=int, default=3, help='matches to show per section and overall (default: 3)')
+    check.add_argument('--strict', action='store_true', help='exit with status 1 when a near-duplicate is found')
+    check.add_argument('--json', action='store_true', help='print the report as JSON')
+    check.add_argument('--reader', choices=DOCX_READERS, default='auto',
+                       help='how to read DOCX documents')
+
+    for command in (update, check):
+        command.add_argument('--store', default=os.path.join(DEFAULT_CORPUS, SIMILARITY_FILE_NAME),
+                             help=f"signature store (default: {os.path.join(DEFAULT_CORPUS, SIMILARITY_FILE_NAME)})")
+        add_metrics_arguments(command)
+    return parser
+
+def main():
+    args = build_parser().parse_args()
+    handlers = {
+        'update': run_update_command,
+        'check': run_check_command,
+    }
+    with session_from_args(args, f"vision-similarity {args.command}"):
+        sys.exit(handlers[args.command](args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""
+Vision document pipeline
+Importable conversion of DOCX and Markdown vision documents, shared by
+vision-document-processor.py and convert_docx_to_vision.py
+
+Stages: read -> normalize -> classify -> section -> render -> write -> diff
+"""
+
+from .reader import DOCX_READERS, MissingDependencyError, Paragraph, read_docx, iter_docx_paragraphs, iter_document_paragraphs
+from .normalize import clean_text, clean_many, normalize
+from .classify import classify, classify_paragraph, block_lines
+from .sections import (
+    Section, SectionMatch, SectionMatcher, CANONICAL_SECTIONS, REQUIRED_SECTIONS, OPTIONAL_SECTIONS,
+    iter_sections, section_span, section_text, extract_sections_from_content,
+)
+from .render import (
+    render_markdown, render_vision, render_unstructured_vision, render_structured_vision,
+    iter_markdown, iter_vision, iter_unstructured_vision, iter_structured_vision,
+)
+from .diff import (
+    SectionChange, fingerprint, fingerprint_document, diff_sections, diff_documents, diff_files,
+    apply_section_changes, summarize_changes,
+)
+from .writer import MarkdownWriter
+from .pipeline import (
+    PROCESSOR_VERSION, ConversionResult, product_slug, product_name_from_path, read_output, write_output,
+    stream_output, docx_blocks, convert_docx_to_markdown, convert_docx_to_markdown_file, convert_docx_to_vision,
+    process_markdown_vision, convert_vision_document,
+)
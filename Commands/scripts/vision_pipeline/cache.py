@@ -0,0 +1,86 @@
+"""
+Incremental conversion cache
+On-disk manifest of documents whose inputs have not changed since they were written
+"""
+
+import os
+import json
+import hashlib
+from pathlib import Path
+
+from .pipeline import PROCESSOR_VERSION
+
+# Incremental cache manifest kept at the root of the output tree
+CACHE_FILE_NAME = '.vision-cache.json'
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """Compute the SHA-256 of a file without reading it all at once"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def cache_key(input_path, product_name, reader='auto', sidecar='json'):
+    """Key a conversion by input content, product name, reader, sidecar format and processor version"""
+    return f"{file_digest(input_path)}:{product_name}:{reader}:{sidecar}:{PROCESSOR_VERSION}"
+
+class ConversionCache:
+    """On-disk manifest of conversions whose inputs have not changed"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.root = self.path.parent
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == PROCESSOR_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            # Missing or unreadable manifest means nothing is cached yet
+            pass
+
+    def _entry_name(self, output_path):
+        output_path = Path(output_path).resolve()
+        try:
+            return output_path.relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return output_path.as_posix()
+
+    def is_fresh(self, key, output_path, companions=()):
+        """Check whether the output was produced from this exact key and its companion files still exist"""
+        entry = self.entries.get(self._entry_name(output_path))
+        if not entry or entry.get('key') != key:
+            return False
+        if not all(os.path.exists(path) for path in companions):
+            return False
+        # Outputs edited or removed since the last run are regenerated
+        try:
+            stat = os.stat(output_path)
+        except OSError:
+            return False
+        return entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns
+
+    def record(self, key, input_path, output_path):
+        """Remember that the output is up to date for this key"""
+        stat = os.stat(output_path)
+        self.entries[self._entry_name(output_path)] = {
+            'key': key,
+            'input': str(input_path),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+        }
+        self.dirty = True
+
+    def save(self):
+        """Write the manifest atomically if anything changed"""
+        if not self.dirty:
+            return
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': PROCESSOR_VERSION, 'entries': self.entries}, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+        self.dirty = False
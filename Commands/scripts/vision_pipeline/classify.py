@@ -0,0 +1,61 @@
+"""
+Classify stage
+Turns normalized Word paragraphs into markdown blocks using their styles
+"""
+
+import re
+
+# Heading styles and the markdown header they become
+HEADING_STYLES = [
+    ('heading 1', '#'),
+    ('heading 2', '##'),
+    ('heading 3', '###'),
+    ('heading 4', '####'),
+]
+
+def classify_paragraph(paragraph):
+    """Convert one paragraph into a markdown block"""
+    text = paragraph.text
+    if not text:
+        return ''
+
+    # Check paragraph style
+    style_name = paragraph.style.lower()
+
+    # Convert headings
+    for style, marker in HEADING_STYLES:
+        if style in style_name:
+            return f"{marker} {text}"
+
+    # Convert lists
+    if 'list' in style_name or paragraph.style.startswith('List'):
+        # Determine list type
+        if 'bullet' in style_name or text.startswith('•') or text.startswith('-'):
+            # Bullet list
+            text = text.lstrip('•-').strip()
+            return f"- {text}"
+        # Numbered list
+        text = re.sub(r'^\d+\.?\s*', '', text)
+        return f"1. {text}"
+
+    # Handle bold text
+    if any(paragraph.bold):
+        # This might be a section header without proper styling
+        if len(text) < 50 and text.isupper():
+            return f"## {text.title()}"
+        return f"**{text}**"
+
+    # Regular paragraph
+    return text
+
+def classify(paragraphs):
+    """Yield a markdown block for every paragraph; blank paragraphs become ''"""
+    for paragraph in paragraphs:
+        yield classify_paragraph(paragraph)
+
+def block_lines(blocks):
+    """Yield markdown lines for blocks, separating them with blank lines"""
+    for block in blocks:
+        if block:
+            yield block
+            yield ''
@@ -0,0 +1,122 @@
+"""
+Section diff stage
+Fingerprints markdown sections and finds the minimal set of added, removed
+and modified ones between two versions of a document
+"""
+
+import io
+import hashlib
+from collections import namedtuple
+
+from .sections import HEADER_PATTERN, iter_sections
+
+# One changed section; path holds the titles of all enclosing headers,
+# occurrence numbers sections that repeat a path and body is the new text
+# ('' for removed sections)
+SectionChange = namedtuple('SectionChange', ['kind', 'path', 'occurrence', 'level', 'body'])
+
+def fingerprint(section):
+    """Short digest of a section's level and body"""
+    return hashlib.blake2b(f"{section.level}\n{section.body}".encode('utf-8'), digest_size=8).hexdigest()
+
+def iter_keyed(sections):
+    """Pair sections with their header path, numbering repeated paths"""
+    seen = {}
+    for section in sections:
+        occurrence = seen.get(section.path, 0)
+        seen[section.path] = occurrence + 1
+        yield (section.path, occurrence), section
+
+def keyed_sections(sections):
+    """Key sections by header path, numbering repeated paths"""
+    return dict(iter_keyed(sections))
+
+def document_sections(content):
+    return list(iter_sections(io.StringIO(content))) if content else []
+
+def fingerprint_document(content):
+    """Fingerprint of every section of a markdown document, keyed by header path"""
+    return {key: fingerprint(section) for key, section in iter_keyed(document_sections(content))}
+
+def diff_sections(before, after):
+    """Changes that turn one sequence of sections into another, in document order"""
+    # Only fingerprints of the old sections are kept, so either side can be a stream
+    old = {key: (section.level, fingerprint(section)) for key, section in iter_keyed(before)}
+    changes = []
+    seen = set()
+    for key, section in iter_keyed(after):
+        seen.add(key)
+        previous = old.get(key)
+        if previous is None:
+            changes.append(SectionChange('added', section.path, key[1], section.level, section.body))
+        elif previous[1] != fingerprint(section):
+            changes.append(SectionChange('modified', section.path, key[1], section.level, section.body))
+    for (path, occurrence), (level, _) in old.items():
+        if (path, occurrence) not in seen:
+            changes.append(SectionChange('removed', path, occurrence, level, ''))
+    return changes
+
+def diff_documents(before, after):
+    """Section changes between two markdown documents"""
+    return diff_sections(document_sections(before), document_sections(after))
+
+def diff_files(before_path, after_path):
+    """Section changes between two markdown files, read a line at a time"""
+    with open(before_path, 'r', encoding='utf-8') as before, open(after_path, 'r', encoding='utf-8') as after:
+        return diff_sections(iter_sections(before), iter_sections(after))
+
+def split_chunks(content):
+    """Split markdown into its preamble and one raw chunk per header, keyed by header path"""
+    preamble = []
+    chunks = []
+    ancestors = []
+    seen = {}
+    for line in content.splitlines(keepends=True):
+        header_match = HEADER_PATTERN.match(line.rstrip('\r\n')) if line.startswith('#') else None
+        if header_match is None:
+            (chunks[-1][1] if chunks else preamble).append(line)
+            continue
+        level = len(header_match.group(1))
+        while ancestors and ancestors[-1][0] >= level:
+            ancestors.pop()
+        ancestors.append((level, header_match.group(2).strip()))
+        path = tuple(name for _, name in ancestors)
+        occurrence = seen.get(path, 0)
+        seen[path] = occurrence + 1
+        chunks.append([(path, occurrence), [line]])
+    return ''.join(preamble), chunks
+
+def render_chunk(change):
+    return f"{'#' * change.level} {change.path[-1]}\n\n" + (f"{change.body}\n\n" if change.body else '')
+
+def apply_section_changes(content, changes):
+    """Apply section changes to a document, leaving every other section byte for byte"""
+    preamble, chunks = split_chunks(content)
+    for change in changes:
+        # Repeated headings are told apart by their occurrence under the same path
+        positions = [index for index, (key, _) in enumerate(chunks) if key == (change.path, change.occurrence)]
+        if change.kind == 'removed':
+            if positions:
+                del chunks[positions[0]]
+        elif positions:
+            chunks[positions[0]][1] = [render_chunk(change)]
+        else:
+            # New sections follow the last section under the same parent
+            parent = change.path[:-1]
+            after = [index for index, (key, _) in enumerate(chunks) if parent and key[0][:len(parent)] == parent]
+            position = after[-1] + 1 if after else len(chunks)
+            if position and not ''.join(chunks[position - 1][1]).endswith('\n\n'):
+                chunks[position - 1][1].append('\n')
+            chunks.insert(position, [(change.path, change.occurrence), [render_chunk(change)]])
+    # Keep the document's own trailing newlines
+    trailing = content[len(content.rstrip('\n')):]
+    return (preamble + ''.join(''.join(lines) for _, lines in chunks)).rstrip('\n') + trailing
+
+def summarize_changes(changes):
+    """One line naming the sections that were added, modified or removed"""
+    parts = []
+    for kind in ('modified', 'added', 'removed'):
+        titles = [change.path[-1] for change in changes if change.kind == kind]
+        if titles:
+            parts.append(f"{kind} {', '.join(titles)}")
+    return '; '.join(parts) if parts else 'no section changes'
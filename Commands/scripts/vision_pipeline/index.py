@@ -0,0 +1,226 @@
+"""
+Section index
+Persistent SQLite FTS5 index of vision documents, one row per product and
+canonical section, kept up to date incrementally as documents are written
+"""
+
+import os
+import re
+import sqlite3
+from collections import namedtuple
+
+from instrumentation import METRICS
+from .sections import SectionMatcher, CANONICAL_SECTIONS, iter_sections, section_span, section_text
+from .pipeline import product_name_from_path
+
+# Index database kept at the root of the vision corpus
+INDEX_FILE_NAME = '.vision-index.sqlite'
+
+# Bump whenever the schema or the indexed rows change so the index is rebuilt
+INDEX_VERSION = 1
+
+# bm25 weights for the product, section, title and body columns
+RANK_WEIGHTS = (2.0, 4.0, 3.0, 1.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    product TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    product TEXT NOT NULL,
+    section TEXT NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sections_document ON sections(document_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS sections_fts USING fts5(
+    product, section, title, body, content='sections', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS sections_insert AFTER INSERT ON sections BEGIN
+    INSERT INTO sections_fts(rowid, product, section, title, body)
+    VALUES (new.id, new.product, new.section, new.title, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS sections_delete AFTER DELETE ON sections BEGIN
+    INSERT INTO sections_fts(sections_fts, rowid, product, section, title, body)
+    VALUES ('delete', old.id, old.product, old.section, old.title, old.body);
+END;
+"""
+
+# Title of generated vision documents, which names the product
+PRODUCT_TITLE_PATTERN = re.compile(r'^Product Vision\s+-\s+(.+)$')
+
+# One indexed section; section is the canonical name, or '' for other sections
+IndexedSection = namedtuple('IndexedSection', ['product', 'section', 'title', 'body'])
+
+# One search hit, best first; higher scores are better matches
+SearchResult = namedtuple('SearchResult', ['product', 'section', 'title', 'path', 'score', 'snippet'])
+
+# What a refresh did to the index
+RefreshResult = namedtuple('RefreshResult', ['indexed', 'unchanged', 'removed'])
+
+def document_product(sections, path):
+    """Product named by a generated document's title, or guessed from its path"""
+    if sections and sections[0].level == 1:
+        match = PRODUCT_TITLE_PATTERN.match(sections[0].title)
+        if match:
+            return match.group(1)
+    return product_name_from_path(path)
+
+def index_sections(sections, product_name):
+    """Rows for a document: each canonical section with its subsections, then everything else"""
+    matcher = SectionMatcher(sections)
+    covered = set()
+    rows = []
+    for canonical, _ in CANONICAL_SECTIONS:
+        match = matcher.match(canonical)
+        if match is None:
+            continue
+        rows.append(IndexedSection(product_name, canonical, match.title, section_text(sections, match.index)))
+        covered.update(range(match.index, section_span(sections, match.index)))
+    for index, section in enumerate(sections):
+        if index not in covered and section.body:
+            rows.append(IndexedSection(product_name, '', section.title, section.body))
+    return rows
+
+def fts_query(text):
+    """Quote every term so punctuation in plain searches is not read as FTS5 syntax"""
+    terms = []
+    for term in text.split():
+        prefix = term.endswith('*') and len(term) > 1
+        term = term.rstrip('*') if prefix else term
+        terms.append('"' + term.replace('"', '""') + '"' + ('*' if prefix else ''))
+    return ' '.join(terms)
+
+def iter_markdown_files(paths):
+    """Markdown documents named directly or found under directories"""
+    for path in paths:
+        if not os.path.isdir(path):
+            if path.lower().endswith('.md'):
+                yield os.path.abspath(path)
+            continue
+        for directory, _, names in os.walk(path):
+            for name in names:
+                if name.lower().endswith('.md') and not name.startswith('.'):
+                    yield os.path.abspath(os.path.join(directory, name))
+
+class SectionIndex:
+    """Full-text index of vision document sections in a SQLite database"""
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != INDEX_VERSION:
+            self.rebuild_schema()
+
+    def rebuild_schema(self):
+        with self.connection:
+            for table in ('sections_fts', 'sections', 'documents'):
+                self.connection.execute(f'DROP TABLE IF EXISTS {table}')
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+
+    def document_signature(self, path):
+        row = self.connection.execute('SELECT mtime_ns, size FROM documents WHERE path = ?', (path,)).fetchone()
+        return tuple(row) if row else None
+
+    def update_document(self, path, product_name=None):
+        """Index a document if it changed since it was last indexed; returns whether it was"""
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.remove_document(path)
+            return False
+        if self.document_signature(path) == (stat.st_mtime_ns, stat.st_size):
+            return False
+
+        with METRICS.timer('vision_index_seconds', operation='update'):
+            with open(path, 'r', encoding='utf-8') as f:
+                sections = list(iter_sections(f))
+            product_name = product_name or document_product(sections, path)
+            rows = index_sections(sections, product_name)
+            with self.connection:
+                self.connection.execute('DELETE FROM documents WHERE path = ?', (path,))
+                document_id = self.connection.execute(
+                    'INSERT INTO documents (path, product, mtime_ns, size) VALUES (?, ?, ?, ?)',
+                    (path, product_name, stat.st_mtime_ns, stat.st_size)).lastrowid
+                self.connection.executemany(
+                    'INSERT INTO sections (document_id, product, section, title, body) VALUES (?, ?, ?, ?, ?)',
+                    [(document_id,) + tuple(row) for row in rows])
+        METRICS.increment('vision_index_documents', action='indexed')
+        return True
+
+    def remove_document(self, path):
+        """Drop a document from the index"""
+        with self.connection:
+            removed = self.connection.execute('DELETE FROM documents WHERE path = ?',
+                                              (os.path.abspath(path),)).rowcount
+        if removed:
+            METRICS.increment('vision_index_documents', action='removed')
+        return bool(removed)
+
+    def refresh(self, paths):
+        """Index new and changed documents under paths and drop ones that are gone"""
+        found = set(iter_markdown_files(paths))
+        indexed = unchanged = 0
+        for path in sorted(found):
+            try:
+                if self.update_document(path):
+                    indexed += 1
+                else:
+                    unchanged += 1
+            except UnicodeDecodeError:
+                continue
+
+        roots = [os.path.abspath(path) for path in paths]
+        removed = 0
+        for (path,) in self.connection.execute('SELECT path FROM documents').fetchall():
+            under_root = any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in roots)
+            if under_root and path not in found and self.remove_document(path):
+                removed += 1
+        return RefreshResult(indexed, unchanged, removed)
+
+    def search(self, query, section=None, product=None, limit=10, raw=False):
+        """Ranked sections matching a full-text query"""
+        weights = ', '.join(str(weight) for weight in RANK_WEIGHTS)
+        sql = (f"SELECT s.product, s.section, s.title, d.path, -bm25(sections_fts, {weights}) AS score, "
+               "snippet(sections_fts, 3, '[', ']', '…', 12) "
+               "FROM sections_fts JOIN sections s ON s.id = sections_fts.rowid "
+               "JOIN documents d ON d.id = s.document_id WHERE sections_fts MATCH ?")
+        parameters = [query if raw else fts_query(query)]
+        if section:
+            sql += ' AND s.section = ? COLLATE NOCASE'
+            parameters.append(section)
+        if product:
+            sql += ' AND s.product = ? COLLATE NOCASE'
+            parameters.append(product)
+        sql += ' ORDER BY score DESC LIMIT ?'
+        parameters.append(limit)
+        with METRICS.timer('vision_index_seconds', operation='query'):
+            return [SearchResult(*row) for row in self.connection.execute(sql, parameters)]
+
+    def stats(self):
+        """Number of indexed documents and sections"""
+        documents = self.connection.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+        sections = self.connection.execute('SELECT COUNT(*) FROM sections').fetchone()[0]
+        return documents, sections
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,67 @@
+"""
+Normalize stage
+Cleans paragraph text from Word and other sources
+"""
+
+from itertools import islice
+
+# Word artifacts that are always removed or turned into plain spaces
+ARTIFACTS = {
+    '\u00a0': ' ',   # no-break space
+    '\u2007': ' ',   # figure space
+    '\u202f': ' ',   # narrow no-break space
+    '\u00ad': None,  # soft hyphen
+    '\u200b': None,  # zero-width space
+    '\u200c': None,  # zero-width non-joiner
+    '\u200d': None,  # zero-width joiner
+    '\u2060': None,  # word joiner
+    '\ufeff': None,  # byte order mark
+}
+
+# Typographic punctuation flattened to ASCII
+PUNCTUATION = {
+    '\u2018': "'", '\u2019': "'", '\u201a': "'", '\u201b': "'", '\u2032': "'",  # single quotes, prime
+    '\u201c': '"', '\u201d': '"', '\u201e': '"', '\u201f': '"', '\u2033': '"',  # double quotes
+    '\u2010': '-', '\u2011': '-', '\u2012': '-', '\u2013': '-', '\u2014': '-', '\u2015': '-',  # dashes
+    '\u2026': '...',  # ellipsis
+}
+
+# (character, replacement) pairs applied to text that is not plain ASCII.
+# Chained str.replace calls run in C and beat str.translate with a dict
+# table, which looks every character up from Python, on long paragraphs.
+ARTIFACT_REPLACEMENTS = tuple((char, value or '') for char, value in ARTIFACTS.items())
+PUNCTUATION_REPLACEMENTS = ARTIFACT_REPLACEMENTS + tuple(PUNCTUATION.items())
+
+# Paragraphs cleaned together by normalize()
+CHUNK_SIZE = 256
+
+def clean_text(text, punctuation=True):
+    """Clean up text from various sources"""
+    # Plain ASCII text has no Word artifacts to replace
+    if not text.isascii():
+        for char, value in PUNCTUATION_REPLACEMENTS if punctuation else ARTIFACT_REPLACEMENTS:
+            text = text.replace(char, value)
+    # Collapse runs of whitespace and trim the ends
+    return ' '.join(text.split())
+
+def clean_many(texts, punctuation=True):
+    """Clean a batch of strings, resolving the replacement table once"""
+    replacements = PUNCTUATION_REPLACEMENTS if punctuation else ARTIFACT_REPLACEMENTS
+    cleaned = []
+    for text in texts:
+        if not text.isascii():
+            for char, value in replacements:
+                text = text.replace(char, value)
+        cleaned.append(' '.join(text.split()))
+    return cleaned
+
+def normalize(paragraphs, punctuation=True):
+    """Yield paragraphs with cleaned text, cleaning them a chunk at a time"""
+    paragraphs = iter(paragraphs)
+    while True:
+        chunk = list(islice(paragraphs, CHUNK_SIZE))
+        if not chunk:
+            return
+        cleaned = clean_many((paragraph.text for paragraph in chunk), punctuation)
+        for paragraph, text in zip(chunk, cleaned):
+            yield paragraph._replace(text=text)
@@ -0,0 +1,178 @@
+"""
+Conversion pipeline
+Chains the read, normalize, classify, section and render stages, streaming
+the rendered document to disk
+"""
+
+import os
+import re
+from pathlib import Path
+from collections import namedtuple
+
+from instrumentation import METRICS
+from .reader import read_docx
+from .normalize import normalize
+from .classify import classify, block_lines
+from .sections import iter_sections, SectionMatcher, REQUIRED_SECTIONS
+from .render import render_markdown, iter_markdown, iter_vision, iter_unstructured_vision, iter_structured_vision
+from .writer import MarkdownWriter, open_temporary, remove_quietly
+
+# Bump whenever the generated output changes so cached results are redone
+PROCESSOR_VERSION = '4'
+
+# Outcome of a conversion: where it was written, what was done ('converted',
+# 'processed', 'copied' or 'unchanged') and the sections that changed compared
+# with the previous output (None when there was no previous output)
+ConversionResult = namedtuple('ConversionResult', ['output_path', 'action', 'changes'], defaults=(None,))
+
+def product_slug(product_name):
+    """Build the directory name used for a product's documents"""
+    return product_name.lower().replace(' ', '-')
+
+def product_name_from_path(path):
+    """Guess a product name from a vision document path"""
+    path = Path(path)
+    name = path.stem
+    # Files named vision.md / vision.docx take their name from the folder
+    if name.lower() == 'vision' and path.parent.name:
+        name = path.parent.name
+    return re.sub(r'[-_]+', ' ', name).strip().title()
+
+def read_output(output_path):
+    """Current content of a generated document, or None if there is none"""
+    try:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            return f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+
+def write_output(output_path, content):
+    """Write a generated document atomically, creating its directory
+
+    A file that already holds the content is left alone so its mtime is kept.
+    Returns the previous content, or None if there was no file.
+    """
+    with METRICS.timer('vision_stage_seconds', stage='write'):
+        previous = read_output(output_path)
+        if previous == content:
+            return previous
+        temporary_path, f = open_temporary(output_path)
+        try:
+            with f:
+                f.write(content)
+            os.replace(temporary_path, output_path)
+        except BaseException:
+            remove_quietly(temporary_path)
+            raise
+    if METRICS.enabled:
+        METRICS.increment('vision_bytes_written', len(content.encode('utf-8')))
+    return previous
+
+def stream_output(output_path, chunks, collapse_blank_lines=False, strip=False):
+    """Write rendered chunks as they are produced and move the document into place
+
+    Rendering is lazy, so it is timed as part of the write stage.
+    """
+    with METRICS.timer('vision_stage_seconds', stage='write'), \
+            MarkdownWriter(output_path, collapse_blank_lines, strip) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    if writer.replaced:
+        METRICS.increment('vision_bytes_written', writer.bytes_written)
+    return writer
+
+def conversion_result(writer, action):
+    """Describe a written document and its section changes"""
+    if not writer.replaced:
+        action = 'unchanged'
+    METRICS.increment('vision_documents', action=action)
+    return ConversionResult(writer.output_path, action, writer.changes)
+
+def counted(items, name):
+    """Pass items through, counting them once they have all been seen"""
+    count = 0
+    for count, item in enumerate(items, 1):
+        yield item
+    METRICS.increment(name, count)
+
+def docx_blocks(docx_path, reader='auto', punctuation=True):
+    """Read, normalize and classify a DOCX file into markdown blocks"""
+    paragraphs = read_docx(docx_path, reader)
+    if METRICS.enabled:
+        paragraphs = counted(paragraphs, 'vision_paragraphs_read')
+    return classify(normalize(paragraphs, punctuation))
+
+def record_sections(count, matcher=None):
+    """Count the sections found and the required sections filled with defaults"""
+    if not METRICS.enabled:
+        return
+    METRICS.increment('vision_sections_found', count)
+    if matcher is not None:
+        METRICS.increment('vision_sections_defaulted',
+                          sum(1 for section in REQUIRED_SECTIONS if not matcher.match(section)))
+
+def convert_docx_to_markdown(docx_path, output_path=None, reader='auto'):
+    """Convert DOCX to Markdown format"""
+    # Reading is lazy, so the parse stage includes load and clean
+    with METRICS.timer('vision_stage_seconds', stage='parse'):
+        markdown_content = render_markdown(docx_blocks(docx_path, reader, punctuation=False))
+    if output_path:
+        write_output(output_path, markdown_content)
+    METRICS.increment('vision_documents', action='markdown')
+    return markdown_content
+
+def convert_docx_to_markdown_file(docx_path, output_path, reader='auto'):
+    """Convert DOCX to a Markdown file without holding the document in memory"""
+    # Reading is lazy, so every stage runs while the file is written
+    writer = stream_output(output_path, iter_markdown(docx_blocks(docx_path, reader, punctuation=False)),
+                           collapse_blank_lines=True)
+    return conversion_result(writer, 'markdown')
+
+def convert_docx_to_vision(docx_path, output_path, product_name, reader='auto'):
+    """Convert DOCX to vision markdown format"""
+    # Reading is lazy, so the parse stage includes load, clean and mapping;
+    # only the text of the matched canonical sections is kept
+    with METRICS.timer('vision_stage_seconds', stage='parse'):
+        matcher = SectionMatcher(iter_sections(block_lines(docx_blocks(docx_path, reader))), keep_text=True)
+    record_sections(matcher.count, matcher)
+    writer = stream_output(output_path, iter_vision(None, product_name, matcher), strip=True)
+    return conversion_result(writer, 'converted')
+
+def process_markdown_vision(input_path, output_path, product_name):
+    """Process and enhance markdown vision document"""
+    # Map headings in a streaming pass that keeps only their titles
+    with METRICS.timer('vision_stage_seconds', stage='parse'), open(input_path, 'r', encoding='utf-8') as f:
+        first_line = f.readline()
+        f.seek(0)
+        matcher = SectionMatcher(iter_sections(f))
+
+    # Check if it already has the right structure
+    has_all = all(matcher.has_heading(section) for section in REQUIRED_SECTIONS)
+    record_sections(matcher.count)
+
+    if has_all and first_line.startswith(f"# Product Vision - {product_name}"):
+        # Already properly formatted, just copy
+        with open(input_path, 'r', encoding='utf-8') as f:
+            writer = stream_output(output_path, f)
+        return conversion_result(writer, 'copied')
+
+    # If the original content doesn't have clear sections, use it as vision statement
+    if matcher.count < 3:
+        with open(input_path, 'r', encoding='utf-8') as f:
+            writer = stream_output(output_path, iter_unstructured_vision(f, product_name), strip=True)
+        # Every section but the vision statement is a placeholder
+        METRICS.increment('vision_sections_defaulted', len(REQUIRED_SECTIONS) - 1)
+    else:
+        # Sections are read again and written as they are parsed
+        with open(input_path, 'r', encoding='utf-8') as f:
+            writer = stream_output(output_path, iter_structured_vision(iter_sections(f), product_name), strip=True)
+    return conversion_result(writer, 'processed')
+
+def convert_vision_document(input_path, output_path, product_name, reader='auto'):
+    """Convert a .docx or process a .md vision document, chosen by extension"""
+    extension = os.path.splitext(input_path)[1].lower()
+    if extension == '.docx':
+        return convert_docx_to_vision(input_path, output_path, product_name, reader)
+    if extension == '.md':
+        return process_markdown_vision(input_path, output_path, product_name)
+    raise ValueError(f"Unsupported file type: {input_path}")
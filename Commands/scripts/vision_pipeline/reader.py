@@ -0,0 +1,169 @@
+"""
+Read stage
+Turns .docx files into paragraph records, either through python-docx or by
+streaming word/document.xml without it
+"""
+
+from collections import namedtuple
+
+# WordprocessingML namespace
+W_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+W_BODY = W_NS + 'body'
+W_P = W_NS + 'p'
+W_R = W_NS + 'r'
+W_T = W_NS + 't'
+W_TAB = W_NS + 'tab'
+W_BR = W_NS + 'br'
+W_CR = W_NS + 'cr'
+W_PTAB = W_NS + 'ptab'
+W_NO_BREAK_HYPHEN = W_NS + 'noBreakHyphen'
+W_PPR = W_NS + 'pPr'
+W_RPR = W_NS + 'rPr'
+W_PSTYLE = W_NS + 'pStyle'
+W_B = W_NS + 'b'
+W_VAL = W_NS + 'val'
+W_STYLE = W_NS + 'style'
+W_STYLE_ID = W_NS + 'styleId'
+W_TYPE = W_NS + 'type'
+W_DEFAULT = W_NS + 'default'
+W_NAME = W_NS + 'name'
+
+# Elements whose text is not part of the paragraph text
+SKIPPED_ELEMENTS = {W_NS + 'txbxContent', W_NS + 'del', W_NS + 'instrText'}
+
+# Built-in style names are stored lowercase; Word shows them capitalized
+STYLE_ALIASES = {name.lower(): name for name in
+                 ['Caption', 'Footer', 'Header'] + [f'Heading {i}' for i in range(1, 10)]}
+
+FALSE_VALUES = {'0', 'false', 'off'}
+
+# Ways of reading DOCX input: the python-docx object model, streaming
+# word/document.xml directly, or python-docx when installed and streaming otherwise
+DOCX_READERS = ('auto', 'python-docx', 'stream')
+
+# One paragraph: its text, style name and a bold flag for every run
+Paragraph = namedtuple('Paragraph', ['text', 'style', 'bold'])
+
+class MissingDependencyError(ImportError):
+    """Raised when an optional dependency needed for a reader is not installed"""
+
+def read_style_names(archive):
+    """Map paragraph style IDs to style names, plus the default style name"""
+    import xml.etree.ElementTree as ET
+
+    names = {}
+    default = ''
+    try:
+        data = archive.read('word/styles.xml')
+    except KeyError:
+        return names, default
+
+    for style in ET.fromstring(data).iter(W_STYLE):
+        if style.get(W_TYPE) != 'paragraph':
+            continue
+        name_element = style.find(W_NAME)
+        name = name_element.get(W_VAL) if name_element is not None else style.get(W_STYLE_ID)
+        name = STYLE_ALIASES.get(name.lower(), name)
+        names[style.get(W_STYLE_ID)] = name
+        if style.get(W_DEFAULT) in ('1', 'true'):
+            default = name
+    return names, default
+
+def element_text(element, parts):
+    """Collect the visible text below an element"""
+    for child in element:
+        if child.tag in SKIPPED_ELEMENTS:
+            continue
+        if child.tag == W_T:
+            parts.append(child.text or '')
+        elif child.tag in (W_TAB, W_PTAB):
+            parts.append('\t')
+        elif child.tag == W_NO_BREAK_HYPHEN:
+            parts.append('-')
+        elif child.tag in (W_BR, W_CR):
+            parts.append('\n')
+        else:
+            element_text(child, parts)
+    return parts
+
+def is_bold(run):
+    """Check for bold set directly on a run"""
+    properties = run.find(W_RPR)
+    if properties is None:
+        return False
+    bold = properties.find(W_B)
+    if bold is None:
+        return False
+    return bold.get(W_VAL, 'true').lower() not in FALSE_VALUES
+
+def to_paragraph(element, style_names, default_style):
+    """Build a Paragraph from a parsed w:p element"""
+    style = default_style
+    properties = element.find(W_PPR)
+    if properties is not None:
+        style_element = properties.find(W_PSTYLE)
+        if style_element is not None:
+            style_id = style_element.get(W_VAL)
+            style = style_names.get(style_id, style_id)
+
+    text = ''.join(element_text(element, []))
+    bold = tuple(is_bold(run) for run in element.findall(W_R))
+    return Paragraph(text, style, bold)
+
+def iter_docx_paragraphs(docx_path):
+    """Yield body paragraphs of a .docx file one at a time"""
+    import zipfile
+    import xml.etree.ElementTree as ET
+
+    with zipfile.ZipFile(docx_path) as archive:
+        style_names, default_style = read_style_names(archive)
+
+        with archive.open('word/document.xml') as document:
+            depth = 0
+            body = None
+            for event, element in ET.iterparse(document, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if element.tag == W_BODY:
+                        body = element
+                    continue
+
+                depth -= 1
+                # Only direct children of w:body are document paragraphs;
+                # tables and other blocks are dropped once they are complete
+                if body is not None and depth == 2:
+                    if element.tag == W_P:
+                        yield to_paragraph(element, style_names, default_style)
+                    element.clear()
+                    body.remove(element)
+
+def iter_document_paragraphs(document):
+    """Adapt a python-docx Document to the same Paragraph records"""
+    for paragraph in document.paragraphs:
+        style = paragraph.style.name if paragraph.style is not None else ''
+        yield Paragraph(paragraph.text, style, tuple(bool(run.bold) for run in paragraph.runs))
+
+def load_python_docx():
+    """Import python-docx on first use, or return None if it is not installed"""
+    try:
+        from docx import Document
+    except ImportError:
+        return None
+    return Document
+
+def read_docx(docx_path, reader='auto'):
+    """Read DOCX paragraphs with python-docx or the streaming reader"""
+    if reader == 'stream':
+        return iter_docx_paragraphs(docx_path)
+
+    Document = load_python_docx()
+    if Document is None:
+        if reader == 'auto':
+            # Fall back to the pure standard library reader
+            return iter_docx_paragraphs(docx_path)
+        raise MissingDependencyError(
+            "python-docx is not installed; install it with 'pip install python-docx' "
+            "or use the 'stream' reader")
+
+    return iter_document_paragraphs(Document(docx_path))
@@ -0,0 +1,82 @@
+"""
+Render stage
+Builds markdown and vision documents from blocks and sections, either as
+strings or as chunks streamed to a writer
+"""
+
+import re
+
+from .sections import REQUIRED_SECTIONS, OPTIONAL_SECTIONS, SectionMatcher
+from .templates import IDEAS_MATTER_VISION, PLACEHOLDER_SECTIONS, required_section_defaults
+
+def iter_markdown(blocks):
+    """Yield markdown blocks with the blank lines that separate them"""
+    for index, block in enumerate(blocks):
+        if index:
+            yield '\n\n'
+        yield block
+
+def render_markdown(blocks):
+    """Join markdown blocks into a document"""
+    markdown_content = ''.join(iter_markdown(blocks))
+
+    # Additional formatting fixes
+    markdown_content = re.sub(r'\n{3,}', '\n\n', markdown_content)  # Max 2 newlines
+    return markdown_content
+
+def iter_vision(sections, product_name, matcher=None):
+    """Yield the canonical vision layout one section at a time"""
+    yield f"# Product Vision - {product_name}\n\n"
+
+    # Map found headings to required sections
+    if matcher is None:
+        matcher = SectionMatcher(sections)
+    for section in REQUIRED_SECTIONS:
+        match = matcher.match(section)
+        if match:
+            yield f"## {section}\n\n{matcher.text(section)}\n\n"
+
+    # Add missing required sections
+    for section, default in required_section_defaults(product_name).items():
+        if not matcher.match(section):
+            yield f"## {section}\n\n{default}\n\n"
+
+    # Add optional sections if found
+    for section in OPTIONAL_SECTIONS:
+        match = matcher.match(section)
+        if match:
+            yield f"## {section}\n\n{matcher.text(section)}\n\n"
+
+def render_vision(sections, product_name, matcher=None):
+    """Map sections onto the canonical vision layout"""
+    return ''.join(iter_vision(sections, product_name, matcher)).strip()
+
+def vision_heading(product_name):
+    """Opening of a reformatted vision document"""
+    # Use the comprehensive vision we already prepared for Ideas Matter
+    if product_name == "Ideas Matter":
+        return IDEAS_MATTER_VISION + "\n\n"
+    return f"# Product Vision - {product_name}\n\n"
+
+def iter_unstructured_vision(lines, product_name):
+    """Yield unstructured content as the vision statement, then the placeholders"""
+    yield vision_heading(product_name)
+    yield "## Vision Statement\n\n"
+    # Lines may be a string or an open file
+    yield from ([lines] if isinstance(lines, str) else lines)
+    yield "\n\n"
+    yield PLACEHOLDER_SECTIONS
+
+def render_unstructured_vision(content, product_name):
+    """Use unstructured content as the vision statement and add placeholders"""
+    return ''.join(iter_unstructured_vision(content, product_name)).strip()
+
+def iter_structured_vision(sections, product_name):
+    """Yield existing sections, keeping nested headers below level 2"""
+    yield vision_heading(product_name)
+    for section in sections:
+        yield f"{'#' * max(section.level, 2)} {section.title}\n\n{section.body}\n\n"
+
+def render_structured_vision(sections, product_name):
+    """Re-emit existing sections, keeping nested headers below level 2"""
+    return ''.join(iter_structured_vision(sections, product_name)).strip()
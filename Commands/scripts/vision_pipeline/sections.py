@@ -0,0 +1,192 @@
+"""
+Section stage
+Splits markdown lines into sections and maps headings to canonical vision sections
+"""
+
+import io
+import re
+from collections import namedtuple
+
+# ATX markdown header: level from the run of hashes, then the title; a closing
+# run of hashes only counts after whitespace, so "C#" keeps its hash
+HEADER_PATTERN = re.compile(r'^(#{1,6})\s+(.*?)(?:\s+#+)?\s*$')
+
+# One parsed markdown section; path holds the titles of all enclosing headers
+Section = namedtuple('Section', ['level', 'title', 'body', 'path'])
+
+# Canonical vision sections with the heading keywords that map to them,
+# in order of preference
+CANONICAL_SECTIONS = [
+    ('Vision Statement', ['vision statement', 'vision', 'overview']),
+    ('Target Market', ['target market', 'market', 'audience']),
+    ('Key Problems', ['problems', 'key problems', 'challenges']),
+    ('Strategic Themes', ['themes', 'strategic themes', 'capabilities']),
+    ('Success Metrics', ['metrics', 'success metrics', 'kpis']),
+    ('Key Differentiators', ['differentiators', 'key differentiators', 'unique value']),
+    ('Constraints and Assumptions', ['constraints and assumptions']),
+    ('High-Level Roadmap', ['high-level roadmap']),
+    ('Risks and Mitigations', ['risks and mitigations']),
+]
+
+REQUIRED_SECTIONS = [name for name, _ in CANONICAL_SECTIONS[:6]]
+OPTIONAL_SECTIONS = [name for name, _ in CANONICAL_SECTIONS[6:]]
+
+# Keyword -> (canonical section, preference rank)
+SECTION_KEYWORDS = {
+    keyword: (name, rank)
+    for name, keywords in CANONICAL_SECTIONS
+    for rank, keyword in enumerate(keywords)
+}
+
+# Finds every keyword occurrence in a heading in one scan; the lookahead lets
+# matches overlap and longer keywords win where two start at the same place
+KEYWORD_PATTERN = re.compile(
+    '(?=(' + '|'.join(re.escape(k) for k in sorted(SECTION_KEYWORDS, key=len, reverse=True)) + '))')
+
+# Result of resolving a canonical section against a document heading
+SectionMatch = namedtuple('SectionMatch', ['canonical', 'index', 'title', 'keyword', 'confidence'])
+
+def iter_sections(lines):
+    """Yield a Section for every markdown header in a single pass over lines"""
+    level = 0
+    title = None
+    path = ()
+    body = []
+    ancestors = []
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+        header_match = HEADER_PATTERN.match(line) if line.startswith('#') else None
+        if header_match is None:
+            # Text before the first header has no section to belong to
+            if title is not None:
+                body.append(line)
+            continue
+
+        if title is not None:
+            yield Section(level, title, '\n'.join(body).strip(), path)
+
+        # Close every open header at the same or a deeper level
+        level = len(header_match.group(1))
+        title = header_match.group(2).strip()
+        while ancestors and ancestors[-1][0] >= level:
+            ancestors.pop()
+        ancestors.append((level, title))
+        path = tuple(name for _, name in ancestors)
+        body = []
+
+    if title is not None:
+        yield Section(level, title, '\n'.join(body).strip(), path)
+
+def heading_canonicals(title):
+    """Canonical sections whose keywords appear in a heading"""
+    return {SECTION_KEYWORDS[keyword][0] for keyword in KEYWORD_PATTERN.findall(title.lower())}
+
+def nested_within(parent, canonicals, section):
+    """Check whether a following section belongs under parent's canonical text"""
+    # A nested heading that maps to another canonical section starts that
+    # section instead, so a title like "Acme Vision" does not swallow the document
+    return section.level > parent.level and heading_canonicals(section.title) <= canonicals
+
+def section_span(sections, index):
+    """Index just past the last subsection included in a section's canonical text"""
+    parent = sections[index]
+    canonicals = heading_canonicals(parent.title)
+    end = index + 1
+    while end < len(sections) and nested_within(parent, canonicals, sections[end]):
+        end += 1
+    return end
+
+def section_text(sections, index):
+    """Render a section body followed by its nested subsections, up to one mapping to another canonical section"""
+    parent = sections[index]
+    parts = [parent.body] if parent.body else []
+    for section in sections[index + 1:section_span(sections, index)]:
+        parts.append(f"{'#' * section.level} {section.title}")
+        if section.body:
+            parts.append(section.body)
+    return '\n\n'.join(parts)
+
+class SectionMatcher:
+    """Resolve document headings to canonical vision sections in a single scan
+
+    Given an iterator with keep_text, the text of the best heading so far for
+    each canonical section is collected as the sections stream past, so the
+    document itself is never held in memory.
+    """
+
+    def __init__(self, sections, keep_text=False):
+        self.sections = sections if isinstance(sections, list) else None
+        self.titles = []
+        self.keyword_index = {}
+        self.matches = {}
+        self.texts = {} if keep_text else None
+        ranks = {}
+        # Matched sections still taking in subsections: (section, canonicals, parts)
+        collecting = []
+
+        for index, section in enumerate(sections):
+            title = section.title.lower()
+            self.titles.append(title)
+            if self.texts is not None:
+                collecting = self.collect(collecting, section)
+            matched = []
+            for keyword in set(KEYWORD_PATTERN.findall(title)):
+                self.keyword_index.setdefault(keyword, []).append(index)
+                canonical, rank = SECTION_KEYWORDS[keyword]
+                # Prefer any heading over the document title, then the
+                # best-ranked keyword, then the earliest heading
+                key = (index == 0 and section.level == 1, rank, index)
+                if canonical in ranks and ranks[canonical] <= key:
+                    continue
+                ranks[canonical] = key
+                self.matches[canonical] = SectionMatch(
+                    canonical, index, section.title, keyword,
+                    self.confidence(canonical, keyword, title))
+                matched.append(canonical)
+            if matched and self.texts is not None:
+                parts = [section.body] if section.body else []
+                for canonical in matched:
+                    self.texts[canonical] = parts
+                collecting.append((section, heading_canonicals(section.title), parts))
+        self.count = len(self.titles)
+
+    def collect(self, collecting, section):
+        """Add a section to the texts it nests within; returns those still collecting"""
+        kept = []
+        for parent, canonicals, parts in collecting:
+            # Drop texts that stopped, or that a better heading replaced
+            if not nested_within(parent, canonicals, section):
+                continue
+            if not any(parts is text for text in self.texts.values()):
+                continue
+            parts.append(f"{'#' * section.level} {section.title}")
+            if section.body:
+                parts.append(section.body)
+            kept.append((parent, canonicals, parts))
+        return kept
+
+    @staticmethod
+    def confidence(canonical, keyword, title):
+        """Score how closely a heading matched a canonical section"""
+        if keyword == canonical.lower():
+            return 1.0 if title == keyword else 0.8
+        return 0.7 if title == keyword else 0.5
+
+    def match(self, canonical):
+        """Return the SectionMatch for a canonical section, or None"""
+        return self.matches.get(canonical)
+
+    def text(self, canonical):
+        """Text of the heading matched to a canonical section, with its subsections"""
+        if self.texts is not None:
+            return '\n\n'.join(self.texts[canonical])
+        return section_text(self.sections, self.matches[canonical].index)
+
+    def has_heading(self, canonical):
+        """Check whether any heading contains the canonical section name"""
+        return canonical.lower() in self.keyword_index
+
+def extract_sections_from_content(content):
+    """Extract sections from markdown content as a title to body mapping"""
+    return {section.title: section.body for section in iter_sections(io.StringIO(content))}
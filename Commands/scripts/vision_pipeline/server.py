@@ -0,0 +1,312 @@
+"""
+Conversion server
+Long-running HTTP service over localhost or a Unix socket that converts vision
+documents on pre-warmed workers, with bounded queueing and per-job timeouts
+"""
+
+import os
+import json
+import time
+import signal
+import socket
+import threading
+import socketserver
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+from instrumentation import METRICS, format_openmetrics
+from .reader import DOCX_READERS, load_python_docx
+from .diff import summarize_changes
+from .pipeline import product_slug, product_name_from_path, convert_vision_document
+from .sidecar import SIDECAR_FORMATS, write_vision_sidecar
+
+# Seconds a job may take, counted from when it is accepted
+JOB_TIMEOUT = 30.0
+
+# Markdown runs on threads in the server process; DOCX parsing on worker processes
+MARKDOWN_THREADS = 2
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 64 * 1024
+
+# Root that every output must be written under
+DEFAULT_OUTPUT_DIR = 'Commands/docs/visions'
+
+class JobTimeout(Exception):
+    """A job ran past its timeout inside a worker"""
+
+def warm_worker(reader):
+    """Start a worker with metrics on and python-docx already imported"""
+    METRICS.enable()
+    if reader != 'stream':
+        load_python_docx()
+
+def interrupt_job(signum, frame):
+    raise JobTimeout("conversion timed out")
+
+def convert_job(job):
+    """Convert one document and describe the result"""
+    result = convert_vision_document(job['input'], job['output'], job['product_name'], job['reader'])
+    if job['sidecar'] != 'none':
+        write_vision_sidecar(job['output'], job['product_name'], job['input'], job['reader'], job['sidecar'])
+    return {
+        'action': result.action,
+        'output': result.output_path,
+        'changes': summarize_changes(result.changes) if result.changes else None,
+    }
+
+def run_worker_job(job, timeout):
+    """Convert a document in a worker process, stopping it at the timeout"""
+    # Each worker runs one job at a time, so its registry holds only this job
+    METRICS.reset()
+    if hasattr(signal, 'setitimer'):
+        signal.signal(signal.SIGALRM, interrupt_job)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        return dict(convert_job(job), metrics=METRICS.snapshot())
+    finally:
+        if hasattr(signal, 'setitimer'):
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+class ConversionService:
+    """Worker pools, admission control and counters shared by every request"""
+
+    def __init__(self, workers=None, threads=MARKDOWN_THREADS, queue_size=None, timeout=JOB_TIMEOUT,
+                 reader='auto', output_dir=DEFAULT_OUTPUT_DIR, sidecar='json'):
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.queue_size = queue_size or (self.workers + threads) * 4
+        self.timeout = timeout
+        self.reader = reader
+        self.output_dir = output_dir
+        self.sidecar = sidecar
+        self.slots = threading.BoundedSemaphore(self.queue_size)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.started = time.monotonic()
+        self.processes = self.process_pool()
+        self.thread_pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='markdown')
+        METRICS.enable()
+
+    def process_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=warm_worker, initargs=(self.reader,))
+
+    def restart_workers(self):
+        """Replace the DOCX worker pool if a crashed worker has broken it"""
+        with self.lock:
+            try:
+                self.processes.submit(os.getpid)
+                return
+            except BrokenProcessPool:
+                broken = self.processes
+                self.processes = self.process_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+        METRICS.increment('vision_server_worker_restarts')
+
+    def warm_up(self):
+        """Start every worker process now rather than on the first upload"""
+        for future in [self.processes.submit(os.getpid) for _ in range(self.workers)]:
+            future.result()
+
+    def make_job(self, request):
+        """Validate a job request, filling in the product name and output path"""
+        input_path = request.get('input')
+        if not isinstance(input_path, str) or not input_path:
+            raise ValueError("'input' must be the path of a .docx or .md document")
+        extension = os.path.splitext(input_path)[1].lower()
+        if extension not in ('.docx', '.md'):
+            raise ValueError(f"Unsupported file type: {input_path}")
+        if not os.path.isfile(input_path):
+            raise ValueError(f"Input file not found: {input_path}")
+
+        product_name = request.get('product_name') or product_name_from_path(input_path)
+        output_path = request.get('output') or os.path.join(self.output_dir, product_slug(product_name), 'vision.md')
+        if not isinstance(output_path, str) or not output_path.lower().endswith('.md'):
+            raise ValueError("'output' must be the path of a .md document")
+        # Callers may only write inside the output directory, symlinks included
+        output_root = os.path.realpath(self.output_dir)
+        if os.path.commonpath([output_root, os.path.realpath(output_path)]) != output_root:
+            raise ValueError(f"'output' must be inside {self.output_dir}")
+        reader = request.get('reader') or self.reader
+        if reader not in DOCX_READERS:
+            raise ValueError(f"'reader' must be one of {', '.join(DOCX_READERS)}")
+        sidecar = request.get('sidecar') or self.sidecar
+        if sidecar not in SIDECAR_FORMATS + ('none',):
+            raise ValueError(f"'sidecar' must be one of {', '.join(SIDECAR_FORMATS)} or none")
+        return {'input': input_path, 'output': output_path, 'product_name': product_name, 'reader': reader,
+                'sidecar': sidecar}
+
+    def submit(self, job):
+        """Queue a job, or return None when the queue is full"""
+        if not self.slots.acquire(blocking=False):
+            METRICS.increment('vision_server_jobs', status='rejected')
+            return None
+        with self.lock:
+            self.in_flight += 1
+        if job['input'].lower().endswith('.docx'):
+            try:
+                future = self.processes.submit(run_worker_job, job, self.timeout)
+            except BrokenProcessPool:
+                self.restart_workers()
+                future = self.processes.submit(run_worker_job, job, self.timeout)
+        else:
+            future = self.thread_pool.submit(convert_job, job)
+        future.add_done_callback(self.release)
+        return future
+
+    def release(self, future):
+        with self.lock:
+            self.in_flight -= 1
+        self.slots.release()
+
+    def run(self, job):
+        """Convert a document and return (HTTP status, response body)"""
+        accepted = time.perf_counter()
+        future = self.submit(job)
+        if future is None:
+            return 503, {'status': 'rejected', 'error': f"Queue is full ({self.queue_size} jobs); retry later"}
+
+        pool = 'process' if job['input'].lower().endswith('.docx') else 'thread'
+        try:
+            result = future.result(timeout=self.timeout)
+            status, body = 200, dict(result, status='ok')
+        except (FutureTimeoutError, JobTimeout):
+            # A job still waiting for a worker is dropped; a markdown thread cannot be interrupted
+            future.cancel()
+            status, body = 504, {'status': 'timeout', 'error': f"Conversion took longer than {self.timeout:g} s"}
+        except BrokenProcessPool:
+            # A worker died mid-job; later jobs get a fresh pool
+            self.restart_workers()
+            status, body = 422, {'status': 'failed', 'error': "The worker process converting the document crashed"}
+        except Exception as e:
+            status, body = 422, {'status': 'failed', 'error': str(e)}
+
+        METRICS.merge(body.pop('metrics', ()))
+        body['duration'] = round(time.perf_counter() - accepted, 4)
+        METRICS.increment('vision_server_jobs', status=body['status'])
+        METRICS.observe('vision_server_job_seconds', body['duration'], pool=pool)
+        return status, body
+
+    def health(self):
+        with self.lock:
+            in_flight = self.in_flight
+        return {
+            'status': 'ok',
+            'workers': self.workers,
+            'threads': self.threads,
+            'in_flight': in_flight,
+            'queue_size': self.queue_size,
+            'timeout': self.timeout,
+            'uptime': round(time.monotonic() - self.started, 1),
+        }
+
+    def metrics(self):
+        with self.lock:
+            METRICS.set_gauge('vision_server_in_flight', self.in_flight)
+        return format_openmetrics(METRICS.snapshot())
+
+    def close(self):
+        self.thread_pool.shutdown(wait=True, cancel_futures=True)
+        self.processes.shutdown(wait=True, cancel_futures=True)
+
+class ConversionHandler(BaseHTTPRequestHandler):
+    """POST /convert runs a job; GET /health and /metrics report on the service"""
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'VisionServer/1.0'
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def reply(self, status, data, content_type='application/json'):
+        body = data.encode('utf-8') if isinstance(data, str) else json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if status == 503:
+            self.send_header('Retry-After', '1')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/health':
+            return self.reply(200, self.service.health())
+        if path == '/metrics':
+            return self.reply(200, self.service.metrics(),
+                              'application/openmetrics-text; version=1.0.0; charset=utf-8')
+        return self.reply(404, {'error': 'Not Found'})
+
+    def do_POST(self):
+        if urlsplit(self.path).path != '/convert':
+            return self.reply(404, {'error': 'Not Found'})
+        # Browsers cannot send JSON cross-origin without a preflight we never answer
+        if self.headers.get_content_type() != 'application/json':
+            self.close_connection = True
+            return self.reply(415, {'error': "Content-Type must be application/json"})
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            return self.reply(413, {'error': f"Request body is larger than {MAX_BODY_BYTES} bytes"})
+        try:
+            request = json.loads(self.rfile.read(length).decode('utf-8')) if length else {}
+            if not isinstance(request, dict):
+                raise ValueError("Request body must be a JSON object")
+            job = self.service.make_job(request)
+        except ValueError as e:
+            return self.reply(400, {'status': 'invalid', 'error': str(e)})
+        self.reply(*self.service.run(job))
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    """HTTP server listening on a Unix domain socket"""
+
+    address_family = getattr(socket, 'AF_UNIX', None)
+
+    def server_bind(self):
+        # Skip HTTPServer.server_bind, which expects a host and port
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+class ConversionServer:
+    """Serve a ConversionService over localhost TCP or a Unix socket"""
+
+    def __init__(self, service, host='127.0.0.1', port=0, socket_path=None, verbose=False):
+        self.service = service
+        self.socket_path = socket_path
+        if socket_path:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            self.server = UnixHTTPServer(socket_path, ConversionHandler)
+        else:
+            self.server = ThreadingHTTPServer((host, port), ConversionHandler)
+        self.server.daemon_threads = True
+        self.server.service = service
+        self.server.verbose = verbose
+
+    @property
+    def url(self):
+        if self.socket_path:
+            return f"unix:{self.socket_path}"
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def serve_forever(self):
+        self.server.serve_forever()
+
+    def close(self):
+        self.server.server_close()
+        self.service.close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
@@ -0,0 +1,216 @@
+"""
+Vision sidecar
+Machine-readable summary written beside a generated vision document: the
+section tree, canonical section mapping, content hashes and source metadata,
+so later stages load structure instead of re-parsing markdown
+"""
+
+import os
+import json
+import hashlib
+
+from instrumentation import METRICS
+from .reader import MissingDependencyError
+from .sections import CANONICAL_SECTIONS, REQUIRED_SECTIONS, SectionMatcher, iter_sections, section_text
+from .diff import fingerprint
+from .writer import open_temporary, remove_quietly
+from .cache import file_digest
+from .pipeline import PROCESSOR_VERSION
+
+# Bump whenever the sidecar layout changes
+SIDECAR_VERSION = 1
+
+# Encodings and the extension that replaces the document's own
+SIDECAR_FORMATS = ('json', 'msgpack')
+SIDECAR_EXTENSIONS = {'json': '.json', 'msgpack': '.msgpack'}
+
+def sidecar_path(document_path, format='json'):
+    """Sidecar file of a document, e.g. vision.json beside vision.md"""
+    return os.path.splitext(document_path)[0] + SIDECAR_EXTENSIONS[format]
+
+def sidecar_outputs(document_path, format='json'):
+    """Sidecar files written beside a document for a --sidecar choice"""
+    return () if format == 'none' else (sidecar_path(document_path, format),)
+
+def find_sidecar(document_path):
+    """Existing sidecar of a document in any format, or None"""
+    for format in SIDECAR_FORMATS:
+        path = sidecar_path(document_path, format)
+        if os.path.exists(path):
+            return path
+    return None
+
+def sidecar_format(path):
+    """Encoding of a sidecar file, chosen by extension"""
+    extension = os.path.splitext(path)[1].lower()
+    for format, format_extension in SIDECAR_EXTENSIONS.items():
+        if extension == format_extension:
+            return format
+    raise ValueError(f"Sidecar must be a {' or '.join(SIDECAR_EXTENSIONS.values())} file: {path}")
+
+def load_msgpack():
+    """Import msgpack on first use"""
+    try:
+        import msgpack
+    except ImportError:
+        raise MissingDependencyError(
+            "msgpack is not installed; install it with 'pip install msgpack' "
+            "or use the json sidecar format") from None
+    return msgpack
+
+def encode_sidecar(data, format='json'):
+    """Serialize sidecar data compactly"""
+    if format == 'msgpack':
+        return load_msgpack().packb(data, use_bin_type=True)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def decode_sidecar(raw, format='json'):
+    if format == 'msgpack':
+        return load_msgpack().unpackb(raw, raw=False)
+    return json.loads(raw.decode('utf-8'))
+
+def write_sidecar(path, data):
+    """Write a sidecar atomically; a file that already holds the data is left alone
+
+    Returns whether the file was written.
+    """
+    raw = encode_sidecar(data, sidecar_format(path))
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == raw:
+                return False
+    except OSError:
+        pass
+    temporary_path, f = open_temporary(path, binary=True)
+    try:
+        with f:
+            f.write(raw)
+        os.replace(temporary_path, path)
+    except BaseException:
+        remove_quietly(temporary_path)
+        raise
+    return True
+
+def load_sidecar(path):
+    """Read a sidecar in the format its extension names"""
+    with open(path, 'rb') as f:
+        return decode_sidecar(f.read(), sidecar_format(path))
+
+def read_document(document_path):
+    """Sections, SHA-256 and size of a markdown document, read in a single pass"""
+    digest = hashlib.sha256()
+    size = 0
+
+    def hashed(f):
+        nonlocal size
+        for line in f:
+            raw = line.encode('utf-8')
+            digest.update(raw)
+            size += len(raw)
+            yield line
+
+    # newline='' keeps line endings, so the digest matches the bytes on disk
+    with open(document_path, 'r', encoding='utf-8', newline='') as f:
+        sections = list(iter_sections(hashed(f)))
+    return sections, digest.hexdigest(), size
+
+def section_hash(text):
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+
+def section_tree(sections, canonical_names):
+    """Nest sections under their enclosing headers; canonical_names maps section index to canonical name"""
+    tree = []
+    ancestors = []
+    for index, section in enumerate(sections):
+        node = {'title': section.title, 'level': section.level, 'hash': fingerprint(section)}
+        if index in canonical_names:
+            node['canonical'] = canonical_names[index]
+        while ancestors and ancestors[-1]['level'] >= section.level:
+            ancestors.pop()
+        if ancestors:
+            ancestors[-1].setdefault('children', []).append(node)
+        else:
+            tree.append(node)
+        ancestors.append(node)
+    return tree
+
+def build_sidecar(document_path, product_name=None, source_path=None, reader=None):
+    """Describe a generated vision document and the source it came from"""
+    sections, digest, size = read_document(document_path)
+    if product_name is None:
+        # Imported here so conversions, which know the product, do not load sqlite3
+        from .index import document_product
+        product_name = document_product(sections, document_path)
+    matcher = SectionMatcher(sections)
+
+    canonical = {}
+    canonical_names = {}
+    for name, _ in CANONICAL_SECTIONS:
+        match = matcher.match(name)
+        if match is None:
+            continue
+        canonical_names[match.index] = name
+        canonical[name] = {
+            'path': list(sections[match.index].path),
+            'confidence': match.confidence,
+            'hash': section_hash(section_text(sections, match.index)),
+        }
+
+    source = None
+    if source_path:
+        source = {
+            'path': str(source_path),
+            'type': os.path.splitext(source_path)[1].lower().lstrip('.'),
+            'sha256': file_digest(source_path),
+        }
+        if source['type'] == 'docx' and reader:
+            source['reader'] = reader
+
+    return {
+        'format': 'vision-sidecar',
+        'version': SIDECAR_VERSION,
+        'processor_version': PROCESSOR_VERSION,
+        'product_name': product_name,
+        'document': {'path': str(document_path), 'sha256': digest, 'size': size},
+        'source': source,
+        'sections': section_tree(sections, canonical_names),
+        'canonical': canonical,
+        'missing': [name for name in REQUIRED_SECTIONS if name not in canonical],
+    }
+
+def write_vision_sidecar(document_path, product_name, source_path=None, reader=None, format='json'):
+    """Write the sidecar of a vision document, returning its path if it changed"""
+    with METRICS.timer('vision_stage_seconds', stage='sidecar'):
+        path = sidecar_path(document_path, format)
+        written = write_sidecar(path, build_sidecar(document_path, product_name, source_path, reader))
+    METRICS.increment('vision_sidecars', action='written' if written else 'unchanged')
+    return path if written else None
+
+def is_current(data, document_path):
+    """Check whether sidecar data still describes the document on disk"""
+    document = data.get('document') or {}
+    if data.get('version') != SIDECAR_VERSION:
+        return False
+    try:
+        if os.path.getsize(document_path) != document.get('size'):
+            return False
+        return file_digest(document_path) == document.get('sha256')
+    except OSError:
+        return False
+
+def load_vision_sidecar(document_path, product_name=None):
+    """Structured view of a vision document, from its sidecar when that is current
+
+    A missing or stale sidecar is rebuilt in memory from the markdown.
+    """
+    path = find_sidecar(document_path)
+    if path:
+        try:
+            data = load_sidecar(path)
+        except (OSError, ValueError, ImportError):
+            data = None
+        if data and is_current(data, document_path):
+            METRICS.increment('vision_sidecar_loads', source='sidecar')
+            return data
+    METRICS.increment('vision_sidecar_loads', source='markdown')
+    return build_sidecar(document_path, product_name)
@@ -0,0 +1,275 @@
+"""
+Near-duplicate detection
+One-permutation MinHash signatures of every canonical section, bucketed with
+locality sensitive hashing so a document is compared only with likely matches
+"""
+
+import os
+import re
+import sqlite3
+import hashlib
+from array import array
+from collections import namedtuple
+
+from instrumentation import METRICS
+from .sections import iter_sections
+from .cache import file_digest
+from .index import document_product, index_sections, iter_markdown_files
+
+# Signature store kept at the root of the vision corpus
+SIMILARITY_FILE_NAME = '.vision-similarity.sqlite'
+
+# Words per shingle
+SHINGLE_SIZE = 3
+
+# 16 bands of 4 rows: sections about 50% similar share a bucket half the time,
+# 80% similar ones almost always
+BANDS = 16
+ROWS = 4
+PERMUTATIONS = BANDS * ROWS
+
+# Section similarity reported by default, and the document score that flags a near-duplicate
+DEFAULT_THRESHOLD = 0.5
+DUPLICATE_THRESHOLD = 0.8
+
+# Bump whenever shingling or hashing changes so stored signatures are redone
+SIMILARITY_VERSION = 1
+
+# Shingle hashes are 64 bits; the low bits pick a signature bin and the rest rank
+# the shingle within it. Values borrowed by empty bins are offset by this much
+# per bin skipped, keeping every value below 2 ** 64
+BIN_OFFSET = 1 << 58
+
+WORD_PATTERN = re.compile(r'\w+')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    product TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS signatures (
+    id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS signatures_document ON signatures(document_id);
+CREATE TABLE IF NOT EXISTS buckets (
+    signature_id INTEGER NOT NULL REFERENCES signatures(id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets(section, band, bucket);
+CREATE INDEX IF NOT EXISTS buckets_signature ON buckets(signature_id);
+"""
+
+# One canonical section of a stored document that resembles a section being checked
+SectionMatch = namedtuple('SectionMatch', ['section', 'product', 'path', 'similarity'])
+
+# A stored document and how much of the checked document it resembles, with
+# the similarity of each shared section
+DocumentMatch = namedtuple('DocumentMatch', ['product', 'path', 'similarity', 'sections'])
+
+def shingle_hashes(text, size=SHINGLE_SIZE):
+    """Hashes of the overlapping word shingles of a text, ignoring case and punctuation"""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) < size:
+        shingles = [' '.join(words)] if words else []
+    else:
+        shingles = {' '.join(words[index:index + size]) for index in range(len(words) - size + 1)}
+    return [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'big')
+            for shingle in shingles]
+
+def minhash(hashes):
+    """MinHash signature of a set of shingle hashes, hashing each shingle once"""
+    bins = [None] * PERMUTATIONS
+    for value in hashes:
+        index, rank = value % PERMUTATIONS, value // PERMUTATIONS
+        if bins[index] is None or rank < bins[index]:
+            bins[index] = rank
+    # Short texts leave bins empty; each borrows from the next filled bin so
+    # that two similar texts still agree on it
+    signature = array('Q', [0] * PERMUTATIONS)
+    for index in range(PERMUTATIONS):
+        for skipped in range(PERMUTATIONS):
+            value = bins[(index + skipped) % PERMUTATIONS]
+            if value is not None:
+                signature[index] = value + skipped * BIN_OFFSET
+                break
+    return signature
+
+def band_buckets(signature):
+    """LSH bucket of each band of a signature"""
+    return [int.from_bytes(hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest(),
+                           'big', signed=True)
+            for band in range(BANDS)]
+
+def estimate_similarity(first, second):
+    """Jaccard similarity estimated from two signatures"""
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+def section_signatures(sections):
+    """Signature of every canonical section with text, keyed by canonical name"""
+    signatures = {}
+    for row in index_sections(sections, ''):
+        if not row.section:
+            continue
+        hashes = shingle_hashes(row.body)
+        if hashes:
+            signatures[row.section] = minhash(hashes)
+    return signatures
+
+def document_sections(path, reader='auto'):
+    """Sections of a Markdown or DOCX vision document"""
+    if path.lower().endswith('.docx'):
+        from .pipeline import docx_blocks
+        from .classify import block_lines
+        return list(iter_sections(block_lines(docx_blocks(path, reader))))
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(iter_sections(f))
+
+class SimilarityIndex:
+    """MinHash signatures of vision documents with LSH buckets in a SQLite database"""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA foreign_keys = ON')
+        self.connection.execute('PRAGMA journal_mode = WAL')
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != SIMILARITY_VERSION:
+            with self.connection:
+                for table in ('buckets', 'signatures', 'documents'):
+                    self.connection.execute(f'DROP TABLE IF EXISTS {table}')
+                self.connection.executescript(SCHEMA)
+                self.connection.execute(f'PRAGMA user_version = {SIMILARITY_VERSION}')
+
+    def update_document(self, path, product_name=None):
+        """Store a document's signatures if it changed since it was stored; returns whether it did"""
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.remove_document(path)
+            return False
+        row = self.connection.execute('SELECT id, digest, mtime_ns, size FROM documents WHERE path = ?',
+                                      (path,)).fetchone()
+        if row and (row[2], row[3]) == (stat.st_mtime_ns, stat.st_size):
+            return False
+        digest = file_digest(path)
+        if row and row[1] == digest:
+            # Touched or freshly checked out, but the same content
+            with self.connection:
+                self.connection.execute('UPDATE documents SET mtime_ns = ?, size = ? WHERE id = ?',
+                                        (stat.st_mtime_ns, stat.st_size, row[0]))
+            return False
+
+        with METRICS.timer('vision_similarity_seconds', operation='update'):
+            sections = document_sections(path)
+            signatures = section_signatures(sections)
+            with self.connection:
+                self.connection.execute('DELETE FROM documents WHERE path = ?', (path,))
+                document_id = self.connection.execute(
+                    'INSERT INTO documents (path, product, digest, mtime_ns, size) VALUES (?, ?, ?, ?, ?)',
+                    (path, product_name or document_product(sections, path), digest, stat.st_mtime_ns,
+                     stat.st_size)).lastrowid
+                for section, signature in signatures.items():
+                    signature_id = self.connection.execute(
+                        'INSERT INTO signatures (document_id, section, signature) VALUES (?, ?, ?)',
+                        (document_id, section, signature.tobytes())).lastrowid
+                    self.connection.executemany(
+                        'INSERT INTO buckets (signature_id, section, band, bucket) VALUES (?, ?, ?, ?)',
+                        [(signature_id, section, band, bucket) for band, bucket in enumerate(band_buckets(signature))])
+        METRICS.increment('vision_similarity_documents', action='stored')
+        return True
+
+    def remove_document(self, path):
+        """Drop a document's signatures"""
+        with self.connection:
+            removed = self.connection.execute('DELETE FROM documents WHERE path = ?',
+                                              (os.path.abspath(path),)).rowcount
+        if removed:
+            METRICS.increment('vision_similarity_documents', action='removed')
+        return bool(removed)
+
+    def refresh(self, paths):
+        """Store new and changed documents under paths and drop ones that are gone; returns (stored, removed)"""
+        found = set(iter_markdown_files(paths))
+        stored = 0
+        for path in sorted(found):
+            try:
+                stored += self.update_document(path)
+            except UnicodeDecodeError:
+                continue
+
+        roots = [os.path.abspath(path).rstrip(os.sep) for path in paths]
+        removed = 0
+        for (path,) in self.connection.execute('SELECT path FROM documents').fetchall():
+            under_root = any(path == root or path.startswith(root + os.sep) for root in roots)
+            if under_root and path not in found and self.remove_document(path):
+                removed += 1
+        return stored, removed
+
+    def candidates(self, section, signature):
+        """Stored signatures of a section that share at least one LSH bucket with a signature"""
+        buckets = band_buckets(signature)
+        values = ', '.join('(?, ?)' for _ in buckets)
+        parameters = [value for band, bucket in enumerate(buckets) for value in (band, bucket)]
+        return self.connection.execute(
+            f"WITH wanted(band, bucket) AS (VALUES {values}) "
+            "SELECT s.signature, d.path, d.product FROM signatures s JOIN documents d ON d.id = s.document_id "
+            "WHERE s.id IN (SELECT b.signature_id FROM wanted w JOIN buckets b "
+            "ON b.section = ? AND b.band = w.band AND b.bucket = w.bucket)",
+            parameters + [section]).fetchall()
+
+    def similar_sections(self, signatures, threshold=DEFAULT_THRESHOLD, exclude=None):
+        """Matches for each checked section, best first, keyed by canonical name"""
+        exclude = os.path.abspath(exclude) if exclude else None
+        matches = {}
+        with METRICS.timer('vision_similarity_seconds', operation='query'):
+            for section, signature in signatures.items():
+                found = []
+                for stored, path, product in self.candidates(section, signature):
+                    if path == exclude:
+                        continue
+                    similarity = estimate_similarity(signature, array('Q', stored))
+                    if similarity >= threshold:
+                        found.append(SectionMatch(section, product, path, similarity))
+                found.sort(key=lambda match: (-match.similarity, match.path))
+                matches[section] = found
+        return matches
+
+    def check(self, sections, threshold=DEFAULT_THRESHOLD, top=3, exclude=None):
+        """Per-section matches and the documents that resemble these sections most"""
+        signatures = section_signatures(sections)
+        matches = self.similar_sections(signatures, threshold, exclude)
+
+        documents = {}
+        for section_matches in matches.values():
+            for match in section_matches:
+                documents.setdefault((match.product, match.path), {})[match.section] = match.similarity
+        # A document scores the mean similarity over every checked section
+        ranked = sorted((DocumentMatch(product, path, sum(shared.values()) / len(signatures), shared)
+                         for (product, path), shared in documents.items()),
+                        key=lambda match: (-match.similarity, match.path))
+        return {section: found[:top] for section, found in matches.items()}, ranked[:top]
+
+    def stats(self):
+        """Number of stored documents and section signatures"""
+        documents = self.connection.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+        signatures = self.connection.execute('SELECT COUNT(*) FROM signatures').fetchone()[0]
+        return documents, signatures
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
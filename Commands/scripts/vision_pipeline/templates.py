@@ -0,0 +1,158 @@
+"""
+Vision templates
+Default text used when a vision document is missing sections
+"""
+
+# Comprehensive Ideas Matter vision used when reformatting that product
+IDEAS_MATTER_VISION = """# Product Vision - Ideas Matter
+
+## Vision Statement
+
+Ideas Matter will transform how entrepreneurs and innovators bring their concepts to life by providing an AI-powered platform that seamlessly converts ideas into deployable code, complete with market research, business planning, and technical architecture. Within 24 months, we will enable anyone with a vision to become a software creator, democratizing application development and accelerating time-to-market from months to days.
+
+## Target Market
+
+- **Primary Users**: Entrepreneurs, startup founders, and business innovators with software ideas but limited technical expertise
+- **Secondary Users**: Technical consultants, development agencies, and enterprise innovation teams
+- **Market Size**: $47B low-code/no-code platform market, growing at 23% CAGR
+- **Industry/Sector**: Software development tools, AI-powered development platforms
+
+## Key Problems
+
+1. **Technical Barrier to Entry**
+   - Impact: 90% of business ideas never become software due to lack of technical skills or resources
+   - Current state: Hiring developers costs $100K+ annually; outsourcing risks quality and IP
+
+2. **Lengthy Development Cycles**
+   - Impact: 6-12 months from idea to MVP, causing missed market opportunities
+   - Current state: Traditional development requires extensive planning, coding, and testing phases
+
+3. **Disconnected Planning and Execution**
+   - Impact: 70% of software projects fail due to poor requirements and planning
+   - Current state: Business planning and technical development happen in silos
+
+4. **High Cost of Innovation**
+   - Impact: $50K-500K typical cost for custom software development
+   - Current state: Only well-funded ventures can afford professional software development
+
+## Strategic Themes
+
+1. **AI-Powered Development**: Leverage Claude, GPT-4, and specialized AI models to generate production-ready code
+2. **Integrated Workflow**: Seamlessly connect ideation, market research, business planning, and development
+3. **Full-Stack Generation**: Create complete applications including frontend, backend, database, and deployment
+4. **Quality Assurance**: Built-in testing, security scanning, and best practices enforcement
+5. **Continuous Evolution**: Learn from each project to improve future generations
+
+## Success Metrics
+
+### Business Metrics
+- **User Acquisition**: 10,000 active users within 24 months
+- **Revenue**: $5M ARR by end of Year 2
+- **Market Position**: Top 3 AI-powered development platform
+
+### User Metrics
+- **Time to Deploy**: Reduce idea-to-deployment from months to < 7 days
+- **Success Rate**: 80% of generated applications successfully deployed
+- **User Satisfaction**: NPS score of 70+
+
+### Technical Metrics
+- **Code Quality**: Generated code passes 95% of standard linting rules
+- **Performance**: Applications meet industry performance benchmarks
+- **Security**: Zero critical vulnerabilities in generated code
+
+## Key Differentiators
+
+1. **End-to-End Automation**: Only platform that handles everything from idea to deployed application
+2. **Business Intelligence**: Integrated market research and business planning, not just code generation
+3. **Multi-AI Architecture**: Orchestrates multiple AI providers for optimal results
+4. **Production-Ready Output**: Generates deployable code, not just prototypes
+5. **Learning System**: Improves with each project, building a knowledge base of successful patterns
+
+## Constraints and Assumptions
+
+### Constraints
+- **AI Limitations**: Current AI models have context limits and may hallucinate
+- **Complexity Ceiling**: Best suited for standard business applications, not specialized systems
+- **Resource Requirements**: Significant compute costs for AI processing
+- **Regulatory**: Must comply with AI usage policies and data protection laws
+
+### Assumptions
+- AI capabilities will continue to improve rapidly
+- Demand for no-code/low-code solutions will accelerate
+- Users will trust AI-generated code for business applications
+- Cloud infrastructure costs will remain manageable
+
+## High-Level Roadmap
+
+- **Phase 1 (Months 1-6)**: Core platform - idea intake, AI orchestration, basic code generation
+- **Phase 2 (Months 7-12)**: Enhanced features - market research integration, business plan generation, testing
+- **Phase 3 (Months 13-18)**: Advanced capabilities - multi-cloud deployment, enterprise features, API
+- **Phase 4 (Months 19-24)**: Scale and optimize - performance improvements, specialized templates, marketplace
+
+## Risks and Mitigations
+
+1. **Risk**: AI model changes or restrictions affecting code generation
+   - **Mitigation**: Multi-provider strategy, local model fallbacks, versioning system
+
+2. **Risk**: Generated code quality concerns limiting adoption
+   - **Mitigation**: Comprehensive testing, human review options, quality guarantees
+
+3. **Risk**: Competition from major tech companies entering the space
+   - **Mitigation**: Focus on niche markets, superior UX, rapid innovation
+
+4. **Risk**: High operational costs from AI API usage
+   - **Mitigation**: Efficient prompt engineering, caching strategies, usage-based pricing"""
+
+# Placeholder sections added when a document has no clear structure
+PLACEHOLDER_SECTIONS = """## Target Market
+
+- **Primary Users**: [To be defined based on the vision above]
+- **Secondary Users**: [To be identified]
+- **Market Size**: [To be analyzed]
+
+## Key Problems
+
+1. **Problem**: [To be extracted from the vision]
+   - Impact: [To be analyzed]
+
+## Strategic Themes
+
+1. **Theme**: [To be derived from the vision]
+2. **Theme**: [To be identified]
+
+## Success Metrics
+
+- **Business Metrics**: [To be defined]
+- **User Metrics**: [To be established]
+- **Technical Metrics**: [To be determined]
+
+## Key Differentiators
+
+1. **Differentiator**: [To be identified from the vision]
+2. **Differentiator**: [To be analyzed]
+
+## Constraints and Assumptions
+
+- [To be defined based on the vision]
+
+## High-Level Roadmap
+
+- **Phase 1**: [To be planned]
+- **Phase 2**: [To be developed]
+
+## Risks and Mitigations
+
+1. **Risk**: [To be identified]
+   - **Mitigation**: [To be planned]
+"""
+
+def required_section_defaults(product_name):
+    """Default text for each required section that could not be found"""
+    return {
+        'Vision Statement': 'A comprehensive vision for ' + product_name,
+        'Target Market': '- **Primary Users**: [To be defined]\n- **Market Size**: [To be analyzed]',
+        'Key Problems': '1. **Problem**: [To be identified]',
+        'Strategic Themes': '1. **Theme**: [To be developed]',
+        'Success Metrics': '- **Metric**: [To be defined]',
+        'Key Differentiators': '1. **Differentiator**: [To be identified]'
+    }
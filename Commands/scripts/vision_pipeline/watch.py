@@ -0,0 +1,170 @@
+"""
+File watching
+Reports changed vision documents through the optional watchdog library
+(inotify, FSEvents, ReadDirectoryChangesW) or by polling with os.scandir
+"""
+
+import os
+import time
+
+# Extensions of the documents a watcher reports
+WATCHED_EXTENSIONS = ('.md', '.docx')
+
+# Quiet time after the last change before a burst of saves is processed
+DEBOUNCE_SECONDS = 0.05
+
+# Documents that sit beside visions without being one
+NOT_VISION_DOCUMENTS = ('readme.md',)
+
+# How often the polling watcher rescans, in seconds
+POLL_INTERVAL = 0.1
+
+# How watch picks its watcher: the library when installed, or always poll
+WATCHERS = ('auto', 'watchdog', 'poll')
+
+def is_watched_document(path):
+    """Vision documents, leaving out READMEs and Word lock and temporary files"""
+    name = os.path.basename(path)
+    if name.startswith('~') or name.startswith('.') or name.lower() in NOT_VISION_DOCUMENTS:
+        return False
+    return os.path.splitext(name)[1].lower() in WATCHED_EXTENSIONS
+
+def iter_documents(paths):
+    """Documents named directly or found under directories"""
+    for path in paths:
+        if not os.path.isdir(path):
+            if is_watched_document(path):
+                yield os.path.abspath(path)
+            continue
+        pending = [path]
+        while pending:
+            with os.scandir(pending.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path)
+                    elif entry.is_file() and is_watched_document(entry.name):
+                        yield os.path.abspath(entry.path)
+
+def file_signature(path):
+    """Modification time and size, or None if the file is gone"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class PollingWatcher:
+    """Standard library watcher that rescans the watched paths"""
+
+    name = 'polling'
+
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.paths = list(paths)
+        self.interval = interval
+        self.signatures = self.scan()
+
+    def scan(self):
+        signatures = {}
+        for path in iter_documents(self.paths):
+            signature = file_signature(path)
+            if signature is not None:
+                signatures[path] = signature
+        return signatures
+
+    def changes(self, timeout=None):
+        """Block until documents are created or modified, or the timeout passes"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval if deadline is None else min(self.interval, max(deadline - time.monotonic(), 0))
+            time.sleep(delay)
+            signatures = self.scan()
+            changed = {path for path, signature in signatures.items() if self.signatures.get(path) != signature}
+            self.signatures = signatures
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+class EventHandler:
+    """Queues document paths from watchdog events"""
+
+    def __init__(self, events, files=None):
+        self.events = events
+        self.files = files
+
+    def dispatch(self, event):
+        if event.is_directory or event.event_type not in ('created', 'modified', 'moved', 'closed'):
+            return
+        # Editors often save by writing a temporary file and renaming it
+        path = os.path.abspath(getattr(event, 'dest_path', None) or event.src_path)
+        if is_watched_document(path) and (self.files is None or path in self.files):
+            self.events.put(path)
+
+class LibraryWatcher:
+    """Watcher built on the native file system events watchdog provides"""
+
+    name = 'watchdog'
+
+    def __init__(self, paths):
+        import queue
+        from watchdog.observers import Observer
+
+        self.queue = queue
+        self.events = queue.Queue()
+        self.observer = Observer()
+        files = {}
+        for path in paths:
+            if os.path.isdir(path):
+                self.observer.schedule(EventHandler(self.events), path, recursive=True)
+            else:
+                files.setdefault(os.path.dirname(os.path.abspath(path)), set()).add(os.path.abspath(path))
+        for directory, names in files.items():
+            self.observer.schedule(EventHandler(self.events, names), directory, recursive=False)
+        self.observer.start()
+
+    def changes(self, timeout=None):
+        """Block until documents are created or modified, or the timeout passes"""
+        try:
+            changed = {self.events.get(timeout=timeout)}
+        except self.queue.Empty:
+            return set()
+        while True:
+            try:
+                changed.add(self.events.get_nowait())
+            except self.queue.Empty:
+                return changed
+
+    def close(self):
+        self.observer.stop()
+        self.observer.join()
+
+def load_watchdog():
+    """Check for the optional watchdog library"""
+    try:
+        import watchdog.observers  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def make_watcher(paths, watcher='auto', interval=POLL_INTERVAL):
+    """Watch paths with watchdog when available, polling otherwise"""
+    if watcher != 'poll':
+        if load_watchdog():
+            return LibraryWatcher(paths)
+        if watcher == 'watchdog':
+            from .reader import MissingDependencyError
+            raise MissingDependencyError(
+                "watchdog is not installed; install it with 'pip install watchdog' or use the 'poll' watcher")
+    return PollingWatcher(paths, interval)
+
+def debounced(watcher, quiet=DEBOUNCE_SECONDS):
+    """Yield sets of changed documents once each burst of saves has settled"""
+    while True:
+        changed = watcher.changes()
+        while True:
+            more = watcher.changes(quiet)
+            if not more:
+                break
+            changed |= more
+        yield changed
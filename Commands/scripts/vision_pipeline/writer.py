@@ -0,0 +1,99 @@
+"""
+Output writer
+Streams a generated document to a temporary file next to its destination
+and renames it into place, so readers never see a half-written file
+"""
+
+import os
+import re
+import filecmp
+import itertools
+
+from .diff import diff_files
+
+# Bytes buffered before each write to disk
+BUFFER_SIZE = 64 * 1024
+
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+
+_temporary_names = itertools.count()
+
+def open_temporary(output_path, buffer_size=BUFFER_SIZE, binary=False):
+    """Create a hidden temporary file beside the output, returning its path and handle"""
+    directory, name = os.path.split(os.path.abspath(output_path))
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f".{name}.{os.getpid()}-{next(_temporary_names)}.tmp")
+    # Created like open() would, so the umask sets the final permissions
+    descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    if binary:
+        return path, open(descriptor, 'wb', buffering=buffer_size)
+    return path, open(descriptor, 'w', encoding='utf-8', buffering=buffer_size)
+
+def remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+class MarkdownWriter:
+    """Buffered, atomic writer for generated markdown
+
+    Text is written as it arrives. Only the trailing whitespace is held back,
+    so runs of blank lines can be collapsed and the document stripped without
+    keeping it in memory. A document identical to the existing output is
+    discarded so the output keeps its mtime.
+    """
+
+    def __init__(self, output_path, collapse_blank_lines=False, strip=False, buffer_size=BUFFER_SIZE):
+        self.output_path = output_path
+        self.collapse_blank_lines = collapse_blank_lines
+        self.strip = strip
+        self.temporary_path, self.file = open_temporary(output_path, buffer_size)
+        self.pending = ''
+        self.started = False
+        self.replaced = False
+        self.changes = None
+        self.bytes_written = 0
+
+    def write(self, text):
+        text = self.pending + text
+        body = text.rstrip()
+        self.pending = text[len(body):]
+        if self.strip and not self.started:
+            body = body.lstrip()
+        if body:
+            self.started = True
+            self.file.write(self.collapse(body))
+
+    def collapse(self, text):
+        return BLANK_LINES_PATTERN.sub('\n\n', text) if self.collapse_blank_lines else text
+
+    def close(self):
+        """Finish the document and move it into place unless nothing changed"""
+        if not self.strip and self.pending:
+            self.file.write(self.collapse(self.pending))
+        self.file.close()
+
+        if os.path.exists(self.output_path):
+            if filecmp.cmp(self.output_path, self.temporary_path, shallow=False):
+                remove_quietly(self.temporary_path)
+                self.changes = []
+                return
+            self.changes = diff_files(self.output_path, self.temporary_path)
+        self.bytes_written = os.path.getsize(self.temporary_path)
+        os.replace(self.temporary_path, self.output_path)
+        self.replaced = True
+
+    def abort(self):
+        """Drop the partial document, leaving any existing output alone"""
+        self.file.close()
+        remove_quietly(self.temporary_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()